@@ -0,0 +1,551 @@
+# coding: utf-8
+
+'''
+FbxParser.py分阶段性能测试。
+
+不需要FbxSdk以及Fbx文件:在进程内生成合成场景，通过一个模拟FbxCommon接口的替身模块提供给FbxParser.py，
+包括Mesh、图层、蒙皮骨骼、动画Stack以及EvaluateGlobalTransform。替身的矩阵预先计算，不计入FbxParser的耗时。
+
+每个场景按照Mesh.initWithFbxMesh的顺序执行所有阶段(不写文件)，记录每个阶段的:
+    time            耗时，秒，多次运行取最小值。包含内部调用的阶段，例如parseAnim包含parseCluster、parseIndicesAndWeights
+    peakMemoryKB    阶段内进程内存峰值的增长，KB
+    sdkCalls        替身FbxSdk接口的调用次数，只有initWithFbxMesh直接调用的阶段，不包括数组元素的GetAt
+    rawSize         生成数据的大小，只有generate*Bytes阶段
+    size            zlib压缩之后的大小，只有generate*Bytes阶段
+
+用法:
+    python Benchmark.py                                 运行small预设的场景
+    python Benchmark.py -preset medium -out a.json      运行medium预设的场景，结果保存为json
+    python Benchmark.py -scene 10000,50,300             指定场景:三角形数,骨骼数,帧数，可以指定多个
+    python Benchmark.py -options "-quat -weld"          FbxParser.py的转换参数，默认为-normal -uv0 -uv1 -anim
+    python Benchmark.py -compare a.json b.json          比较两次结果，耗时增长超过-threshold时返回1
+
+'''
+
+import argparse
+import json
+import math
+import numpy
+import os
+import sys
+import time
+import types
+import zlib
+
+import FbxBinary
+from FbxBinary import FbxAMatrix, FbxVector4, FbxTime, FbxTimeSpan, FbxLayerElement, FbxLayerElementArray, FbxDeformer
+
+# 预设场景:(三角形数, 骨骼数, 帧数)
+PRESETS = {
+    "small"     : [(1000, 0, 100), (1000, 20, 100), (10000, 50, 300)],
+    "medium"    : [(100000, 0, 1000), (100000, 60, 1000)],
+    "large"     : [(1000000, 200, 10000)],
+}
+# 测试的阶段
+STAGES = ["parseTransform", "parseIndices", "parseVertices", "parseUV0", "parseUV1", "parseNormals", "parseCluster", "parseIndicesAndWeights", "parseAnim", "parseAnimBounds", "splitMesh", "generateMeshBytes", "generateAnimBytes"]
+# 替身场景的时间模式，30帧
+TIME_MODE = 6
+# 每根骨骼预先计算的动画矩阵数量，帧数超过时循环使用
+CYCLE_FRAMES = 64
+# 骨骼间距
+BONE_LENGTH = 10.0
+
+# ----------------------------------------------------------------------------
+# FbxCommon替身
+# ----------------------------------------------------------------------------
+
+# 替身对象的基类，统计FbxSdk接口(大写开头的方法)的调用次数
+class StandInObject(object):
+    """docstring for StandInObject"""
+    calls = 0
+
+    def __getattribute__(self, name):
+        if name[0].isupper():
+            StandInObject.calls += 1
+            pass
+        return object.__getattribute__(self, name)
+
+    pass # end class
+
+# 替身节点，全局矩阵预先计算
+class StandInNode(StandInObject):
+    """docstring for StandInNode"""
+    def __init__(self, uid, name, bindMatrix, matrices):
+        super(StandInNode, self).__init__()
+        self.uid        = uid
+        self.name       = name
+        self.bindMatrix = bindMatrix    # 默认姿势的全局矩阵
+        self.matrices   = matrices      # CYCLE_FRAMES*4*4，每一帧的全局矩阵
+        self.frameTicks = FbxBinary.FBX_TICKS_PER_SECOND / FbxBinary.getFrameRate(TIME_MODE)
+        pass # end func
+
+    def GetName(self):
+        return self.name
+
+    def GetUniqueID(self):
+        return self.uid
+
+    def EvaluateGlobalTransform(self, time = None):
+        if time is None:
+            return FbxAMatrix(self.bindMatrix)
+        return FbxAMatrix(self.matrices[int(round(time.Get() / self.frameTicks)) % CYCLE_FRAMES])
+        pass # end func
+
+    def EvaluateLocalTransform(self, time = None):
+        return self.EvaluateGlobalTransform(time)
+
+    def GetGeometricTranslation(self, pivot = 0):
+        return FbxVector4(0, 0, 0)
+
+    def GetGeometricRotation(self, pivot = 0):
+        return FbxVector4(0, 0, 0)
+
+    def GetGeometricScaling(self, pivot = 0):
+        return FbxVector4(1, 1, 1)
+
+    pass # end class
+
+# 替身图层元素
+class StandInLayerElement(StandInObject):
+    """docstring for StandInLayerElement"""
+    def __init__(self, mappingMode, referenceMode, direct, index = None):
+        super(StandInLayerElement, self).__init__()
+        self.mappingMode   = mappingMode
+        self.referenceMode = referenceMode
+        self.direct        = FbxLayerElementArray(direct)
+        self.index         = FbxLayerElementArray(index if index is not None else numpy.zeros(0, numpy.int32))
+        pass # end func
+
+    def GetMappingMode(self):
+        return self.mappingMode
+
+    def GetReferenceMode(self):
+        return self.referenceMode
+
+    def GetDirectArray(self):
+        return self.direct
+
+    def GetIndexArray(self):
+        return self.index
+
+    pass # end class
+
+# 替身图层
+class StandInLayer(StandInObject):
+    """docstring for StandInLayer"""
+    def __init__(self, normals, uvs):
+        super(StandInLayer, self).__init__()
+        self.normals = normals
+        self.uvs     = uvs
+        pass # end func
+
+    def GetNormals(self):
+        return self.normals
+
+    def GetUVs(self, textureType = None):
+        return self.uvs
+
+    pass # end class
+
+# 替身骨骼
+class StandInCluster(StandInObject):
+    """docstring for StandInCluster"""
+    def __init__(self, link, indices, weights):
+        super(StandInCluster, self).__init__()
+        self.link    = link
+        self.indices = indices
+        self.weights = weights
+        pass # end func
+
+    def GetLink(self):
+        return self.link
+
+    def GetControlPointIndices(self):
+        return self.indices
+
+    def GetControlPointWeights(self):
+        return self.weights
+
+    def GetTransformMatrix(self, matrix):
+        matrix.CopyFrom(FbxAMatrix())
+        return matrix
+
+    def GetTransformLinkMatrix(self, matrix):
+        matrix.CopyFrom(self.link.EvaluateGlobalTransform())
+        return matrix
+
+    pass # end class
+
+# 替身蒙皮
+class StandInSkin(StandInObject):
+    """docstring for StandInSkin"""
+    def __init__(self, clusters):
+        super(StandInSkin, self).__init__()
+        self.clusters = clusters
+        pass # end func
+
+    def GetClusterCount(self):
+        return len(self.clusters)
+
+    def GetCluster(self, index):
+        return self.clusters[index]
+
+    pass # end class
+
+# 替身Mesh，只包含三角形
+class StandInMesh(StandInObject):
+    """docstring for StandInMesh"""
+    def __init__(self, node, points, polygons, layers, skin):
+        super(StandInMesh, self).__init__()
+        self.node     = node
+        self.points   = points      # 控制点，N*3
+        self.polygons = polygons    # 三角形控制点索引，T*3
+        self.layers   = layers
+        self.skin     = skin
+        pass # end func
+
+    def GetNode(self, index = 0):
+        return self.node
+
+    def GetPolygonCount(self):
+        return len(self.polygons)
+
+    def GetPolygonSize(self, index):
+        return 3
+
+    def GetPolygonVertex(self, index, position):
+        return int(self.polygons[index, position])
+
+    def GetTextureUVIndex(self, index, position, textureType = None):
+        return int(self.layers[0].uvs.index.data[index * 3 + position])
+
+    def GetPolygonVertices(self):
+        return self.polygons.ravel().tolist()
+
+    def GetControlPointsCount(self):
+        return len(self.points)
+
+    def GetControlPointsArray(self):
+        return self.points
+
+    def GetLayerCount(self):
+        return len(self.layers)
+
+    def GetLayer(self, index):
+        return self.layers[index]
+
+    def GetDeformerCount(self, deformerType = None):
+        return 1 if self.skin else 0
+
+    def GetDeformer(self, index, deformerType = None):
+        return self.skin
+
+    pass # end class
+
+# 替身动画Stack
+class StandInAnimStack(StandInObject):
+    """docstring for StandInAnimStack"""
+    def __init__(self, frames):
+        super(StandInAnimStack, self).__init__()
+        frameTime = FbxTime()
+        frameTime.SetTime(0, 0, 0, 1, 0, TIME_MODE)
+        self.timeSpan = FbxTimeSpan(0, frameTime.Get() * (frames - 1))
+        pass # end func
+
+    def GetLocalTimeSpan(self):
+        return self.timeSpan
+
+    pass # end class
+
+# 替身场景，同时作为GlobalSettings
+class StandInScene(StandInObject):
+    """docstring for StandInScene"""
+    def __init__(self, stack):
+        super(StandInScene, self).__init__()
+        self.stack = stack
+        pass # end func
+
+    def GetSrcObject(self, classId = None, index = 0):
+        return self.stack
+
+    def SetCurrentAnimationStack(self, stack):
+        pass
+
+    def GetGlobalSettings(self):
+        return self
+
+    def GetTimeMode(self):
+        return TIME_MODE
+
+    pass # end class
+
+# 生成FbxCommon替身模块:数学类型以及常量使用FbxBinary，场景对象由合成场景提供
+def installStandIn():
+    standIn = types.ModuleType("FbxCommon")
+    for name, value in vars(FbxBinary).items():
+        if not name.startswith("_"):
+            setattr(standIn, name, value)
+            pass
+        pass
+    sys.modules["FbxCommon"] = standIn
+    pass # end func
+
+# ----------------------------------------------------------------------------
+# 合成场景
+# ----------------------------------------------------------------------------
+
+# 节点每一帧的全局矩阵，绕Z轴摆动
+def getCycleMatrices(translation, phase):
+    matrices = numpy.empty((CYCLE_FRAMES, 4, 4))
+    for i in range(CYCLE_FRAMES):
+        angle = 20.0 * math.sin(2 * math.pi * i / CYCLE_FRAMES + phase)
+        matrices[i] = FbxAMatrix(FbxVector4(*translation), FbxVector4(0, 0, angle), FbxVector4(1, 1, 1)).m
+        pass
+    return matrices
+    pass # end func
+
+# 生成圆柱体网格:三角形数、骨骼数、帧数。骨骼沿Y轴排列，每个控制点受高度相近的骨骼影响
+def buildScene(triangles, bones, frames):
+    segs  = 64 if triangles >= 256 else 4
+    rings = int(math.ceil(triangles / (2.0 * segs))) + 1
+    height= BONE_LENGTH * max(bones, 1)
+    # 控制点
+    ys     = numpy.linspace(0, height, rings)
+    angles = numpy.linspace(0, 2 * math.pi, segs, endpoint = False)
+    points = numpy.column_stack([numpy.tile(5 * numpy.cos(angles), rings), numpy.repeat(ys, segs), numpy.tile(5 * numpy.sin(angles), rings)])
+    # 三角形
+    i, j  = numpy.meshgrid(numpy.arange(rings - 1), numpy.arange(segs), indexing = "ij")
+    a     = (i * segs + j).ravel()
+    b     = (i * segs + (j + 1) % segs).ravel()
+    polygons = numpy.column_stack([a, b, b + segs, a, b + segs, a + segs]).reshape(-1, 3)[0:triangles]
+    corners  = polygons.ravel()
+    # 图层:法线按照多边形顶点，UV0按照多边形顶点索引，UV1按照控制点
+    normals  = points[corners] * [1, 0, 1] / 5.0
+    uvs      = numpy.column_stack([numpy.tile(numpy.arange(segs) / float(segs), rings), numpy.repeat(ys / height, segs)])
+    layers   = [
+        StandInLayer(StandInLayerElement(FbxLayerElement.eByPolygonVertex, FbxLayerElement.eDirect, normals),
+                     StandInLayerElement(FbxLayerElement.eByPolygonVertex, FbxLayerElement.eIndexToDirect, uvs, corners.astype(numpy.int32))),
+        StandInLayer(None, StandInLayerElement(FbxLayerElement.eByControlPoint, FbxLayerElement.eDirect, uvs[:, ::-1].copy())),
+    ]
+    # 骨骼
+    skin = None
+    if bones > 0:
+        clusters = []
+        for k in range(bones):
+            translation = (0, BONE_LENGTH * k, 0)
+            bind = FbxAMatrix(FbxVector4(*translation), FbxVector4(0, 0, 0), FbxVector4(1, 1, 1)).m
+            node = StandInNode(k + 2, "Bone%d" % k, bind, getCycleMatrices(translation, k))
+            weights = numpy.maximum(0, 1 - numpy.abs(points[:, 1] - BONE_LENGTH * k) / (1.4 * BONE_LENGTH))
+            indices = numpy.flatnonzero(weights > 0).astype(numpy.int32)
+            clusters.append(StandInCluster(node, indices, weights[indices]))
+            pass
+        skin = StandInSkin(clusters)
+        pass
+    node = StandInNode(1, "Mesh", numpy.identity(4), getCycleMatrices((0, 0, 0), 0))
+    mesh = StandInMesh(node, points, polygons, layers, skin)
+    return StandInScene(StandInAnimStack(frames)), mesh
+    pass # end func
+
+# ----------------------------------------------------------------------------
+# 测试
+# ----------------------------------------------------------------------------
+
+# 按照Mesh.initWithFbxMesh的顺序执行所有阶段，不写文件。返回每个阶段的结果
+def runScene(FbxParser, triangles, bones, frames):
+    config = FbxParser.config
+    scene, fbxMesh = buildScene(triangles, bones, frames)
+    mesh   = FbxParser.Mesh()
+    mesh.fbxMesh        = fbxMesh
+    mesh.scene          = scene
+    mesh.name           = fbxMesh.GetNode().GetName()
+    mesh.fbxFilePath    = "benchmark.fbx"
+    mesh.transformCache = FbxParser.TransformCache(config.cache_mb * 1024 * 1024)
+    # 使用FbxParser的-profile记录每个阶段
+    profiler = FbxParser.StageProfiler(mesh.fbxFilePath)
+    FbxParser.StageProfiler.current = profiler
+    try:
+        extras = runStages(FbxParser, mesh)
+        pass
+    finally:
+        FbxParser.StageProfiler.current = None
+        pass
+    # 只保留原始Mesh的阶段，按照STAGES的顺序
+    stages = []
+    for record in profiler.records:
+        if record["name"] == mesh.name and record["stage"] in STAGES:
+            stage = {"stage" : record["stage"], "calls" : record["calls"], "time" : record["wall"], "peakMemoryKB" : record["peakMemoryKB"]}
+            stage.update(extras.get(record["stage"], {}))
+            stages.append(stage)
+            pass
+        pass
+    return sorted(stages, key = lambda stage: STAGES.index(stage["stage"]))
+    pass # end func
+
+# 执行Mesh的所有阶段，返回每个阶段的FbxSdk接口调用次数，以及generate*Bytes生成数据的大小
+def runStages(FbxParser, mesh):
+    config = FbxParser.config
+    steps  = [("parseTransform", mesh.parseTransform), ("parseIndices", mesh.parseIndices), ("parseVertices", mesh.parseVertices)]
+    if config.uv0:
+        steps.append(("parseUV0", mesh.parseUV0))
+        pass
+    if config.uv1:
+        steps.append(("parseUV1", mesh.parseUV1))
+        pass
+    if config.normal:
+        steps.append(("parseNormals", mesh.parseNormals))
+        pass
+    if config.anim:
+        steps.append(("parseAnim", mesh.parseAnim))
+        pass
+    if config.anim and config.bounds:
+        steps.append(("parseAnimBounds", mesh.parseAnimBounds))
+        pass
+    steps.append(("splitMesh", mesh.splitMesh))
+    extras = {}
+    for name, func in steps:
+        calls = StandInObject.calls
+        func()
+        extras[name] = {"sdkCalls" : StandInObject.calls - calls}
+        pass
+    # 写数据，统计大小
+    outputs = [("generateMeshBytes", mesh.generateMeshBytes)]
+    if config.anim:
+        outputs.append(("generateAnimBytes", mesh.generateAnimBytes))
+        pass
+    for name, generate in outputs:
+        calls = StandInObject.calls
+        data  = FbxParser.ByteArray()
+        generate(data)
+        raw   = data.getBytes()
+        extras[name] = {"sdkCalls" : StandInObject.calls - calls, "rawSize" : len(raw), "size" : len(zlib.compress(raw, config.level))}
+        pass
+    return extras
+    pass # end func
+
+# 运行所有场景，每个场景多次运行取最小耗时
+def runBenchmark(FbxParser, scenes, repeat, verbose):
+    results = []
+    for triangles, bones, frames in scenes:
+        best = None
+        for i in range(repeat):
+            stdout = sys.stdout
+            if not verbose:
+                sys.stdout = open(os.devnull, "w")
+                pass
+            try:
+                stages = runScene(FbxParser, triangles, bones, frames)
+                pass
+            finally:
+                if not verbose:
+                    sys.stdout.close()
+                    sys.stdout = stdout
+                    pass
+                pass
+            if best is None:
+                best = stages
+                pass
+            else:
+                for record, other in zip(best, stages):
+                    record["time"] = min(record["time"], other["time"])
+                    pass
+                pass
+            pass
+        name = "t%d_b%d_f%d" % (triangles, bones, frames)
+        for record in best:
+            record.update({"scene" : name, "triangles" : triangles, "bones" : bones, "frames" : frames})
+            results.append(record)
+            pass
+        printResults(name, best)
+        pass
+    return results
+    pass # end func
+
+# 打印一个场景的结果
+def printResults(name, records):
+    print("scene %s:" % name)
+    for record in records:
+        calls = ""
+        if "sdkCalls" in record:
+            calls = "%d calls" % record["sdkCalls"]
+            pass
+        size = ""
+        if "rawSize" in record:
+            size = "%d -> %d bytes" % (record["rawSize"], record["size"])
+            pass
+        print("\t%-24s %10.4fs %8dKB %12s  %s" % (record["stage"], record["time"], record["peakMemoryKB"], calls, size))
+        pass
+    pass # end func
+
+# 比较两次结果，返回耗时增长超过阈值的阶段数
+def compareResults(fileA, fileB, threshold):
+    with open(fileA, "r") as f:
+        resultsA = json.load(f)["results"]
+        pass
+    with open(fileB, "r") as f:
+        resultsB = json.load(f)["results"]
+        pass
+    records    = dict([((r["scene"], r["stage"]), r) for r in resultsA])
+    regressions= 0
+    for record in resultsB:
+        base = records.get((record["scene"], record["stage"]))
+        if base is None:
+            continue
+        ratio = record["time"] / max(base["time"], 1e-6)
+        flag  = ""
+        if ratio > threshold and record["time"] - base["time"] > 0.001:
+            flag = "REGRESSION"
+            regressions += 1
+            pass
+        size = ""
+        if "size" in record and "size" in base and record["size"] != base["size"]:
+            size = "size %d -> %d" % (base["size"], record["size"])
+            pass
+        print("%-28s %-24s %10.4fs -> %10.4fs x%.2f %s %s" % (record["scene"], record["stage"], base["time"], record["time"], ratio, size, flag))
+        pass
+    return regressions
+    pass # end func
+
+# 解析场景参数:三角形数,骨骼数,帧数
+def parseScene(value):
+    triangles, bones, frames = [int(item) for item in value.split(",")]
+    return (triangles, bones, frames)
+    pass # end func
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-preset",   help = "scene preset",      action = "store",       default = "small",   choices = sorted(PRESETS.keys()))
+    parser.add_argument("-scene",    help = "tris,bones,frames", action = "append",      default = None,      type = parseScene)
+    parser.add_argument("-options",  help = "FbxParser options", action = "store",       default = "-normal -uv0 -uv1 -anim")
+    parser.add_argument("-repeat",   help = "runs per scene",    action = "store",       default = 1,         type = int)
+    parser.add_argument("-out",      help = "result json file",  action = "store",       default = "")
+    parser.add_argument("-compare",  help = "compare two files", action = "store",       default = None,      nargs = 2)
+    parser.add_argument("-threshold",help = "regression ratio",  action = "store",       default = 1.2,       type = float)
+    parser.add_argument("-verbose",  help = "FbxParser log",     action = "store_true",  default = False)
+    option = parser.parse_args()
+
+    if option.compare:
+        if compareResults(option.compare[0], option.compare[1], option.threshold) > 0:
+            sys.exit(1)
+            pass
+        sys.exit(0)
+        pass
+
+    # 使用替身模块导入FbxParser，并使用指定的转换参数
+    installStandIn()
+    import FbxParser
+    argv     = sys.argv
+    sys.argv = [argv[0]] + option.options.split()
+    FbxParser.config = FbxParser.parseArgument()
+    sys.argv = argv
+
+    scenes  = option.scene or PRESETS[option.preset]
+    results = runBenchmark(FbxParser, scenes, option.repeat, option.verbose)
+    if option.out:
+        with open(option.out, "w") as f:
+            json.dump({"version" : FbxParser.VERSION, "options" : option.options, "results" : results}, f, indent = 4, sort_keys = True)
+            pass
+        print("write %s" % option.out)
+        pass
+
+    pass
@@ -0,0 +1,1762 @@
+# coding: utf-8
+
+'''
+纯Python二进制FBX解析，不依赖Autodesk FbxSdk。
+
+    直接内存映射"Kaydara FBX Binary"(7.x)文件并解析节点树。数组属性(Vertices、PolygonVertexIndex、
+    UV、Normals、Indexes、Weights、KeyTime、KeyValueFloat等)在第一次访问时才解码:
+    未压缩的数组直接以numpy视图映射到文件内存上(零拷贝)，压缩的数组只解压一次并缓存。
+
+    在节点树之上实现了FbxParser.py用到的FbxCommon接口子集:
+        InitializeSdkObjects、LoadScene、FbxAMatrix、FbxVector4、FbxTime、FbxNode、FbxMesh、
+        FbxCamera、FbxDeformer、FbxAnimStack、FbxAnimLayer、FbxAnimCurve、FbxAnimCurveDef、FbxAnimCurveBase、FbxConstraint、
+        FbxGeometryConverter、FbxAxisSystem
+    FbxNode的LclTranslation、LclRotation、LclScaling只支持GetCurve(layer, channel)，用于直接读取关键帧。
+    FbxParser.py在找不到FbxCommon时自动使用本模块，Mesh以及Camera3D不需要任何修改。
+
+    除FbxSdk接口之外，FbxMesh额外提供以下零拷贝接口，供批量解析使用:
+        GetControlPointsArray()     控制点，N*3 float64
+        GetPolygonVerticesArray()   三角化之后的顶点索引，int32
+
+限制:
+    只支持二进制FBX，不支持ASCII FBX。
+    节点继承类型统一按RSrs处理，不解析约束以及注视目标(只提供GetTarget、GetTargetUp)。
+    曲线的外推方式只读取不计算，Evaluate在关键帧范围之外统一按常量计算。
+    坐标系转换作用于根节点的直接子节点，与FbxSdk ConvertScene相同。
+'''
+
+import math
+import mmap
+import struct
+import sys
+import zlib
+
+import numpy
+
+# 文件头
+FBX_BINARY_MAGIC = b"Kaydara FBX Binary  \x00"
+# 每秒tick数
+FBX_TICKS_PER_SECOND = 46186158000
+# 数组类型
+ARRAY_TYPES = {
+    b"f" : numpy.dtype("<f4"),
+    b"d" : numpy.dtype("<f8"),
+    b"l" : numpy.dtype("<i8"),
+    b"i" : numpy.dtype("<i4"),
+    b"b" : numpy.dtype("u1"),
+}
+# 标量类型。C为单字节，保留原始字节值:布尔值为0或1，曲线外推类型为字符编码
+SCALAR_TYPES = {
+    b"Y" : struct.Struct("<h"),
+    b"C" : struct.Struct("<B"),
+    b"I" : struct.Struct("<i"),
+    b"F" : struct.Struct("<f"),
+    b"D" : struct.Struct("<d"),
+    b"L" : struct.Struct("<q"),
+}
+# 数组头:长度、编码、压缩后长度
+ARRAY_HEADER = struct.Struct("<III")
+# 节点头:7500之前为32位，之后为64位
+RECORD_HEADER_32 = struct.Struct("<III")
+RECORD_HEADER_64 = struct.Struct("<QQQ")
+# 帧率
+FRAME_RATES = {
+    0 : 30.0,   1 : 120.0,  2 : 100.0,  3 : 60.0,   4 : 50.0,   5 : 48.0,
+    6 : 30.0,   7 : 30.0,   8 : 29.97,  9 : 29.97,  10: 25.0,   11: 24.0,
+    12: 1000.0, 13: 23.976, 15: 96.0,   16: 72.0,   17: 59.94,  18: 119.88,
+}
+# 自定义帧率，TimeMode为eCustom(14)时使用，每次构建场景时重新设置
+customFrameRate = 30.0
+
+# 转换为字符串
+if sys.version_info[0] >= 3:
+    def toStr(data):
+        return data.decode("utf-8", "replace")
+        pass # end func
+else:
+    def toStr(data):
+        return data
+        pass # end func
+
+# 拆分FBX对象名称"Name\x00\x01Class"
+def splitObjectName(name):
+    return name.split("\x00\x01")[0]
+    pass # end func
+
+# ----------------------------------------------------------------------------
+# 节点树
+# ----------------------------------------------------------------------------
+
+# 数组属性，延迟解码
+class FbxArrayProperty(object):
+    """docstring for FbxArrayProperty"""
+    def __init__(self, buffer, typeCode, count, encoding, offset, length):
+        super(FbxArrayProperty, self).__init__()
+        self.buffer     = buffer        # 文件内存
+        self.typeCode   = typeCode      # 类型
+        self.count      = count         # 元素数量
+        self.encoding   = encoding      # 0:未压缩 1:zlib
+        self.offset     = offset        # 数据偏移
+        self.length     = length        # 数据长度
+        self.data       = None          # 解码后的数据
+        pass # end func
+
+    # 解码数组
+    def decode(self):
+        if self.data is None:
+            dtype = ARRAY_TYPES[self.typeCode]
+            if self.encoding == 0:
+                # 零拷贝，直接映射文件内存
+                self.data = numpy.frombuffer(self.buffer, dtype, self.count, self.offset)
+                pass
+            else:
+                raw = zlib.decompress(self.buffer[self.offset : self.offset + self.length])
+                self.data = numpy.frombuffer(raw, dtype, self.count)
+                pass
+            pass
+        return self.data
+        pass # end func
+
+    pass # end class
+
+# FBX节点记录
+class FbxRecord(object):
+    """docstring for FbxRecord"""
+    def __init__(self, name):
+        super(FbxRecord, self).__init__()
+        self.name       = name          # 节点名称
+        self.properties = []            # 属性列表
+        self.children   = []            # 子节点
+        pass # end func
+
+    # 获取属性，数组属性在此时解码
+    def value(self, index = 0):
+        prop = self.properties[index]
+        if isinstance(prop, FbxArrayProperty):
+            return prop.decode()
+        return prop
+        pass # end func
+
+    # 查找第一个子节点
+    def find(self, name):
+        for child in self.children:
+            if child.name == name:
+                return child
+            pass
+        return None
+        pass # end func
+
+    # 查找所有子节点
+    def findAll(self, name):
+        return [child for child in self.children if child.name == name]
+        pass # end func
+
+    # 获取子节点的第一个属性
+    def childValue(self, name, default = None):
+        child = self.find(name)
+        if child is None or len(child.properties) == 0:
+            return default
+        return child.value(0)
+        pass # end func
+
+    # 解析Properties70
+    def properties70(self):
+        props = {}
+        node  = self.find("Properties70")
+        if node is None:
+            return props
+        for p in node.findAll("P"):
+            values = p.properties[4:]
+            if len(values) == 1:
+                props[p.properties[0]] = values[0]
+                pass
+            else:
+                props[p.properties[0]] = values
+                pass
+            pass
+        return props
+        pass # end func
+
+    pass # end class
+
+# 二进制FBX读取
+class FbxBinaryReader(object):
+    """docstring for FbxBinaryReader"""
+    def __init__(self, buffer):
+        super(FbxBinaryReader, self).__init__()
+        self.buffer  = buffer
+        self.version = 0
+        self.header  = RECORD_HEADER_32
+        pass # end func
+
+    # 解析文件
+    def read(self):
+        if self.buffer[0 : len(FBX_BINARY_MAGIC)] != FBX_BINARY_MAGIC:
+            raise ValueError("not a binary fbx file")
+        self.version = struct.unpack_from("<I", self.buffer, 23)[0]
+        if self.version >= 7500:
+            self.header = RECORD_HEADER_64
+            pass
+        root   = FbxRecord("")
+        offset = 27
+        size   = len(self.buffer)
+        while offset < size:
+            record, offset = self.readRecord(offset)
+            if record is None:
+                break
+            root.children.append(record)
+            pass
+        return root
+        pass # end func
+
+    # 解析节点
+    def readRecord(self, offset):
+        buf = self.buffer
+        endOffset, propCount, propLength = self.header.unpack_from(buf, offset)
+        offset += self.header.size
+        # 空节点，表示子节点列表结束
+        if endOffset == 0:
+            return None, offset + 1
+        nameLen = ord(buf[offset : offset + 1])
+        record  = FbxRecord(toStr(buf[offset + 1 : offset + 1 + nameLen]))
+        offset += 1 + nameLen
+        # 解析属性
+        for _ in range(propCount):
+            typeCode = buf[offset : offset + 1]
+            offset  += 1
+            if typeCode in SCALAR_TYPES:
+                fmt = SCALAR_TYPES[typeCode]
+                record.properties.append(fmt.unpack_from(buf, offset)[0])
+                offset += fmt.size
+                pass
+            elif typeCode in ARRAY_TYPES:
+                count, encoding, length = ARRAY_HEADER.unpack_from(buf, offset)
+                offset += ARRAY_HEADER.size
+                record.properties.append(FbxArrayProperty(buf, typeCode, count, encoding, offset, length))
+                offset += length
+                pass
+            elif typeCode == b"S" or typeCode == b"R":
+                length = struct.unpack_from("<I", buf, offset)[0]
+                offset += 4
+                data = buf[offset : offset + length]
+                if typeCode == b"S":
+                    data = toStr(data)
+                    pass
+                record.properties.append(data)
+                offset += length
+                pass
+            else:
+                raise ValueError("unknown property type %r" % typeCode)
+            pass
+        # 解析子节点
+        while offset < endOffset:
+            child, offset = self.readRecord(offset)
+            if child is None:
+                break
+            record.children.append(child)
+            pass
+        return record, endOffset
+        pass # end func
+
+    pass # end class
+
+# ----------------------------------------------------------------------------
+# 数学
+# ----------------------------------------------------------------------------
+
+# 旋转矩阵，角度为度
+def rotationX(deg):
+    r = math.radians(deg)
+    c, s = math.cos(r), math.sin(r)
+    return numpy.array([[1, 0, 0, 0], [0, c, -s, 0], [0, s, c, 0], [0, 0, 0, 1]], numpy.float64)
+    pass # end func
+
+def rotationY(deg):
+    r = math.radians(deg)
+    c, s = math.cos(r), math.sin(r)
+    return numpy.array([[c, 0, s, 0], [0, 1, 0, 0], [-s, 0, c, 0], [0, 0, 0, 1]], numpy.float64)
+    pass # end func
+
+def rotationZ(deg):
+    r = math.radians(deg)
+    c, s = math.cos(r), math.sin(r)
+    return numpy.array([[c, -s, 0, 0], [s, c, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]], numpy.float64)
+    pass # end func
+
+# 欧拉角旋转矩阵，order为FbxEuler::EOrder
+def eulerMatrix(r, order = 0):
+    x, y, z = rotationX(r[0]), rotationY(r[1]), rotationZ(r[2])
+    if order == 1:      # XZY
+        return y.dot(z).dot(x)
+    elif order == 2:    # YZX
+        return x.dot(z).dot(y)
+    elif order == 3:    # YXZ
+        return z.dot(x).dot(y)
+    elif order == 4:    # ZXY
+        return y.dot(x).dot(z)
+    elif order == 5:    # ZYX
+        return x.dot(y).dot(z)
+    return z.dot(y).dot(x)
+    pass # end func
+
+# 平移矩阵
+def translationMatrix(t):
+    m = numpy.identity(4)
+    m[0:3, 3] = t[0:3]
+    return m
+    pass # end func
+
+# 缩放矩阵
+def scalingMatrix(s):
+    m = numpy.identity(4)
+    m[0, 0], m[1, 1], m[2, 2] = s[0], s[1], s[2]
+    return m
+    pass # end func
+
+# FbxVector4
+class FbxVector4(object):
+    """docstring for FbxVector4"""
+    def __init__(self, x = 0.0, y = 0.0, z = 0.0, w = 1.0):
+        super(FbxVector4, self).__init__()
+        if isinstance(x, FbxVector4):
+            self.data = list(x.data)
+            pass
+        else:
+            self.data = [float(x), float(y), float(z), float(w)]
+            pass
+        pass # end func
+
+    def __getitem__(self, index):
+        return self.data[index]
+
+    def __setitem__(self, index, value):
+        self.data[index] = value
+
+    def __len__(self):
+        return 4
+
+    def __repr__(self):
+        return "FbxVector4(%f, %f, %f, %f)" % tuple(self.data)
+
+    # 长度
+    def Length(self):
+        return math.sqrt(self.data[0] ** 2 + self.data[1] ** 2 + self.data[2] ** 2)
+        pass # end func
+
+    # 归一化，忽略w
+    def Normalize(self):
+        length = self.Length()
+        if length != 0:
+            self.data[0] /= length
+            self.data[1] /= length
+            self.data[2] /= length
+            pass
+        return length
+        pass # end func
+
+    pass # end class
+
+# FbxVector2
+class FbxVector2(object):
+    """docstring for FbxVector2"""
+    def __init__(self, x = 0.0, y = 0.0):
+        super(FbxVector2, self).__init__()
+        self.data = [float(x), float(y)]
+        pass # end func
+
+    def __getitem__(self, index):
+        return self.data[index]
+
+    def __setitem__(self, index, value):
+        self.data[index] = value
+
+    def __len__(self):
+        return 2
+
+    pass # end class
+
+# FbxQuaternion，顺序为x,y,z,w
+class FbxQuaternion(FbxVector4):
+    """docstring for FbxQuaternion"""
+    def __init__(self, x = 0.0, y = 0.0, z = 0.0, w = 1.0):
+        super(FbxQuaternion, self).__init__(x, y, z, w)
+        pass # end func
+
+    pass # end class
+
+# FbxAMatrix，内部使用数学上的列向量矩阵，GetRow与FbxSdk一致(第3行为平移)
+class FbxAMatrix(object):
+    """docstring for FbxAMatrix"""
+    def __init__(self, t = None, r = None, s = None):
+        super(FbxAMatrix, self).__init__()
+        if isinstance(t, FbxAMatrix):
+            self.m = t.m.copy()
+            pass
+        elif isinstance(t, numpy.ndarray):
+            self.m = numpy.array(t, numpy.float64)
+            pass
+        elif t is None:
+            self.m = numpy.identity(4)
+            pass
+        else:
+            self.SetTRS(t, r, s)
+            pass
+        pass # end func
+
+    # 通过平移、旋转、缩放设置矩阵
+    def SetTRS(self, t, r, s):
+        self.m = translationMatrix(t).dot(eulerMatrix(r)).dot(scalingMatrix(s))
+        pass # end func
+
+    # 拷贝
+    def CopyFrom(self, other):
+        self.m = other.m.copy()
+        pass # end func
+
+    def __mul__(self, other):
+        return FbxAMatrix(self.m.dot(other.m))
+
+    def __imul__(self, other):
+        self.m = self.m.dot(other.m)
+        return self
+
+    def __eq__(self, other):
+        return isinstance(other, FbxAMatrix) and numpy.array_equal(self.m, other.m)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return "FbxAMatrix(%r)" % self.m.tolist()
+
+    # 逆矩阵，返回新矩阵
+    def Inverse(self):
+        return FbxAMatrix(numpy.linalg.inv(self.m))
+        pass # end func
+
+    # 转置矩阵
+    def Transpose(self):
+        return FbxAMatrix(self.m.T)
+        pass # end func
+
+    # 获取一行，与FbxSdk相同，第3行为平移
+    def GetRow(self, index):
+        c = self.m[:, index]
+        return FbxVector4(c[0], c[1], c[2], c[3])
+        pass # end func
+
+    # 获取一列
+    def GetColumn(self, index):
+        r = self.m[index, :]
+        return FbxVector4(r[0], r[1], r[2], r[3])
+        pass # end func
+
+    # 变换点
+    def MultT(self, vec):
+        v = self.m.dot([vec[0], vec[1], vec[2], 1.0])
+        return FbxVector4(v[0], v[1], v[2], 1.0)
+        pass # end func
+
+    # 平移
+    def GetT(self):
+        return FbxVector4(self.m[0, 3], self.m[1, 3], self.m[2, 3], 1.0)
+        pass # end func
+
+    # 缩放
+    def GetS(self):
+        s = numpy.sqrt((self.m[0:3, 0:3] ** 2).sum(axis = 0))
+        if numpy.linalg.det(self.m[0:3, 0:3]) < 0:
+            s[0] = -s[0]
+            pass
+        return FbxVector4(s[0], s[1], s[2], 1.0)
+        pass # end func
+
+    # 去掉缩放之后的旋转矩阵
+    def getRotationMatrix(self):
+        s = self.GetS()
+        r = self.m[0:3, 0:3].copy()
+        for i in range(3):
+            if s[i] != 0:
+                r[:, i] /= s[i]
+                pass
+            pass
+        return r
+        pass # end func
+
+    # 旋转，XYZ欧拉角
+    def GetR(self):
+        r  = self.getRotationMatrix()
+        sy = -r[2, 0]
+        sy = min(1.0, max(-1.0, sy))
+        y  = math.asin(sy)
+        if abs(sy) < 0.9999999:
+            x = math.atan2(r[2, 1], r[2, 2])
+            z = math.atan2(r[1, 0], r[0, 0])
+            pass
+        else:
+            x = math.atan2(-r[1, 2], r[1, 1])
+            z = 0.0
+            pass
+        return FbxVector4(math.degrees(x), math.degrees(y), math.degrees(z), 1.0)
+        pass # end func
+
+    # 四元数
+    def GetQ(self):
+        r  = self.getRotationMatrix()
+        tr = r[0, 0] + r[1, 1] + r[2, 2]
+        if tr > 0:
+            s = math.sqrt(tr + 1.0) * 2
+            w = 0.25 * s
+            x = (r[2, 1] - r[1, 2]) / s
+            y = (r[0, 2] - r[2, 0]) / s
+            z = (r[1, 0] - r[0, 1]) / s
+            pass
+        elif r[0, 0] > r[1, 1] and r[0, 0] > r[2, 2]:
+            s = math.sqrt(1.0 + r[0, 0] - r[1, 1] - r[2, 2]) * 2
+            w = (r[2, 1] - r[1, 2]) / s
+            x = 0.25 * s
+            y = (r[0, 1] + r[1, 0]) / s
+            z = (r[0, 2] + r[2, 0]) / s
+            pass
+        elif r[1, 1] > r[2, 2]:
+            s = math.sqrt(1.0 + r[1, 1] - r[0, 0] - r[2, 2]) * 2
+            w = (r[0, 2] - r[2, 0]) / s
+            x = (r[0, 1] + r[1, 0]) / s
+            y = 0.25 * s
+            z = (r[1, 2] + r[2, 1]) / s
+            pass
+        else:
+            s = math.sqrt(1.0 + r[2, 2] - r[0, 0] - r[1, 1]) * 2
+            w = (r[1, 0] - r[0, 1]) / s
+            x = (r[0, 2] + r[2, 0]) / s
+            y = (r[1, 2] + r[2, 1]) / s
+            z = 0.25 * s
+            pass
+        return FbxQuaternion(x, y, z, w)
+        pass # end func
+
+    pass # end class
+
+# 由FBX文件中16个double(FbxSdk内存顺序)生成矩阵
+def matrixFromArray(values):
+    return FbxAMatrix(numpy.array(values, numpy.float64).reshape(4, 4).T)
+    pass # end func
+
+# ----------------------------------------------------------------------------
+# 时间
+# ----------------------------------------------------------------------------
+
+# 获取帧率
+def getFrameRate(timeMode):
+    if timeMode == 14:
+        return customFrameRate
+    return FRAME_RATES.get(timeMode, 30.0)
+    pass # end func
+
+# FbxTime
+class FbxTime(object):
+    """docstring for FbxTime"""
+    def __init__(self, ticks = 0):
+        super(FbxTime, self).__init__()
+        self.ticks = int(ticks)
+        pass # end func
+
+    # 通过时分秒帧设置时间
+    def SetTime(self, hour, minute, second, frame = 0, field = 0, timeMode = 0):
+        seconds = (hour * 60 + minute) * 60 + second
+        frameTicks = FBX_TICKS_PER_SECOND / getFrameRate(timeMode)
+        self.ticks = int(seconds * FBX_TICKS_PER_SECOND + round(frame * frameTicks + field * frameTicks / 2))
+        pass # end func
+
+    def Set(self, ticks):
+        self.ticks = int(ticks)
+
+    def Get(self):
+        return self.ticks
+
+    def SetSecondDouble(self, seconds):
+        self.ticks = int(round(seconds * FBX_TICKS_PER_SECOND))
+
+    def GetSecondDouble(self):
+        return float(self.ticks) / FBX_TICKS_PER_SECOND
+
+    # 帧数
+    def GetFrameCount(self, timeMode = 0):
+        return int(self.ticks * getFrameRate(timeMode) / FBX_TICKS_PER_SECOND)
+        pass # end func
+
+    def __iadd__(self, other):
+        self.ticks += other.ticks
+        return self
+
+    def __add__(self, other):
+        return FbxTime(self.ticks + other.ticks)
+
+    def __sub__(self, other):
+        return FbxTime(self.ticks - other.ticks)
+
+    def __lt__(self, other):
+        return self.ticks < other.ticks
+
+    def __le__(self, other):
+        return self.ticks <= other.ticks
+
+    def __gt__(self, other):
+        return self.ticks > other.ticks
+
+    def __ge__(self, other):
+        return self.ticks >= other.ticks
+
+    def __eq__(self, other):
+        return isinstance(other, FbxTime) and self.ticks == other.ticks
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.ticks)
+
+    pass # end class
+
+# FbxTimeSpan
+class FbxTimeSpan(object):
+    """docstring for FbxTimeSpan"""
+    def __init__(self, start = 0, stop = 0):
+        super(FbxTimeSpan, self).__init__()
+        self.start = int(start)
+        self.stop  = int(stop)
+        pass # end func
+
+    def GetStart(self):
+        return FbxTime(self.start)
+
+    def GetStop(self):
+        return FbxTime(self.stop)
+
+    def GetDuration(self):
+        return FbxTime(self.stop - self.start)
+
+    pass # end class
+
+# ----------------------------------------------------------------------------
+# 场景对象
+# ----------------------------------------------------------------------------
+
+# ClassId，返回类本身，GetSrcObject通过isinstance过滤
+class FbxClassId(object):
+    """docstring for FbxClassId"""
+    def __get__(self, obj, cls):
+        return cls
+        pass # end func
+
+    pass # end class
+
+# 属性，只支持Get
+class FbxPropertyValue(object):
+    """docstring for FbxPropertyValue"""
+    def __init__(self, value):
+        super(FbxPropertyValue, self).__init__()
+        self.value = value
+        pass # end func
+
+    def Get(self):
+        return self.value
+
+    pass # end class
+
+# 对象基类
+class FbxObject(object):
+    """docstring for FbxObject"""
+    ClassId = FbxClassId()
+
+    def __init__(self, scene, record):
+        super(FbxObject, self).__init__()
+        self.scene      = scene                         # 场景
+        self.record     = record                        # 节点记录
+        self.uid        = None                          # 对象ID
+        self.name       = ""                            # 名称
+        self.subType    = ""                            # 子类型，如Mesh、Camera、Skin
+        self.props      = {}                            # Properties70
+        self.srcObjects = []                            # OO连接到当前对象的对象
+        self.dstObjects = []                            # 当前对象OO连接到的对象
+        self.srcProps   = {}                            # OP连接到当前对象属性的对象
+        if record is not None:
+            self.uid     = record.properties[0]
+            self.name    = splitObjectName(record.properties[1])
+            self.subType = record.properties[2]
+            self.props   = record.properties70()
+            pass
+        pass # end func
+
+    def GetName(self):
+        return self.name
+
+    def GetUniqueID(self):
+        return self.uid
+
+    # 获取属性，不存在时返回默认值
+    def getProperty(self, name, default = None):
+        return self.props.get(name, default)
+        pass # end func
+
+    # 获取向量属性
+    def getVector(self, name, default):
+        value = self.props.get(name)
+        if value is None:
+            return list(default)
+        return [float(v) for v in value[0:3]]
+        pass # end func
+
+    # 查找连接到当前对象的指定类型对象
+    def getSrcObjects(self, classId):
+        return [obj for obj in self.srcObjects if isinstance(obj, classId)]
+        pass # end func
+
+    # 查找当前对象连接到的指定类型对象
+    def getDstObjects(self, classId):
+        return [obj for obj in self.dstObjects if isinstance(obj, classId)]
+        pass # end func
+
+    def GetSrcObjectCount(self, classId = None):
+        return len(self.getSrcObjects(classId or FbxObject))
+
+    def GetSrcObject(self, classId = None, index = 0):
+        objects = self.getSrcObjects(classId or FbxObject)
+        if index < len(objects):
+            return objects[index]
+        return None
+
+    def GetDstObject(self, classId = None, index = 0):
+        objects = self.getDstObjects(classId or FbxObject)
+        if index < len(objects):
+            return objects[index]
+        return None
+
+    pass # end class
+
+# 节点属性基类
+class FbxNodeAttribute(FbxObject):
+    """docstring for FbxNodeAttribute"""
+    def GetNode(self, index = 0):
+        return self.GetDstObject(FbxNode, index)
+
+    pass # end class
+
+# 空节点属性
+class FbxNull(FbxNodeAttribute):
+    """docstring for FbxNull"""
+    pass # end class
+
+# 灯光
+class FbxLight(FbxNodeAttribute):
+    """docstring for FbxLight"""
+    pass # end class
+
+# 相机
+class FbxCamera(FbxNodeAttribute):
+    """docstring for FbxCamera"""
+    # FbxSdk默认值
+    DEFAULTS = {
+        "AspectWidth"   : 320.0,
+        "AspectHeight"  : 200.0,
+        "NearPlane"     : 10.0,
+        "FarPlane"      : 4000.0,
+        "FieldOfView"   : 25.114999,
+        "FocalLength"   : 34.89327,
+    }
+
+    def __getattr__(self, name):
+        if name in FbxCamera.DEFAULTS:
+            return FbxPropertyValue(float(self.props.get(name, FbxCamera.DEFAULTS[name])))
+        raise AttributeError(name)
+
+    pass # end class
+
+# 几何体
+class FbxGeometry(FbxNodeAttribute):
+    """docstring for FbxGeometry"""
+    def GetDeformerCount(self, deformerType = None):
+        return len(self.getDeformers(deformerType))
+
+    def GetDeformer(self, index, deformerType = None):
+        deformers = self.getDeformers(deformerType)
+        if index < len(deformers):
+            return deformers[index]
+        return None
+
+    # 获取变形器
+    def getDeformers(self, deformerType):
+        deformers = self.getSrcObjects(FbxDeformer)
+        if deformerType is not None:
+            deformers = [d for d in deformers if d.GetDeformerType() == deformerType]
+            pass
+        return deformers
+        pass # end func
+
+    pass # end class
+
+# 图层元素数组
+class FbxLayerElementArray(object):
+    """docstring for FbxLayerElementArray"""
+    def __init__(self, data):
+        super(FbxLayerElementArray, self).__init__()
+        self.data = data            # numpy数组，N*k或者N
+        pass # end func
+
+    def GetCount(self):
+        return len(self.data)
+
+    def GetAt(self, index):
+        item = self.data[index]
+        if self.data.ndim == 1:
+            return int(item)
+        if len(item) == 2:
+            return FbxVector2(item[0], item[1])
+        return FbxVector4(item[0], item[1], item[2], item[3] if len(item) > 3 else 1.0)
+
+    # 零拷贝获取numpy数组
+    def GetArray(self):
+        return self.data
+
+    pass # end class
+
+# 图层元素
+class FbxLayerElement(object):
+    """docstring for FbxLayerElement"""
+    # 映射方式
+    eNone               = 0
+    eByControlPoint     = 1
+    eByPolygonVertex    = 2
+    eByPolygon          = 3
+    eByEdge             = 4
+    eAllSame            = 5
+    # 引用方式
+    eDirect             = 0
+    eIndex              = 1
+    eIndexToDirect      = 2
+
+    MAPPING_MODES = {
+        "ByVertice"         : eByControlPoint,
+        "ByVertex"          : eByControlPoint,
+        "ByControlPoint"    : eByControlPoint,
+        "ByPolygonVertex"   : eByPolygonVertex,
+        "ByPolygon"         : eByPolygon,
+        "ByEdge"            : eByEdge,
+        "AllSame"           : eAllSame,
+    }
+    REFERENCE_MODES = {
+        "Direct"            : eDirect,
+        "Index"             : eIndex,
+        "IndexToDirect"     : eIndexToDirect,
+    }
+
+    def __init__(self, record, dataName, indexName, width):
+        super(FbxLayerElement, self).__init__()
+        self.name          = record.childValue("Name", "")
+        self.mappingMode   = FbxLayerElement.MAPPING_MODES.get(record.childValue("MappingInformationType", ""), FbxLayerElement.eNone)
+        self.referenceMode = FbxLayerElement.REFERENCE_MODES.get(record.childValue("ReferenceInformationType", ""), FbxLayerElement.eDirect)
+        self.direct        = record.childValue(dataName).reshape(-1, width)
+        self.index         = None
+        if self.referenceMode != FbxLayerElement.eDirect:
+            self.index = record.childValue(indexName)
+            pass
+        pass # end func
+
+    def GetName(self):
+        return self.name
+
+    def GetMappingMode(self):
+        return self.mappingMode
+
+    def GetReferenceMode(self):
+        return self.referenceMode
+
+    def GetDirectArray(self):
+        return FbxLayerElementArray(self.direct)
+
+    def GetIndexArray(self):
+        return FbxLayerElementArray(self.index if self.index is not None else numpy.zeros(0, numpy.int32))
+
+    # 三角化之后重排数据，corners为新的多边形顶点对应的旧多边形顶点，polygons为新多边形对应的旧多边形
+    def remap(self, corners, polygons):
+        if self.mappingMode == FbxLayerElement.eByPolygonVertex:
+            mapping = corners
+            pass
+        elif self.mappingMode == FbxLayerElement.eByPolygon:
+            mapping = polygons
+            pass
+        else:
+            return
+        if self.index is not None:
+            self.index = self.index[mapping]
+            pass
+        else:
+            self.direct = self.direct[mapping]
+            pass
+        pass # end func
+
+    pass # end class
+
+# 图层
+class FbxLayer(object):
+    """docstring for FbxLayer"""
+    def __init__(self):
+        super(FbxLayer, self).__init__()
+        self.elements = {}      # 类型->FbxLayerElement
+        pass # end func
+
+    def GetNormals(self):
+        return self.elements.get("LayerElementNormal")
+
+    def GetUVs(self, textureType = None):
+        return self.elements.get("LayerElementUV")
+
+    def GetVertexColors(self):
+        return self.elements.get("LayerElementColor")
+
+    pass # end class
+
+# 模型
+class FbxMesh(FbxGeometry):
+    """docstring for FbxMesh"""
+    # 图层元素类型:(数据名，索引名，宽度)
+    LAYER_ELEMENTS = {
+        "LayerElementNormal"    : ("Normals",   "NormalsIndex",     3),
+        "LayerElementUV"        : ("UV",        "UVIndex",          2),
+        "LayerElementColor"     : ("Colors",    "ColorIndex",       4),
+    }
+
+    def __init__(self, scene, record):
+        super(FbxMesh, self).__init__(scene, record)
+        # 控制点
+        self.controlPoints = record.childValue("Vertices", numpy.zeros(0, numpy.float64)).reshape(-1, 3)
+        # 多边形顶点索引，负数表示多边形结束
+        polygonVertexIndex = record.childValue("PolygonVertexIndex", numpy.zeros(0, numpy.int32))
+        ends = polygonVertexIndex < 0
+        self.polygonVertices = numpy.where(ends, ~polygonVertexIndex, polygonVertexIndex)
+        # 多边形起始位置
+        self.polygonStarts   = numpy.concatenate(([0], numpy.flatnonzero(ends)[:-1] + 1)).astype(numpy.int64)
+        if len(self.polygonVertices) == 0:
+            self.polygonStarts = numpy.zeros(0, numpy.int64)
+            pass
+        # 图层
+        self.layers = self.parseLayers(record)
+        pass # end func
+
+    # 解析图层
+    def parseLayers(self, record):
+        elements = {}
+        for name, (dataName, indexName, width) in FbxMesh.LAYER_ELEMENTS.items():
+            for child in record.findAll(name):
+                if child.find(dataName) is None:
+                    continue
+                elements[(name, child.value(0))] = FbxLayerElement(child, dataName, indexName, width)
+                pass
+            pass
+        layers = []
+        for layerRecord in record.findAll("Layer"):
+            layer = FbxLayer()
+            for elementRecord in layerRecord.findAll("LayerElement"):
+                key = (elementRecord.childValue("Type"), elementRecord.childValue("TypedIndex"))
+                if key in elements:
+                    layer.elements[key[0]] = elements[key]
+                    pass
+                pass
+            layers.append(layer)
+            pass
+        return layers
+        pass # end func
+
+    def GetPolygonCount(self):
+        return len(self.polygonStarts)
+
+    def GetPolygonSize(self, index):
+        end = self.polygonStarts[index + 1] if index + 1 < len(self.polygonStarts) else len(self.polygonVertices)
+        return int(end - self.polygonStarts[index])
+
+    def GetPolygonVertex(self, index, position):
+        return int(self.polygonVertices[self.polygonStarts[index] + position])
+
+    def GetPolygonVertices(self):
+        return self.polygonVertices.tolist()
+
+    def GetPolygonVertexCount(self):
+        return len(self.polygonVertices)
+
+    def GetControlPointsCount(self):
+        return len(self.controlPoints)
+
+    def GetControlPoints(self):
+        return [FbxVector4(p[0], p[1], p[2], 1.0) for p in self.controlPoints]
+
+    def GetControlPointAt(self, index):
+        p = self.controlPoints[index]
+        return FbxVector4(p[0], p[1], p[2], 1.0)
+
+    def GetLayerCount(self):
+        return len(self.layers)
+
+    def GetLayer(self, index):
+        if index < len(self.layers):
+            return self.layers[index]
+        return None
+
+    # 获取UV在direct数组中的索引
+    def GetTextureUVIndex(self, index, position, textureType = None):
+        element = self.layers[0].GetUVs() if len(self.layers) > 0 else None
+        if element is None:
+            return -1
+        corner = self.polygonStarts[index] + position
+        if element.GetMappingMode() == FbxLayerElement.eByControlPoint:
+            corner = self.polygonVertices[corner]
+            pass
+        if element.index is not None:
+            return int(element.index[corner])
+        return int(corner)
+
+    # 零拷贝获取控制点，N*3
+    def GetControlPointsArray(self):
+        return self.controlPoints
+
+    # 零拷贝获取多边形顶点索引
+    def GetPolygonVerticesArray(self):
+        return self.polygonVertices
+
+    # 三角化，扇形拆分多边形
+    def triangulate(self):
+        count = len(self.polygonStarts)
+        sizes = numpy.diff(numpy.append(self.polygonStarts, len(self.polygonVertices)))
+        # 已经是三角形
+        if count == 0 or numpy.all(sizes == 3):
+            return
+        triCounts = numpy.maximum(sizes - 2, 0)
+        total     = int(triCounts.sum())
+        first     = numpy.repeat(self.polygonStarts, triCounts)
+        offsets   = numpy.arange(total) - numpy.repeat(numpy.cumsum(triCounts) - triCounts, triCounts) + 1
+        corners   = numpy.stack([first, first + offsets, first + offsets + 1], axis = 1).ravel()
+        polygons  = numpy.repeat(numpy.arange(count), triCounts)
+        # 重排数据
+        self.polygonVertices = self.polygonVertices[corners]
+        self.polygonStarts   = numpy.arange(0, total * 3, 3, dtype = numpy.int64)
+        remapped = set()
+        for layer in self.layers:
+            for element in layer.elements.values():
+                if id(element) not in remapped:
+                    element.remap(corners, polygons)
+                    remapped.add(id(element))
+                    pass
+                pass
+            pass
+        pass # end func
+
+    pass # end class
+
+# 变形器
+class FbxDeformer(FbxObject):
+    """docstring for FbxDeformer"""
+    eUnknown    = 0
+    eSkin       = 1
+    eBlendShape = 2
+    eVertexCache= 3
+
+    def GetDeformerType(self):
+        return FbxDeformer.eUnknown
+
+    pass # end class
+
+# 蒙皮
+class FbxSkin(FbxDeformer):
+    """docstring for FbxSkin"""
+    def GetDeformerType(self):
+        return FbxDeformer.eSkin
+
+    def GetClusterCount(self):
+        return self.GetSrcObjectCount(FbxCluster)
+
+    def GetCluster(self, index):
+        return self.GetSrcObject(FbxCluster, index)
+
+    def GetGeometry(self):
+        return self.GetDstObject(FbxGeometry)
+
+    pass # end class
+
+# 骨骼
+class FbxCluster(FbxObject):
+    """docstring for FbxCluster"""
+    def __init__(self, scene, record):
+        super(FbxCluster, self).__init__(scene, record)
+        self.indices       = record.childValue("Indexes", numpy.zeros(0, numpy.int32))
+        self.weights       = record.childValue("Weights", numpy.zeros(0, numpy.float64))
+        self.transform     = matrixFromArray(record.childValue("Transform", numpy.identity(4).ravel()))
+        self.transformLink = matrixFromArray(record.childValue("TransformLink", numpy.identity(4).ravel()))
+        pass # end func
+
+    def GetLink(self):
+        return self.GetSrcObject(FbxNode, 0)
+
+    def GetControlPointIndicesCount(self):
+        return len(self.indices)
+
+    # 零拷贝，返回numpy数组
+    def GetControlPointIndices(self):
+        return self.indices
+
+    def GetControlPointWeights(self):
+        return self.weights
+
+    def GetTransformMatrix(self, matrix):
+        matrix.CopyFrom(self.transform)
+        return matrix
+
+    def GetTransformLinkMatrix(self, matrix):
+        matrix.CopyFrom(self.transformLink)
+        return matrix
+
+    pass # end class
+
+# 节点
+class FbxNode(FbxObject):
+    """docstring for FbxNode"""
+    eSourcePivot        = 0
+    eDestinationPivot   = 1
+    # 动画属性
+    ANIMATABLE_PROPERTIES = {
+        "LclTranslation"    : "Lcl Translation",
+        "LclRotation"       : "Lcl Rotation",
+        "LclScaling"        : "Lcl Scaling",
+    }
+
+    def __getattr__(self, name):
+        if name in FbxNode.ANIMATABLE_PROPERTIES:
+            return FbxAnimatableProperty(self, FbxNode.ANIMATABLE_PROPERTIES[name])
+        raise AttributeError(name)
+
+    def GetParent(self):
+        return self.GetDstObject(FbxNode, 0)
+
+    def GetChildCount(self):
+        return self.GetSrcObjectCount(FbxNode)
+
+    def GetChild(self, index):
+        return self.GetSrcObject(FbxNode, index)
+
+    def GetNodeAttribute(self):
+        return self.GetSrcObject(FbxNodeAttribute, 0)
+
+    def GetMesh(self):
+        return self.GetSrcObject(FbxMesh, 0)
+
+    def GetCamera(self):
+        return self.GetSrcObject(FbxCamera, 0)
+
+    # 注视目标节点(LookAtProperty连接的节点)，没有时返回None
+    def GetTarget(self):
+        return self.getPropertyNode("LookAtProperty")
+
+    # 上方向目标节点(UpVectorProperty连接的节点)，没有时返回None
+    def GetTargetUp(self):
+        return self.getPropertyNode("UpVectorProperty")
+
+    # 获取连接到属性上的第一个节点
+    def getPropertyNode(self, name):
+        for src in self.srcProps.get(name, []):
+            if isinstance(src, FbxNode):
+                return src
+            pass
+        return None
+        pass # end func
+
+    def GetGeometricTranslation(self, pivot = 0):
+        t = self.getVector("GeometricTranslation", (0, 0, 0))
+        return FbxVector4(t[0], t[1], t[2])
+
+    def GetGeometricRotation(self, pivot = 0):
+        r = self.getVector("GeometricRotation", (0, 0, 0))
+        return FbxVector4(r[0], r[1], r[2])
+
+    def GetGeometricScaling(self, pivot = 0):
+        s = self.getVector("GeometricScaling", (1, 1, 1))
+        return FbxVector4(s[0], s[1], s[2])
+
+    # 获取属性在指定时间的值
+    def evaluateVector(self, name, default, time):
+        value = self.getVector(name, default)
+        if time is None:
+            return value
+        curveNode = self.scene.getCurveNode(self, name)
+        if curveNode is not None:
+            value = curveNode.evaluate(value, time.Get())
+            pass
+        return value
+        pass # end func
+
+    # 局部矩阵:T * Roff * Rp * Rpre * R * Rpost^-1 * Rp^-1 * Soff * Sp * S * Sp^-1
+    def evaluateLocalMatrix(self, time):
+        t  = self.evaluateVector("Lcl Translation", (0, 0, 0), time)
+        r  = self.evaluateVector("Lcl Rotation",    (0, 0, 0), time)
+        s  = self.evaluateVector("Lcl Scaling",     (1, 1, 1), time)
+        rOff   = translationMatrix(self.getVector("RotationOffset", (0, 0, 0)))
+        rPivot = translationMatrix(self.getVector("RotationPivot",  (0, 0, 0)))
+        sOff   = translationMatrix(self.getVector("ScalingOffset",  (0, 0, 0)))
+        sPivot = translationMatrix(self.getVector("ScalingPivot",   (0, 0, 0)))
+        rPre   = numpy.identity(4)
+        rPost  = numpy.identity(4)
+        if self.getProperty("RotationActive", 0):
+            rPre  = eulerMatrix(self.getVector("PreRotation",  (0, 0, 0)))
+            rPost = eulerMatrix(self.getVector("PostRotation", (0, 0, 0)))
+            pass
+        rotation = eulerMatrix(r, self.getProperty("RotationOrder", 0))
+        m = translationMatrix(t).dot(rOff).dot(rPivot).dot(rPre).dot(rotation).dot(rPost.T).dot(numpy.linalg.inv(rPivot))
+        m = m.dot(sOff).dot(sPivot).dot(scalingMatrix(s)).dot(numpy.linalg.inv(sPivot))
+        # 根节点子节点需要进行坐标系转换
+        if self.GetDstObject(FbxNode, 0) is self.scene.rootNode:
+            m = self.scene.axisConversion.dot(m)
+            pass
+        return m
+        pass # end func
+
+    # 局部矩阵
+    def EvaluateLocalTransform(self, time = None):
+        return FbxAMatrix(self.evaluateLocalMatrix(time))
+        pass # end func
+
+    # 全局矩阵
+    def EvaluateGlobalTransform(self, time = None):
+        m    = self.evaluateLocalMatrix(time)
+        node = self.GetDstObject(FbxNode, 0)
+        while node is not None and node is not self.scene.rootNode:
+            m    = node.evaluateLocalMatrix(time).dot(m)
+            node = node.GetDstObject(FbxNode, 0)
+            pass
+        return FbxAMatrix(m)
+        pass # end func
+
+    pass # end class
+
+# 节点的动画属性，只支持获取曲线
+class FbxAnimatableProperty(object):
+    """docstring for FbxAnimatableProperty"""
+    def __init__(self, node, name):
+        super(FbxAnimatableProperty, self).__init__()
+        self.node = node            # 节点
+        self.name = name            # 属性名
+        pass # end func
+
+    # 获取属性在动画层中的通道曲线，没有时返回None
+    def GetCurve(self, layer, channel, create = False):
+        for curveNode in self.node.scene.curveNodes.get((self.node.uid, self.name), []):
+            if layer in curveNode.getDstObjects(FbxAnimLayer):
+                return curveNode.GetCurve(channel)
+            pass
+        return None
+        pass # end func
+
+    pass # end class
+
+# 根节点
+class FbxRootNode(FbxNode):
+    """docstring for FbxRootNode"""
+    def __init__(self, scene):
+        super(FbxRootNode, self).__init__(scene, None)
+        self.uid  = 0
+        self.name = "RootNode"
+        pass # end func
+
+    def evaluateLocalMatrix(self, time):
+        return numpy.identity(4)
+
+    pass # end class
+
+# 动画曲线
+class FbxAnimCurve(FbxObject):
+    """docstring for FbxAnimCurve"""
+    # 插值方式
+    eInterpolationConstant  = 0x00000002
+    eInterpolationLinear    = 0x00000004
+    eInterpolationCubic     = 0x00000008
+    # 常量插值时使用下一帧
+    eConstantNext           = 0x00000100
+    # 权重
+    eWeightedRight          = 0x01000000
+    eWeightedNextLeft       = 0x02000000
+
+    def __init__(self, scene, record):
+        super(FbxAnimCurve, self).__init__(scene, record)
+        self.default    = float(record.childValue("Default", 0.0))
+        self.times      = record.childValue("KeyTime", numpy.zeros(0, numpy.int64))
+        self.values     = record.childValue("KeyValueFloat", numpy.zeros(0, numpy.float32))
+        # 属性按照引用计数展开到每个key
+        refCounts = record.childValue("KeyAttrRefCount", numpy.ones(len(self.times), numpy.int32))
+        flags     = record.childValue("KeyAttrFlags", numpy.zeros(len(refCounts), numpy.int32))
+        data      = record.childValue("KeyAttrDataFloat", numpy.zeros(len(refCounts) * 4, numpy.float32)).reshape(-1, 4)
+        self.flags = numpy.repeat(flags, refCounts)[0 : len(self.times)]
+        self.data  = numpy.repeat(data, refCounts, axis = 0)[0 : len(self.times)]
+        # 第一个关键帧之前以及最后一个关键帧之后的外推方式
+        self.preExtrapolation  = readExtrapolation(record.find("Pre-Extrapolation"))
+        self.postExtrapolation = readExtrapolation(record.find("Post-Extrapolation"))
+        pass # end func
+
+    def KeyGetCount(self):
+        return len(self.times)
+
+    def KeyGetTime(self, index):
+        return FbxTime(self.times[index])
+
+    def KeyGetValue(self, index):
+        return float(self.values[index])
+
+    def KeyGetInterpolation(self, index):
+        return int(self.flags[index]) & 0x0e
+
+    def GetPreExtrapolation(self):
+        return self.preExtrapolation
+
+    def GetPostExtrapolation(self):
+        return self.postExtrapolation
+
+    # 计算曲线在ticks时刻的值
+    def Evaluate(self, time):
+        ticks = time.Get() if isinstance(time, FbxTime) else time
+        count = len(self.times)
+        if count == 0:
+            return self.default
+        if ticks <= self.times[0]:
+            return float(self.values[0])
+        if ticks >= self.times[-1]:
+            return float(self.values[-1])
+        i  = int(numpy.searchsorted(self.times, ticks, "right")) - 1
+        t0, t1 = int(self.times[i]), int(self.times[i + 1])
+        v0, v1 = float(self.values[i]), float(self.values[i + 1])
+        flags  = int(self.flags[i])
+        if flags & FbxAnimCurve.eInterpolationConstant:
+            if flags & FbxAnimCurve.eConstantNext:
+                return v1
+            return v0
+        s = float(ticks - t0) / (t1 - t0)
+        if flags & FbxAnimCurve.eInterpolationCubic:
+            return self.evaluateBezier(i, s, v0, v1, float(t1 - t0) / FBX_TICKS_PER_SECOND)
+        return v0 + (v1 - v0) * s
+        pass # end func
+
+    # 三次贝塞尔插值，斜率单位为每秒，权重保存在KeyAttrDataFloat第3个元素的两个ushort中
+    def evaluateBezier(self, index, s, v0, v1, dt):
+        flags = int(self.flags[index])
+        w0, w1 = 1.0 / 3.0, 1.0 / 3.0
+        packed = int(self.data[index:index + 1, 2:3].view(numpy.uint32)[0, 0])
+        if flags & FbxAnimCurve.eWeightedRight:
+            w0 = (packed & 0xffff) / 10000.0
+            pass
+        if flags & FbxAnimCurve.eWeightedNextLeft:
+            w1 = (packed >> 16) / 10000.0
+            pass
+        p1 = v0 + float(self.data[index][0]) * dt * w0
+        p2 = v1 - float(self.data[index][1]) * dt * w1
+        # 权重不为1/3时时间轴不是线性的，二分求解参数
+        u = s
+        if abs(w0 - 1.0 / 3.0) > 1e-6 or abs(w1 - 1.0 / 3.0) > 1e-6:
+            lo, hi = 0.0, 1.0
+            for _ in range(32):
+                u  = (lo + hi) * 0.5
+                x  = 3 * (1 - u) * (1 - u) * u * w0 + 3 * (1 - u) * u * u * (1 - w1) + u * u * u
+                if x < s:
+                    lo = u
+                    pass
+                else:
+                    hi = u
+                    pass
+                pass
+            pass
+        a = 1 - u
+        return a * a * a * v0 + 3 * a * a * u * p1 + 3 * a * u * u * p2 + u * u * u * v1
+        pass # end func
+
+    pass # end class
+
+# 插值方式，与FbxSdk相同
+class FbxAnimCurveDef(object):
+    """docstring for FbxAnimCurveDef"""
+    eInterpolationConstant  = FbxAnimCurve.eInterpolationConstant
+    eInterpolationLinear    = FbxAnimCurve.eInterpolationLinear
+    eInterpolationCubic     = FbxAnimCurve.eInterpolationCubic
+    pass # end class
+
+# 曲线外推方式
+class FbxAnimCurveBase(object):
+    """docstring for FbxAnimCurveBase"""
+    eConstant               = 1
+    eRepetition             = 2
+    eMirrorRepetition       = 3
+    eKeepSlope              = 4
+    eRelativeRepetition     = 5
+    # 文件中的外推类型字符
+    EXTRAPOLATION_TYPES = {
+        "C"                 : eConstant,
+        "R"                 : eRepetition,
+        "M"                 : eMirrorRepetition,
+        "K"                 : eKeepSlope,
+        "r"                 : eRelativeRepetition,
+    }
+    pass # end class
+
+# 读取曲线的Pre-Extrapolation或Post-Extrapolation，没有时为常量。
+# 二进制中Type为单字节C类型，值为字符编码，也兼容字符串。无法识别时按照非常量处理，由调用者逐帧计算
+def readExtrapolation(record):
+    if record is None:
+        return FbxAnimCurveBase.eConstant
+    value = record.childValue("Type")
+    if isinstance(value, bytes):
+        value = toStr(value)
+        pass
+    elif isinstance(value, int) and not isinstance(value, bool) and 0 <= value < 128:
+        value = chr(value)
+        pass
+    if isinstance(value, str) and len(value) > 0:
+        return FbxAnimCurveBase.EXTRAPOLATION_TYPES.get(value[0], FbxAnimCurveBase.eRepetition)
+    return FbxAnimCurveBase.eRepetition
+    pass # end func
+
+# 动画曲线节点
+class FbxAnimCurveNode(FbxObject):
+    """docstring for FbxAnimCurveNode"""
+    CHANNELS = ("d|X", "d|Y", "d|Z")
+
+    # 计算三个通道的值
+    def evaluate(self, value, ticks):
+        value = list(value)
+        for i, channel in enumerate(FbxAnimCurveNode.CHANNELS):
+            if channel in self.props:
+                value[i] = float(self.props[channel])
+                pass
+            curves = self.srcProps.get(channel)
+            if curves:
+                value[i] = curves[0].Evaluate(ticks)
+                pass
+            pass
+        return value
+        pass # end func
+
+    # 获取通道曲线
+    def GetCurve(self, channel):
+        curves = self.srcProps.get("d|" + channel)
+        if curves:
+            return curves[0]
+        return None
+
+    pass # end class
+
+# 动画层
+class FbxAnimLayer(FbxObject):
+    """docstring for FbxAnimLayer"""
+    pass # end class
+
+# 动画
+class FbxAnimStack(FbxObject):
+    """docstring for FbxAnimStack"""
+    def __init__(self, scene, record):
+        super(FbxAnimStack, self).__init__(scene, record)
+        self.timeSpan = None
+        pass # end func
+
+    # 时间范围，属性中没有时使用Takes中的时间，再没有则使用GlobalSettings的时间
+    def GetLocalTimeSpan(self):
+        if self.timeSpan is None:
+            start = self.props.get("LocalStart")
+            stop  = self.props.get("LocalStop")
+            if start is None and stop is None:
+                take = self.scene.takes.get(self.name)
+                if take is not None:
+                    start, stop = take
+                    pass
+                else:
+                    start, stop = self.scene.globalSettings.timeSpan
+                    pass
+                pass
+            self.timeSpan = FbxTimeSpan(start or 0, stop or 0)
+            pass
+        return self.timeSpan
+        pass # end func
+
+    pass # end class
+
+# 约束，只用于检测场景中是否有约束，不参与矩阵计算
+class FbxConstraint(FbxObject):
+    """docstring for FbxConstraint"""
+    pass # end class
+
+# 全局设置
+class FbxGlobalSettings(object):
+    """docstring for FbxGlobalSettings"""
+    def __init__(self, props):
+        super(FbxGlobalSettings, self).__init__()
+        self.props      = props
+        self.timeMode   = int(props.get("TimeMode", 0))
+        self.timeSpan   = (props.get("TimeSpanStart", 0), props.get("TimeSpanStop", 0))
+        self.axisSystem = FbxAxisSystem(int(props.get("UpAxis", 1)),        int(props.get("UpAxisSign", 1)),
+                                        int(props.get("FrontAxis", 2)),     int(props.get("FrontAxisSign", 1)),
+                                        int(props.get("CoordAxis", 0)),     int(props.get("CoordAxisSign", 1)))
+        pass # end func
+
+    def GetTimeMode(self):
+        return self.timeMode
+
+    def GetCustomFrameRate(self):
+        return float(self.props.get("CustomFrameRate", -1.0))
+
+    def GetAxisSystem(self):
+        return self.axisSystem
+
+    pass # end class
+
+# 坐标系
+class FbxAxisSystem(object):
+    """docstring for FbxAxisSystem"""
+    def __init__(self, up, upSign, front, frontSign, coord, coordSign):
+        super(FbxAxisSystem, self).__init__()
+        self.up, self.upSign        = up, upSign
+        self.front, self.frontSign  = front, frontSign
+        self.coord, self.coordSign  = coord, coordSign
+        pass # end func
+
+    # 基向量矩阵，列分别为coord、up、front
+    def basis(self):
+        m = numpy.zeros((3, 3))
+        m[self.coord, 0] = self.coordSign
+        m[self.up,    1] = self.upSign
+        m[self.front, 2] = self.frontSign
+        return m
+        pass # end func
+
+    def __eq__(self, other):
+        return isinstance(other, FbxAxisSystem) and numpy.array_equal(self.basis(), other.basis())
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    # 转换场景坐标系
+    def ConvertScene(self, scene):
+        source = scene.globalSettings.axisSystem
+        m = numpy.identity(4)
+        m[0:3, 0:3] = self.basis().dot(numpy.linalg.inv(source.basis()))
+        scene.axisConversion = m
+        scene.globalSettings.axisSystem = self
+        pass # end func
+
+    pass # end class
+
+FbxAxisSystem.OpenGL  = FbxAxisSystem(1, 1, 2, 1, 0, 1)
+FbxAxisSystem.MayaYUp = FbxAxisSystem(1, 1, 2, 1, 0, 1)
+FbxAxisSystem.MayaZUp = FbxAxisSystem(2, 1, 1, -1, 0, 1)
+FbxAxisSystem.Max     = FbxAxisSystem(2, 1, 1, -1, 0, 1)
+FbxAxisSystem.DirectX = FbxAxisSystem(1, 1, 2, -1, 0, 1)
+
+# 对象类型
+OBJECT_TYPES = {
+    ("Model",          None)            : FbxNode,
+    ("Geometry",       "Mesh")          : FbxMesh,
+    ("Geometry",       None)            : FbxGeometry,
+    ("NodeAttribute",  "Camera")        : FbxCamera,
+    ("NodeAttribute",  "Light")         : FbxLight,
+    ("NodeAttribute",  None)            : FbxNull,
+    ("Deformer",       "Skin")          : FbxSkin,
+    ("Deformer",       "Cluster")       : FbxCluster,
+    ("Deformer",       None)            : FbxDeformer,
+    ("AnimationStack", None)            : FbxAnimStack,
+    ("AnimationLayer", None)            : FbxAnimLayer,
+    ("AnimationCurveNode", None)        : FbxAnimCurveNode,
+    ("AnimationCurve", None)            : FbxAnimCurve,
+    ("Constraint",     None)            : FbxConstraint,
+}
+
+# 场景
+class FbxScene(FbxObject):
+    """docstring for FbxScene"""
+    def __init__(self):
+        super(FbxScene, self).__init__(None, None)
+        self.scene          = self
+        self.file           = None                          # 文件
+        self.buffer         = None                          # 内存映射
+        self.objects        = []                            # 对象，按照文件顺序
+        self.rootNode       = FbxRootNode(self)             # 根节点
+        self.globalSettings = FbxGlobalSettings({})         # 全局设置
+        self.axisConversion = numpy.identity(4)             # 坐标系转换矩阵
+        self.takes          = {}                            # Takes时间
+        self.currentStack   = None                          # 当前动画
+        self.curveNodes     = {}                            # (节点ID,属性名)->[FbxAnimCurveNode]
+        pass # end func
+
+    # 通过节点树构建场景
+    def build(self, root):
+        global customFrameRate
+        # 自定义帧率只属于当前场景，先恢复默认值，避免沿用上一个文件的帧率
+        customFrameRate = 30.0
+        # 全局设置
+        settings = root.find("GlobalSettings")
+        if settings is not None:
+            self.globalSettings = FbxGlobalSettings(settings.properties70())
+            if self.globalSettings.GetCustomFrameRate() > 0:
+                customFrameRate = self.globalSettings.GetCustomFrameRate()
+                pass
+            pass
+        # Takes
+        takes = root.find("Takes")
+        if takes is not None:
+            for take in takes.findAll("Take"):
+                localTime = take.find("LocalTime")
+                if localTime is not None and len(localTime.properties) >= 2:
+                    self.takes[take.value(0)] = (localTime.value(0), localTime.value(1))
+                    pass
+                pass
+            pass
+        # 对象
+        objectMap = {0 : self.rootNode}
+        objects   = root.find("Objects")
+        for record in (objects.children if objects is not None else []):
+            subType = record.properties[2] if len(record.properties) > 2 else ""
+            cls = OBJECT_TYPES.get((record.name, subType)) or OBJECT_TYPES.get((record.name, None))
+            if cls is None:
+                cls = FbxObject
+                pass
+            obj = cls(self, record)
+            objectMap[obj.uid] = obj
+            self.objects.append(obj)
+            pass
+        # 连接
+        connections = root.find("Connections")
+        for record in (connections.findAll("C") if connections is not None else []):
+            src = objectMap.get(record.properties[1])
+            dst = objectMap.get(record.properties[2])
+            if src is None or dst is None:
+                continue
+            if record.properties[0] == "OP":
+                dst.srcProps.setdefault(record.properties[3], []).append(src)
+                pass
+            else:
+                dst.srcObjects.append(src)
+                src.dstObjects.append(dst)
+                pass
+            pass
+        # 动画曲线节点
+        for obj in self.objects:
+            if not isinstance(obj, FbxNode):
+                continue
+            for name, srcs in obj.srcProps.items():
+                for src in srcs:
+                    if isinstance(src, FbxAnimCurveNode):
+                        self.curveNodes.setdefault((obj.uid, name), []).append(src)
+                        pass
+                    pass
+                pass
+            pass
+        # 默认动画
+        self.currentStack = self.GetSrcObject(FbxAnimStack, 0)
+        pass # end func
+
+    def GetRootNode(self):
+        return self.rootNode
+
+    def GetGlobalSettings(self):
+        return self.globalSettings
+
+    def GetSrcObjectCount(self, classId = None):
+        return len(self.getSrcObjects(classId or FbxObject))
+
+    def GetSrcObject(self, classId = None, index = 0):
+        objects = self.getSrcObjects(classId or FbxObject)
+        if index < len(objects):
+            return objects[index]
+        return None
+
+    def getSrcObjects(self, classId):
+        return [obj for obj in self.objects if isinstance(obj, classId)]
+
+    def SetCurrentAnimationStack(self, stack):
+        self.currentStack = stack
+
+    def GetCurrentAnimationStack(self):
+        return self.currentStack
+
+    # 获取节点属性在当前动画中的曲线节点
+    def getCurveNode(self, node, name):
+        curveNodes = self.curveNodes.get((node.uid, name))
+        if not curveNodes:
+            return None
+        if self.currentStack is not None:
+            for curveNode in curveNodes:
+                for layer in curveNode.getDstObjects(FbxAnimLayer):
+                    if self.currentStack in layer.dstObjects:
+                        return curveNode
+                    pass
+                pass
+            return None
+        return curveNodes[0]
+        pass # end func
+
+    # 释放内存映射
+    def Destroy(self):
+        self.objects    = []
+        self.curveNodes = {}
+        self.buffer     = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            pass
+        pass # end func
+
+    pass # end class
+
+# 管理器
+class FbxManager(object):
+    """docstring for FbxManager"""
+    def __init__(self):
+        super(FbxManager, self).__init__()
+        self.scenes = []
+        pass # end func
+
+    def Destroy(self):
+        for scene in self.scenes:
+            scene.Destroy()
+            pass
+        self.scenes = []
+        pass # end func
+
+    pass # end class
+
+# 三角化
+class FbxGeometryConverter(object):
+    """docstring for FbxGeometryConverter"""
+    def __init__(self, manager):
+        super(FbxGeometryConverter, self).__init__()
+        self.manager = manager
+        pass # end func
+
+    def Triangulate(self, scene, replace, legacy = False):
+        for mesh in scene.getSrcObjects(FbxMesh):
+            mesh.triangulate()
+            pass
+        return True
+        pass # end func
+
+    pass # end class
+
+# 初始化
+def InitializeSdkObjects():
+    manager = FbxManager()
+    scene   = FbxScene()
+    manager.scenes.append(scene)
+    return (manager, scene)
+    pass # end func
+
+# 加载FBX文件
+def LoadScene(manager, scene, filename):
+    try:
+        scene.file   = open(filename, "rb")
+        scene.buffer = mmap.mmap(scene.file.fileno(), 0, access = mmap.ACCESS_READ)
+        scene.build(FbxBinaryReader(scene.buffer).read())
+        pass
+    except (IOError, OSError, ValueError, struct.error, zlib.error) as e:
+        print("Call to FbxBinaryReader::read() failed.")
+        print("Error returned: %s" % e)
+        return False
+    return True
+    pass # end func
@@ -24,6 +24,42 @@ Mesh文件读取格式:
         readBytes(count * 4 * 4)    SubMesh 骨骼索引数据，每个顶点四个数据，使用float类型。索引为骨骼系统骨骼索引。受限于寄存器数量，因此骨骼索引可以使用ushort存放，可以修改脚本相应位置以便减少文件体积
         重复读取SubMesh直到读取完所有SubMesh
     readBytes(6 * 4)                Mesh包围盒数据、一共6个，使用float类型
+    -bounds时包围盒之后为每个SubMesh的包围盒，所有格式相同:
+        readBytes(6 * 4)            SubMesh包围盒数据，min xyz以及max xyz，使用float类型
+        重复读取直到读取完所有SubMesh
+
+索引Mesh文件读取格式(-weld):
+    小头、解压
+    version = readInt()             格式版本，为负数:-2。旧格式第一个int为名称长度，不会为负数
+    之后与Mesh文件格式相同，每个SubMesh的数据为焊接之后的唯一顶点，骨骼索引之后增加三角形索引:
+        count = readInt()           SubMesh 三角形索引长度
+        readBytes(count * 2)        SubMesh 三角形索引数据，使用ushort类型。每个SubMesh唯一顶点数不超过65535
+
+压缩顶点Mesh文件读取格式(-quantize):
+    小头、解压
+    version = readInt()             格式版本，为负数:-3
+    indexed = readInt()             1:带三角形索引(-weld)，0:不带索引
+    之后与Mesh文件格式相同，每个顶点属性的长度之后增加格式，数据按照格式读取:
+        count  = readInt()          顶点属性长度
+        format = readInt()          顶点属性格式
+            0:float                 与Mesh文件格式相同
+            1:ushort定点数          先读取6个float，为最小值xyz以及最大值xyz。数值 = 最小值 + ushort / 65535 * (最大值 - 最小值)，用于顶点
+            2:half float            每个数据2个字节，用于UV
+            3:八面体编码            每个法线两个short，数值为short / 32767，解码之后归一化。长度为0的法线解码为(0, 0, 1)
+            4:ubyte归一化           数值 = ubyte / 255，用于权重，每个顶点的权重和不变
+            5:ubyte                 用于骨骼索引
+            6:ushort                用于骨骼索引，骨骼索引超过255时使用
+        readBytes(...)              顶点属性数据
+        带索引时，骨骼索引之后为三角形索引，与索引Mesh格式相同
+
+可变权重数Mesh文件读取格式(-influences):
+    小头、解压
+    version   = readInt()           格式版本，为负数:-4
+    indexed   = readInt()           1:带三角形索引(-weld)，0:不带索引
+    quantized = readInt()           1:顶点属性带格式(-quantize)，与压缩顶点Mesh格式相同，0:float
+    之后与对应的Mesh文件格式相同，每个SubMesh开头增加权重数:
+        influences = readInt()      SubMesh每个顶点的权重数:1、2或4，没有骨骼时为0。权重以及骨骼索引每个顶点influences个数据，
+                                    权重从大到小排列
 
 
 Anim文件读取格式:
@@ -45,6 +81,24 @@ Anim文件读取格式:
                 frameNum = readInt()                         SubMesh帧数
                 boneNum  = readInt()                         SubMesh骨骼数量
                 readBytes(frameNum * boneNum * 2 * 4 * 4)    SubMesh骨骼动画数据，float类型。保存每一帧的所有骨骼当前的位移以及四元数数据，位移四个，四元数四个
+        3、4、5:关键帧动画(-reduce、-keys)，分别对应0、1、2，每条轨迹只保存关键帧，关键帧之间线性插值(四元数插值之后归一化)
+            轨迹格式:
+                keyNum = readInt()                           关键帧数量，常量轨迹只有一个关键帧
+                readBytes(keyNum * 2)                        关键帧序号，ushort类型
+                readBytes(keyNum * size * 4)                 关键帧数据，float类型。矩阵size为12，位移以及四元数size为8
+            3:帧动画
+                count = readInt()                            帧数
+                读取一条轨迹
+            4、5:骨骼动画
+                count = readInt()                            SubMesh数量
+                    frameNum = readInt()                     SubMesh帧数
+                    boneNum  = readInt()                     SubMesh骨骼数量
+                    读取boneNum条轨迹
+                    重复读取SubMesh
+    -bounds时动画数据之后为每一帧的包围盒以及包围球，所有类型相同。
+    骨骼动画为顶点按照每一帧的骨骼矩阵以及权重蒙皮之后的范围，帧动画为顶点经过每一帧矩阵变换之后的范围:
+            count = readInt()                                帧数
+            readBytes(count * 10 * 4)                        每一帧min xyz、max xyz、球心xyz、半径，float类型。球心为包围盒中心
 
 Camera文件读取格式:
     小头、解压
@@ -58,6 +112,24 @@ Camera文件读取格式:
     readBytes(3 * 4 * 4)        相机矩阵，矩阵为3列四行，float类型
     size = readInt()            相机动画帧数
     readBytes(size * 3 * 4 * 4) 相机动画，相机动画使用3列四行矩阵，数据类型为float
+                                size为负数时为关键帧动画(-reduce、-keys)，帧数为-size，之后为一条关键帧轨迹，格式与Anim文件相同
+
+Pack文件读取格式(-pack):
+    每个Fbx文件生成一个Pack文件，包含该Fbx的所有Mesh、Anim、Camera数据，每个数据块单独压缩，可以只解压需要的数据块
+    小头、不压缩
+    magic  = readUTFBytes(4)    "S3DP"
+    version= readInt()          Pack格式版本:1
+    count  = readInt()          数据块数量
+    offset = readInt()          目录位置
+    数据块                      每个数据块的内容与单独输出时的文件内容相同
+    目录，位于offset，共count个条目:
+        type   = readInt()      数据类型 0:Mesh 1:Anim 2:Camera
+        size   = readInt()      名称长度
+        name   = readUTFBytes(size) 名称，与单独输出时的文件名相同，例如xxx_name.mesh
+        offset = readInt()      数据块位置
+        length = readInt()      数据块长度
+        rawLength = readInt()   解压之后的长度
+        codec  = readInt()      0:不压缩 1:zlib
 
 
 解析参数说明:
@@ -71,18 +143,63 @@ Camera文件读取格式:
     -quat        使用四元数骨骼，默认则使用3列四行矩阵
     -max_quat    设置四元数最大骨骼，默认上限为56，超过则拆分模型
     -max_m34     设置矩阵最大骨骼，默认上限为36，超过则拆分模型
+    -weld        焊接相同的顶点，输出索引Mesh格式，默认输出不带索引的Mesh格式
+    -quantize    压缩顶点数据，输出压缩顶点Mesh格式，默认所有顶点数据使用float
+    -reduce      精简关键帧，输出关键帧动画格式，默认输出每一帧数据
+    -tol_t       精简关键帧时允许的位移误差，默认为0.001
+    -tol_r       精简关键帧时允许的旋转误差，单位为角度，默认为0.05
+    -tol_s       精简关键帧时允许的缩放误差，默认为0.001
+    -level       zlib压缩等级0-9，默认为9
+    -strategy    zlib压缩策略:default、filtered、huffman、rle、fixed，默认为default
+    -force       忽略缓存，强制转换所有Fbx文件。默认根据Fbx目录下的.manifest文件跳过未变化的Fbx文件
+    -jobs        并行转换的进程数，默认为1。每个文件的日志会加上文件名，单个文件失败不影响其它文件
+    -cache_mb    场景骨骼矩阵缓存的内存上限，单位为MB，默认为256。多个Mesh共享的骨骼优先按帧预先计算所有帧，
+                 超过上限之后逐帧计算，不影响输出结果
+    -pack        每个Fbx输出一个Pack文件，默认每个Mesh、Anim、Camera输出单独的文件
+    -profile     记录每个Mesh、相机每个阶段的耗时、CPU时间以及内存峰值增长，保存为Fbx目录下的xxx.profile.json以及xxx.profile.csv。
+                 未变化的Fbx文件会被跳过，需要时配合-force使用
+    -cprofile    使用cProfile分析转换过程，保存为Fbx目录下的xxx.prof
+    -quiet       不打印每根骨骼、每个矩阵等逐个元素的日志
+    -min_weight  舍弃归一化之后小于该值的骨骼权重，再重新归一化，默认为0不舍弃。每个控制点至少保留权重最大的骨骼
+    -influences  每个SubMesh按照顶点实际使用的骨骼数写入1、2或4个权重以及骨骼索引，输出可变权重数Mesh格式，
+                 默认每个顶点写入4个
+    -keys        帧动画以及相机动画直接读取节点位移、旋转、缩放曲线的关键帧，只计算需要的帧的矩阵，输出关键帧动画格式。
+                 关键帧之间位移线性变化、旋转以及缩放不变时只使用两端的关键帧，其它区间(三次插值、非常量外推等)逐帧计算;
+                 父节点有动画、场景中有约束、节点有注视目标或者有多个动画层时整条动画逐帧计算。同时使用-reduce时展开为每一帧之后再精简
+    -bounds      Mesh文件追加每个SubMesh的包围盒，Anim文件追加每一帧的包围盒以及包围球，默认只写入Mesh包围盒
+    -max_memory_mb 转换进程的内存上限，单位为MB，默认为0不限制。每写完一个Mesh或相机检查一次进程内存，超过上限时该Fbx转换失败，
+                 不影响其它文件。多进程时为每个进程的上限。每个文件的内存峰值打印在summary中
     
 '''
 
-from FbxCommon import *
+# 优先使用FbxSdk，找不到时使用纯Python的二进制FBX解析
+try:
+    from FbxCommon import *
+except ImportError:
+    from FbxBinary import *
 from string import count
 import argparse
+import bisect
+import cProfile
+import csv
+import gc
+import hashlib
 import json
 import math
+import multiprocessing
+import numpy
 import os
 import re
 import struct
+import StringIO
+import sys
+import time
+import traceback
 import zlib
+try:
+    import resource
+except ImportError:
+    resource = None
 
 # object
 class LObject(object):
@@ -95,6 +212,19 @@ class LObject(object):
 MESH_TYPE   = ".mesh"
 ANIM_TYPE   = ".anim"
 CAMERA_TYPE = ".camera"
+MANIFEST_TYPE = ".manifest"
+PACK_TYPE   = ".pack"
+# Pack文件中的数据类型，按照序号保存
+PACK_ENTRY_TYPES = [MESH_TYPE, ANIM_TYPE, CAMERA_TYPE]
+# Pack格式
+PACK_MAGIC   = "S3DP"
+PACK_VERSION = 1
+PACK_CODEC_NONE = 0     # 不压缩
+PACK_CODEC_ZLIB = 1     # zlib
+# 转换器版本，输出格式变化时修改
+VERSION = "1.0"
+# 影响输出结果的参数，参与缓存判断
+CACHE_OPTIONS = ["normal", "uv0", "uv1", "anim", "world", "quat", "max_quat", "max_m34", "weld", "quantize", "reduce", "tol_t", "tol_r", "tol_s", "level", "strategy", "pack", "min_weight", "influences", "bounds", "keys"]
 # 翻转
 AXIS_FLIP_L = FbxAMatrix(FbxVector4(0, 0, 0), FbxVector4(-90, 180, 0), FbxVector4(-1, 1, 1))
 AXIS_FLIP_X = FbxAMatrix(FbxVector4(0, 0, 0), FbxVector4(  0, 180, 0), FbxVector4(-1, 1, 1))
@@ -102,6 +232,49 @@ AXIS_FLIP_X = FbxAMatrix(FbxVector4(0, 0, 0), FbxVector4(  0, 180, 0), FbxVector
 MAX_WEIGHT_NUM = 4
 # 最大顶点数
 MAX_VERTEX_NUM = 65535
+# 关键帧格式的最大帧数，关键帧序号使用ushort
+MAX_KEYFRAME_NUM = 65536
+# 索引Mesh格式版本
+MESH_VERSION = 2
+# 压缩顶点Mesh格式版本
+MESH_QUANTIZED_VERSION = 3
+# 可变权重数Mesh格式版本
+MESH_INFLUENCE_VERSION = 4
+# 顶点属性格式
+FORMAT_FLOAT    = 0     # float
+FORMAT_FIXED16  = 1     # ushort定点数，相对于包围盒
+FORMAT_HALF     = 2     # half float
+FORMAT_OCT16    = 3     # 八面体编码法线
+FORMAT_UNORM8   = 4     # ubyte归一化
+FORMAT_UBYTE    = 5     # ubyte
+FORMAT_USHORT   = 6     # ushort
+# -profile记录的阶段
+MESH_STAGES   = ["parseTransform", "parseIndices", "parseVertices", "parseUV0", "parseUV1", "parseNormals", "parseCluster", "parseIndicesAndWeights", "parseAnim", "parseAnimBounds", "splitMesh", "generateMeshBytes", "generateAnimBytes", "writeMesh", "writeAnim"]
+CAMERA_STAGES = ["parseCameraProperties", "parseCameraAnim", "generateBytes", "writeCamera"]
+# 直接读取关键帧的节点动画属性以及通道:位移、旋转、缩放
+CURVE_PROPERTIES = ["LclTranslation", "LclRotation", "LclScaling"]
+CURVE_CHANNELS   = ["X", "Y", "Z"]
+# 曲线在两个关键帧之间的形状
+CURVE_CONSTANT   = 0
+CURVE_LINEAR     = 1
+CURVE_OTHER      = 2
+# Mesh按列存储的三角形顶点属性:名称、宽度、类型
+VERTEX_COLUMNS = [
+    ("vertices",    3,              numpy.float64),
+    ("uvs0",        2,              numpy.float64),
+    ("uvs1",        2,              numpy.float64),
+    ("normals",     3,              numpy.float64),
+    ("weights",     MAX_WEIGHT_NUM, numpy.float64),
+    ("boneIndices", MAX_WEIGHT_NUM, numpy.int32),
+]
+# 压缩策略
+COMPRESS_STRATEGIES = {
+    "default"   : zlib.Z_DEFAULT_STRATEGY,
+    "filtered"  : zlib.Z_FILTERED,
+    "huffman"   : zlib.Z_HUFFMAN_ONLY,
+    "rle"       : getattr(zlib, "Z_RLE", 3),
+    "fixed"     : getattr(zlib, "Z_FIXED", 4),
+}
 # 配置文件
 config = LObject()
 
@@ -126,9 +299,47 @@ def parseArgument():
     # 使用四元数方式
     parser.add_argument("-quat",    help = "quat with anima",   action = "store_true",      default = False)
     # 使用四元数时，最大骨骼数
-    parser.add_argument("-max_quat",help = "bone num with quat",action = "store",           default = 56)
+    parser.add_argument("-max_quat",help = "bone num with quat",action = "store",           default = 56,        type = int)
     # 使用矩阵时，最大骨骼数
-    parser.add_argument("-max_m34", help = "bone num with m34", action = "store",           default = 36)
+    parser.add_argument("-max_m34", help = "bone num with m34", action = "store",           default = 36,        type = int)
+    # 焊接顶点，输出索引格式
+    parser.add_argument("-weld",    help = "indexed mesh",      action = "store_true",      default = False)
+    # 压缩顶点数据
+    parser.add_argument("-quantize",help = "quantize vertices", action = "store_true",      default = False)
+    # 精简关键帧
+    parser.add_argument("-reduce",  help = "reduce keyframes",  action = "store_true",      default = False)
+    # 精简关键帧的误差
+    parser.add_argument("-tol_t",   help = "translation error", action = "store",           default = 0.001,     type = float)
+    parser.add_argument("-tol_r",   help = "rotation error(deg)",action= "store",           default = 0.05,      type = float)
+    parser.add_argument("-tol_s",   help = "scale error",       action = "store",           default = 0.001,     type = float)
+    # 压缩等级
+    parser.add_argument("-level",   help = "zlib level 0-9",    action = "store",           default = 9,         type = int, choices = range(10))
+    # 压缩策略
+    parser.add_argument("-strategy",help = "zlib strategy",     action = "store",           default = "default", choices = sorted(COMPRESS_STRATEGIES.keys()))
+    # 忽略缓存，强制转换
+    parser.add_argument("-force",   help = "ignore build cache",action = "store_true",      default = False)
+    # 并行转换的进程数
+    parser.add_argument("-jobs",    help = "process num",       action = "store",           default = 1,         type = int)
+    # 骨骼矩阵缓存的内存上限
+    parser.add_argument("-cache_mb",help = "transform cache MB",action = "store",           default = 256,       type = int)
+    # 每个Fbx输出一个Pack文件
+    parser.add_argument("-pack",    help = "pack per fbx",      action = "store_true",      default = False)
+    # 记录每个阶段的耗时以及内存
+    parser.add_argument("-profile", help = "stage profile",     action = "store_true",      default = False)
+    # cProfile
+    parser.add_argument("-cprofile",help = "cProfile dump",     action = "store_true",      default = False)
+    # 不打印逐个元素的日志
+    parser.add_argument("-quiet",   help = "less logging",      action = "store_true",      default = False)
+    # 进程内存上限
+    parser.add_argument("-max_memory_mb",help = "memory limit MB", action = "store",        default = 0,         type = int)
+    # 舍弃较小的骨骼权重
+    parser.add_argument("-min_weight",help = "prune weights",   action = "store",           default = 0.0,       type = float)
+    # 每个SubMesh按照实际使用的骨骼数写入权重
+    parser.add_argument("-influences",help = "1/2/4 weights",   action = "store_true",      default = False)
+    # 输出SubMesh包围盒以及每一帧的包围盒、包围球
+    parser.add_argument("-bounds",  help = "bounds per frame",  action = "store_true",      default = False)
+    # 帧动画以及相机动画直接读取曲线关键帧
+    parser.add_argument("-keys",    help = "curve keys",        action = "store_true",      default = False)
     
     option = parser.parse_args()
     
@@ -170,65 +381,274 @@ def scanFbxFiles(args):
     return fbxList
     pass # end func
 
-# Matrix3D矩阵，通过FbxAMatrix初始化
-# 使用主列矩阵，矩阵是反着的。
-class Matrix3D(object):
-    """docstring for Matrix3D"""
-    def __init__(self, mt):
-        super(Matrix3D, self).__init__()
-        self.rawData = [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1]
-        for i in range(4):
-            row = mt.GetRow(i)
-            self.rawData[i * 4 + 0] = row[0]
-            self.rawData[i * 4 + 1] = row[1]
-            self.rawData[i * 4 + 2] = row[2]
-            self.rawData[i * 4 + 3] = row[3]
+# FbxAMatrix转换为numpy矩阵，列向量形式，第3列为平移。FbxBinary的矩阵直接拷贝
+def getMatrixArray(fbxAMatrix):
+    if isinstance(getattr(fbxAMatrix, "m", None), numpy.ndarray):
+        return numpy.array(fbxAMatrix.m, numpy.float64)
+    matrix = numpy.empty((4, 4))
+    for i in range(4):
+        row = fbxAMatrix.GetRow(i)
+        matrix[:, i] = [row[0], row[1], row[2], row[3]]
+        pass
+    return matrix
+    pass # end func
+
+# 批量变换顶点，points为N*3数组，计算顺序与FbxAMatrix.MultT相同
+def transformPoints(matrix, points):
+    out = numpy.empty((len(points), 3))
+    x, y, z = points[:, 0], points[:, 1], points[:, 2]
+    for i in range(3):
+        out[:, i] = x * matrix[i, 0] + y * matrix[i, 1] + z * matrix[i, 2] + matrix[i, 3]
+        pass
+    return out
+    pass # end func
+
+# 批量变换方向向量，不包含平移
+def transformVectors(matrix, vectors):
+    out = numpy.empty((len(vectors), 3))
+    x, y, z = vectors[:, 0], vectors[:, 1], vectors[:, 2]
+    for i in range(3):
+        out[:, i] = x * matrix[i, 0] + y * matrix[i, 1] + z * matrix[i, 2]
+        pass
+    return out
+    pass # end func
+
+# 批量蒙皮，matrices为骨骼数*4*4，每个点为各骨骼矩阵变换之后按照权重相加，权重为0的骨骼不影响结果
+def skinPoints(matrices, points, weights, indices):
+    out = numpy.zeros((len(points), 3))
+    x, y, z = points[:, 0], points[:, 1], points[:, 2]
+    for k in range(weights.shape[1]):
+        matrix = matrices[:, 0:3][indices[:, k]]
+        weight = weights[:, k]
+        for i in range(3):
+            out[:, i] += weight * (x * matrix[:, i, 0] + y * matrix[:, i, 1] + z * matrix[:, i, 2] + matrix[:, i, 3])
             pass
         pass
-    
-    # 获取一列
-    def getRaw(self, raw):
-        vec = [0, 0, 0, 0]
-        vec[0] = self.rawData[raw + 0];
-        vec[1] = self.rawData[raw + 4];
-        vec[2] = self.rawData[raw + 8];
-        vec[3] = self.rawData[raw + 12];
-        return vec
+    return out
+    pass # end func
+
+# 计算包围盒，返回min、max列表，没有顶点时为0
+def getPointsBounds(points):
+    if len(points) == 0:
+        return [0, 0, 0], [0, 0, 0]
+    return points.min(axis = 0).tolist(), points.max(axis = 0).tolist()
+    pass # end func
+
+# 计算一帧的包围盒以及包围球:min xyz、max xyz、球心xyz、半径，球心为包围盒中心
+def getFrameBounds(points):
+    if len(points) == 0:
+        return numpy.zeros(10)
+    lower  = points.min(axis = 0)
+    upper  = points.max(axis = 0)
+    center = (lower + upper) * 0.5
+    radius = numpy.sqrt(((points - center) ** 2).sum(axis = 1).max())
+    return numpy.concatenate([lower, upper, center, [radius]])
+    pass # end func
+
+# 批量归一化，长度为0的向量保持为0
+def normalizeVectors(vectors):
+    length = numpy.sqrt(vectors[:, 0] * vectors[:, 0] + vectors[:, 1] * vectors[:, 1] + vectors[:, 2] * vectors[:, 2])
+    length[length == 0] = 1.0
+    vectors /= length[:, numpy.newaxis]
+    return vectors
+    pass # end func
+
+# 交换每个三角形的第二、第三个顶点，data为每个顶点一行的数组
+def swapWinding(data):
+    triangles = data.reshape((-1, 3) + data.shape[1:])
+    triangles[:, [1, 2]] = triangles[:, [2, 1]]
+    pass # end func
+
+# 获取所有多边形的顶点索引，三角化之后每3个为一个三角形。FbxBinary提供零拷贝接口，FbxSdk则一次调用取出全部
+def getPolygonVerticesArray(fbxMesh):
+    if hasattr(fbxMesh, "GetPolygonVerticesArray"):
+        return fbxMesh.GetPolygonVerticesArray()
+    return numpy.array(fbxMesh.GetPolygonVertices(), numpy.int32)
+    pass # end func
+
+# 获取控制点数组，N*3。FbxBinary提供零拷贝接口，FbxSdk则一次性拷贝
+def getControlPointsArray(fbxMesh):
+    if hasattr(fbxMesh, "GetControlPointsArray"):
+        return fbxMesh.GetControlPointsArray()
+    points = fbxMesh.GetControlPoints()
+    return numpy.array([(p[0], p[1], p[2]) for p in points], numpy.float64).reshape(-1, 3)
+    pass # end func
+
+# 焊接顶点，按照写入文件的float数据判断顶点是否相同。
+# 返回唯一顶点在原数组中的位置(按首次出现的顺序)，以及每个顶点焊接之后的索引
+def weldVertices(attributes):
+    count = len(attributes[0])
+    if count == 0:
+        return numpy.zeros(0, numpy.int64), numpy.zeros(0, numpy.int64)
+    data  = numpy.hstack([numpy.asarray(attr, '<f4') for attr in attributes if len(attr) == count])
+    data  = numpy.ascontiguousarray(data)
+    keys  = data.view(numpy.dtype((numpy.void, data.itemsize * data.shape[1]))).ravel()
+    _, first, inverse = numpy.unique(keys, return_index = True, return_inverse = True)
+    # 按照首次出现的顺序重新编号
+    order = numpy.argsort(first)
+    remap = numpy.empty(len(first), numpy.int64)
+    remap[order] = numpy.arange(len(first))
+    return first[order], remap[inverse.ravel()]
+    pass # end func
+
+# 按三角形拆分焊接之后的顶点，保证每一段的唯一顶点数不超过MAX_VERTEX_NUM。返回每一段的起止位置
+def getWeldSplitRanges(indices):
+    ranges = []
+    start  = 0
+    count  = len(indices)
+    while start < count:
+        part = indices[start:]
+        _, first = numpy.unique(part, return_index = True)
+        isFirst  = numpy.zeros(len(part), numpy.int64)
+        isFirst[first] = 1
+        # 每个三角形结束时的唯一顶点数
+        vertexNum = numpy.cumsum(isFirst)[2::3]
+        end = start + numpy.searchsorted(vertexNum, MAX_VERTEX_NUM, side = "right") * 3
+        ranges.append((start, end))
+        start = end
         pass
-    
-    # 获取一行
-    def getColumn(self, column):
-        vec = [0, 0, 0, 0]
-        vec[0] = self.rawData[column * 4 + 0]
-        vec[1] = self.rawData[column * 4 + 1]
-        vec[2] = self.rawData[column * 4 + 2]
-        vec[3] = self.rawData[column * 4 + 3]
-        return vec
-        pass # end func
-    
-    # deltaTransform
-    def deltaTransformVector(self, vec):
-        right = [self.rawData[0], self.rawData[4], self.rawData[8]]
-        up    = [self.rawData[1], self.rawData[5], self.rawData[9]]
-        ddir  = [self.rawData[2], self.rawData[6], self.rawData[10]]
-        out   = [0, 0, 0]
-        out[0] = vec[0] * right[0] + vec[1] * right[1] + vec[2] * right[2]
-        out[1] = vec[0] * up[0]    + vec[1] * up[1]    + vec[2] * up[2]
-        out[2] = vec[0] * ddir[0]  + vec[1] * ddir[1]  + vec[2] * ddir[2]
-        return out
+    return ranges
+    pass # end func
+
+# 将骨骼集合装入尽量少的调色板，每个调色板的骨骼数不超过maxNum。
+# 骨骼多的集合先装，每次选择新增骨骼最少的调色板，最后合并可以合并的调色板。
+# 返回每个调色板的骨骼集合，以及装入的骨骼集合序号
+def packBonePalettes(boneSets, maxNum):
+    order    = sorted(range(len(boneSets)), key = lambda i: (-len(boneSets[i]), sorted(boneSets[i])))
+    palettes = []
+    members  = []
+    for i in order:
+        bones   = boneSets[i]
+        best    = -1
+        bestNum = maxNum + 1
+        for j in range(len(palettes)):
+            num = len(bones - palettes[j])
+            if num < bestNum and len(palettes[j]) + num <= maxNum:
+                best    = j
+                bestNum = num
+                if num == 0:
+                    break
+                pass
+            pass
+        # 没有可以装入的调色板，新建一个。单个集合超过上限时也单独使用一个调色板
+        if best < 0:
+            palettes.append(set(bones))
+            members.append([i])
+            pass
+        else:
+            palettes[best] |= bones
+            members[best].append(i)
+            pass
         pass
-    
-    # transform
-    def transformVector(self, vec):
-        right = [self.rawData[0],  self.rawData[4],  self.rawData[8]]
-        up    = [self.rawData[1],  self.rawData[5],  self.rawData[9]]
-        ddir  = [self.rawData[2],  self.rawData[6],  self.rawData[10]]
-        out   = [self.rawData[12], self.rawData[13], self.rawData[14]]
-        out[0] = out[0] + vec[0] * right[0] + vec[1] * right[1] + vec[2] * right[2]
-        out[1] = out[1] + vec[0] * up[0]    + vec[1] * up[1]    + vec[2] * up[2]
-        out[2] = out[2] + vec[0] * ddir[0]  + vec[1] * ddir[1]  + vec[2] * ddir[2]
-        return out
+    # 合并调色板，一遍扫描。合并之后a只会变大，之前不能合并的组合仍然不能合并，不需要从头开始
+    a = 0
+    while a < len(palettes):
+        b = a + 1
+        while b < len(palettes):
+            if len(palettes[a] | palettes[b]) <= maxNum:
+                palettes[a] |= palettes.pop(b)
+                members[a]  += members.pop(b)
+                pass
+            else:
+                b += 1
+                pass
+            pass
+        a += 1
         pass
+    return palettes, members
+    pass # end func
+
+# 将所有cluster的(控制点, 骨骼, 权重)整理为按控制点分组的CSR数组，offsets[i]:offsets[i+1]为控制点i的权重。
+# 同一控制点的权重从大到小排列，权重相同时保持cluster的顺序。忽略权重不大于0以及超出控制点范围的数据
+def buildSkinTable(points, joints, weights, count):
+    valid   = (weights > 0) & (points >= 0) & (points < count)
+    points, joints, weights = points[valid], joints[valid], weights[valid]
+    order   = numpy.lexsort((-weights, points))
+    offsets = numpy.zeros(count + 1, numpy.int64)
+    offsets[1:] = numpy.cumsum(numpy.bincount(points, minlength = count))
+    return offsets, joints[order], weights[order]
+    pass # end func
+
+# 每个控制点选出权重最大的maxNum个骨骼并重新归一化，不足的补0。返回控制点数*maxNum的权重以及骨骼索引
+def selectInfluences(offsets, joints, weights, maxNum):
+    count   = len(offsets) - 1
+    points  = numpy.repeat(numpy.arange(count), numpy.diff(offsets))
+    slots   = numpy.arange(len(joints)) - offsets[points]
+    keep    = slots < maxNum
+    table   = numpy.zeros((count, maxNum), numpy.float64)
+    indices = numpy.zeros((count, maxNum), numpy.int32)
+    table[points[keep], slots[keep]]   = weights[keep]
+    indices[points[keep], slots[keep]] = joints[keep]
+    # 归一化，没有骨骼的控制点保持为0
+    total   = table.sum(axis = 1)
+    table[total > 0] /= total[total > 0, numpy.newaxis]
+    return table, indices
+    pass # end func
+
+# 舍弃小于minWeight的权重并重新归一化，每个控制点至少保留权重最大的骨骼，舍弃的权重排在最后。返回舍弃的权重数
+def pruneInfluences(weights, indices, minWeight):
+    prune = (weights > 0) & (weights < minWeight)
+    prune[:, 0] = False
+    weights[prune] = 0
+    indices[prune] = 0
+    total = weights.sum(axis = 1)
+    weights[total > 0] /= total[total > 0, numpy.newaxis]
+    return numpy.count_nonzero(prune)
+    pass # end func
+
+# 顶点需要的权重数:1、2或者MAX_WEIGHT_NUM，没有权重时为0。权重从大到小排列，只需要保留前几列
+def getInfluenceCount(weights):
+    if len(weights) == 0:
+        return 0
+    count = int((weights > 0).sum(axis = 1).max())
+    if count <= 2:
+        return max(count, 1)
+    return MAX_WEIGHT_NUM
+    pass # end func
+
+# 按照三角形顺序贪心拆分时的SubMesh数量，用于对比拆分效果
+def countGreedyPalettes(triangleBones, maxNum):
+    count = 1
+    bones = set()
+    for triBones in triangleBones:
+        if len(bones | triBones) > maxNum:
+            count += 1
+            bones  = set()
+            pass
+        bones |= triBones
+        pass
+    return count
+    pass # end func
+
+# 获取图层元素的direct数组，N*width
+def getLayerDirectArray(element, width):
+    data = element.GetDirectArray()
+    if hasattr(data, "GetArray"):
+        return data.GetArray()[:, 0:width]
+    return numpy.array(getLayerArrayItems(data, width), numpy.float64).reshape(-1, width)
+    pass # end func
+
+# 获取图层元素的index数组
+def getLayerIndexArray(element):
+    data = element.GetIndexArray()
+    if hasattr(data, "GetArray"):
+        return data.GetArray()
+    return numpy.array(getLayerArrayItems(data, 0), numpy.int64)
+    pass # end func
+
+# 一次性取出FbxSdk图层数组的所有元素，width为0时元素为int。绑定支持序列协议时整体转换，否则才逐个GetAt
+def getLayerArrayItems(data, width):
+    if hasattr(data, "__len__") and hasattr(data, "__getitem__"):
+        items = list(data)
+        pass
+    else:
+        items = [data.GetAt(i) for i in range(data.GetCount())]
+        pass
+    if width > 0:
+        items = [[item[j] for j in range(width)] for item in items]
+        pass
+    return items
+    pass # end func
 
 # 获取GeometryTransform
 def GetGeometryTransform(node):
@@ -238,28 +658,765 @@ def GetGeometryTransform(node):
     return FbxAMatrix(t, r, s)
     pass # end func
 
-# 生成FbxAMatrix数据
-def getMatrix3DBytes(fbxAMatrix):
-    matrix = Matrix3D(fbxAMatrix)
-    data = b''
-    # 丢弃最后一列数据
-    for i in range(3):
-        raw = matrix.getRaw(i)
-        for j in range(len(raw)):
-            data += struct.pack('<f', raw[j])
+# 生成FbxAMatrix数据，3行4列，丢弃最后一行
+def getMatrix3DArray(fbxAMatrix):
+    return getMatrixArray(fbxAMatrix)[0:3]
+    pass # end func
+
+# 多个FbxAMatrix转换为numpy矩阵块，matrices按顺序填满shape，返回shape*4*4数组
+def getMatrixBlock(matrices, shape):
+    block = numpy.empty(shape + (4, 4))
+    flat  = block.reshape(-1, 4, 4)
+    index = 0
+    for matrix in matrices:
+        flat[index] = getMatrixArray(matrix)
+        index += 1
+        pass
+    return block
+    pass # end func
+
+# 矩阵块转换为3行4列数据，丢弃最后一行，返回...*12数组
+def getMatrix34Block(block):
+    return block[..., 0:3, :].reshape(block.shape[:-2] + (12,))
+    pass # end func
+
+# 矩阵块转换为Quat数据，位移4个，四元数4个(x,y,z,w)，返回...*8数组。
+# 四元数为去掉缩放之后的旋转，计算方法与FbxAMatrix.GetQ相同
+def getQuatBlock(block):
+    m = block.reshape(-1, 4, 4)
+    r = m[:, 0:3, 0:3].copy()
+    # 去掉缩放，镜像时第一列取反
+    s = numpy.sqrt((r ** 2).sum(axis = 1))
+    s[numpy.linalg.det(r) < 0, 0] *= -1
+    r /= numpy.where(s == 0, 1, s)[:, numpy.newaxis, :]
+    # 按照迹以及最大的对角元素分别计算
+    tr = r[:, 0, 0] + r[:, 1, 1] + r[:, 2, 2]
+    caseW = tr > 0
+    caseX = ~caseW & (r[:, 0, 0] > r[:, 1, 1]) & (r[:, 0, 0] > r[:, 2, 2])
+    caseY = ~caseW & ~caseX & (r[:, 1, 1] > r[:, 2, 2])
+    caseZ = ~caseW & ~caseX & ~caseY
+    q = numpy.empty((len(m), 4))
+    c = r[caseW]
+    d = numpy.sqrt(c[:, 0, 0] + c[:, 1, 1] + c[:, 2, 2] + 1.0) * 2
+    q[caseW] = numpy.column_stack([(c[:, 2, 1] - c[:, 1, 2]) / d, (c[:, 0, 2] - c[:, 2, 0]) / d, (c[:, 1, 0] - c[:, 0, 1]) / d, 0.25 * d])
+    c = r[caseX]
+    d = numpy.sqrt(1.0 + c[:, 0, 0] - c[:, 1, 1] - c[:, 2, 2]) * 2
+    q[caseX] = numpy.column_stack([0.25 * d, (c[:, 0, 1] + c[:, 1, 0]) / d, (c[:, 0, 2] + c[:, 2, 0]) / d, (c[:, 2, 1] - c[:, 1, 2]) / d])
+    c = r[caseY]
+    d = numpy.sqrt(1.0 + c[:, 1, 1] - c[:, 0, 0] - c[:, 2, 2]) * 2
+    q[caseY] = numpy.column_stack([(c[:, 0, 1] + c[:, 1, 0]) / d, 0.25 * d, (c[:, 1, 2] + c[:, 2, 1]) / d, (c[:, 0, 2] - c[:, 2, 0]) / d])
+    c = r[caseZ]
+    d = numpy.sqrt(1.0 + c[:, 2, 2] - c[:, 0, 0] - c[:, 1, 1]) * 2
+    q[caseZ] = numpy.column_stack([(c[:, 0, 2] + c[:, 2, 0]) / d, (c[:, 1, 2] + c[:, 2, 1]) / d, 0.25 * d, (c[:, 1, 0] - c[:, 0, 1]) / d])
+    out = numpy.zeros((len(m), 8))
+    out[:, 0:3] = m[:, 0:3, 3]
+    out[:, 4:8] = q
+    return out.reshape(block.shape[:-2] + (8,))
+    pass # end func
+
+# 场景动画每一帧的时间
+def getFrameTimes(scene):
+    # 获取stack
+    stack = scene.GetSrcObject(FbxAnimStack.ClassId, 0)
+    scene.SetCurrentAnimationStack(stack)
+    # 获取时间
+    timeSpan  = stack.GetLocalTimeSpan()
+    time      = timeSpan.GetStart()
+    # frameTime
+    frameTime = FbxTime()
+    frameTime.SetTime(0, 0, 0, 1, 0, scene.GetGlobalSettings().GetTimeMode())
+    times = []
+    while time <= timeSpan.GetStop():
+        times.append(FbxTime(time.Get()))
+        time += frameTime
+        pass
+    return times
+    pass # end func
+
+# 采样场景动画每一帧节点的全局矩阵，返回帧数*节点数*4*4的矩阵块。prefetch过的共享骨骼直接从缓存的矩阵块中取出
+def sampleGlobalTransforms(scene, nodes, transformCache):
+    times  = getFrameTimes(scene)
+    block  = numpy.empty((len(times), len(nodes), 4, 4))
+    others = []
+    for i, node in enumerate(nodes):
+        column = transformCache.getColumn(node)
+        if column is None:
+            others.append(i)
+            pass
+        else:
+            block[:, i] = transformCache.block[:, column]
+            transformCache.hits += len(times)
             pass
         pass
-    return data
+    # 其它节点每一帧的全局矩阵
+    matrices = []
+    for time in times:
+        for i in others:
+            matrices.append(transformCache.getGlobalTransform(nodes[i], time))
+            pass
+        pass
+    block[:, others] = getMatrixBlock(matrices, (len(times), len(others)))
+    return block
+    pass # end func
+
+# 读取节点位移、旋转、缩放曲线，返回三组曲线，每条曲线为(关键帧时间列表, 曲线)。没有关键帧的通道不返回
+def getNodeCurves(node, layer):
+    curves = []
+    for name in CURVE_PROPERTIES:
+        group = []
+        for channel in CURVE_CHANNELS:
+            curve = getattr(node, name).GetCurve(layer, channel)
+            if curve is not None and curve.KeyGetCount() > 0:
+                group.append(([curve.KeyGetTime(i).Get() for i in range(curve.KeyGetCount())], curve))
+                pass
+            pass
+        curves.append(group)
+        pass
+    return curves
+    pass # end func
+
+# 曲线在start到stop之间的形状，中间没有关键帧。返回形状以及是否为有跳变的常量插值
+def getCurveShape(times, curve, start, stop):
+    i = bisect.bisect_right(times, start) - 1
+    # 第一个关键帧之前以及最后一个关键帧之后按照外推方式，只有常量外推为常量，循环、往复等其它外推逐帧计算
+    if i < 0:
+        return (CURVE_CONSTANT if curve.GetPreExtrapolation() == FbxAnimCurveBase.eConstant else CURVE_OTHER), False
+    if i >= len(times) - 1:
+        return (CURVE_CONSTANT if curve.GetPostExtrapolation() == FbxAnimCurveBase.eConstant else CURVE_OTHER), False
+    v0 = curve.KeyGetValue(i)
+    v1 = curve.KeyGetValue(i + 1)
+    interpolation = curve.KeyGetInterpolation(i)
+    if interpolation == FbxAnimCurveDef.eInterpolationConstant:
+        return CURVE_CONSTANT, v0 != v1
+    if interpolation == FbxAnimCurveDef.eInterpolationLinear:
+        return (CURVE_CONSTANT if v0 == v1 else CURVE_LINEAR), False
+    return CURVE_OTHER, False
+    pass # end func
+
+# 两个关键帧之间全局矩阵的形状:位移线性变化、旋转以及缩放不变时为线性，否则为CURVE_OTHER。
+# 返回形状以及是否有常量插值的跳变
+def getSegmentShape(curves, start, stop):
+    shape = CURVE_CONSTANT
+    steps = False
+    for group, maxShape in zip(curves, [CURVE_LINEAR, CURVE_CONSTANT, CURVE_CONSTANT]):
+        for times, curve in group:
+            curveShape, jump = getCurveShape(times, curve, start, stop)
+            if curveShape > maxShape:
+                return CURVE_OTHER, False
+            shape = max(shape, curveShape)
+            steps = steps or jump
+            pass
+        pass
+    return shape, steps
+    pass # end func
+
+# 直接读取节点曲线的关键帧，只计算需要的帧的全局矩阵。返回帧数、帧序号列表以及这些帧的全局矩阵块(帧序号数*4*4)，
+# 帧序号之间线性插值即为每一帧的矩阵。曲线关键帧所在的帧一定计算，关键帧之间位移线性变化、旋转以及缩放不变时
+# 全局矩阵也是线性的，只计算两端(常量插值跳变时再计算跳变两侧的帧)，其它区间逐帧计算。
+# 父节点有动画、场景中有约束、节点有注视目标或者有多个动画层时不能只由节点自己的曲线决定，帧序号为None，矩阵块为每一帧
+def sampleCurveKeys(scene, node, transformCache):
+    name  = node.GetName()
+    # 获取stack
+    stack = scene.GetSrcObject(FbxAnimStack.ClassId, 0)
+    scene.SetCurrentAnimationStack(stack)
+    # 帧数以及每一帧的时间，与sampleGlobalTransforms相同
+    timeSpan  = stack.GetLocalTimeSpan()
+    frameTime = FbxTime()
+    frameTime.SetTime(0, 0, 0, 1, 0, scene.GetGlobalSettings().GetTimeMode())
+    start     = timeSpan.GetStart().Get()
+    step      = frameTime.Get()
+    frameNum  = max(int((timeSpan.GetStop().Get() - start) // step) + 1, 0)
+    # 检测是否可以直接使用关键帧
+    reason = None
+    layer  = None
+    if frameNum < 3:
+        reason = "%d frames" % frameNum
+        pass
+    elif scene.GetSrcObjectCount(FbxConstraint.ClassId) > 0:
+        reason = "constraints"
+        pass
+    elif stack.GetSrcObjectCount(FbxAnimLayer.ClassId) != 1:
+        reason = "%d layers" % stack.GetSrcObjectCount(FbxAnimLayer.ClassId)
+        pass
+    elif node.GetTarget() is not None or node.GetTargetUp() is not None:
+        reason = "look at target"
+        pass
+    else:
+        layer  = stack.GetSrcObject(FbxAnimLayer.ClassId, 0)
+        parent = node.GetParent()
+        while parent is not None and parent.GetParent() is not None:
+            if any(getNodeCurves(parent, layer)):
+                reason = "animated parent %s" % parent.GetName()
+                break
+            parent = parent.GetParent()
+            pass
+        pass
+    if reason is not None:
+        print("\tcurve keys %s: %s, sample every frame" % (name, reason))
+        return frameNum, None, sampleGlobalTransforms(scene, [node], transformCache)[:, 0]
+    # 曲线关键帧所在的帧，不在整数帧上时取前后两帧
+    curves = getNodeCurves(node, layer)
+    keys   = set([0, frameNum - 1])
+    for group in curves:
+        for times, curve in group:
+            for ticks in times:
+                frame = float(ticks - start) / step
+                if 0 < frame < frameNum - 1:
+                    keys.add(int(math.floor(frame)))
+                    keys.add(int(math.ceil(frame)))
+                    pass
+                pass
+            pass
+        pass
+    keys = sorted(keys)
+    # 每个区间需要计算的帧
+    frames  = set(keys)
+    sampled = 0
+    for a, b in zip(keys[0:-1], keys[1:]):
+        if b - a < 2:
+            continue
+        shape, steps = getSegmentShape(curves, start + a * step, start + b * step)
+        if shape == CURVE_OTHER:
+            frames.update(range(a + 1, b))
+            sampled += b - a - 1
+            pass
+        elif steps:
+            frames.update([a + 1, b - 1])
+            pass
+        pass
+    frames = sorted(frames)
+    matrices = [transformCache.getGlobalTransform(node, FbxTime(start + frame * step)) for frame in frames]
+    # 统计省略的矩阵计算
+    avoided = frameNum - len(frames)
+    transformCache.avoided += avoided
+    print("\tcurve keys %s: %d frames, %d keys, %d evaluated frames (%d sampled between keys), avoided %d evaluations" % (name, frameNum, len(keys), len(frames), sampled, avoided))
+    # 每一帧都需要计算时使用逐帧格式
+    if len(frames) == frameNum:
+        frames = None
+        pass
+    return frameNum, frames, getMatrixBlock(matrices, (len(matrices),))
+    pass # end func
+
+# 关键帧线性插值展开为每一帧，keys为帧序号，values为关键帧数*width。关键帧所在的帧保持原来的数据
+def expandKeyframes(keys, values, frameNum):
+    frames = numpy.arange(frameNum)
+    out    = numpy.empty((frameNum, values.shape[1]))
+    for i in range(values.shape[1]):
+        out[:, i] = numpy.interp(frames, keys, values[:, i])
+        pass
+    out[keys] = values
+    return out
+    pass # end func
+
+# 检测帧数是否可以使用关键帧格式，超过关键帧序号的范围时打印警告，使用逐帧格式
+def isKeyframeSupported(name, frameNum):
+    if frameNum <= MAX_KEYFRAME_NUM:
+        return True
+    print("\twarning: %s has %d frames, keyframe indices support at most %d, write every frame" % (name, frameNum, MAX_KEYFRAME_NUM))
+    return False
     pass # end func
 
-# 生成Quat数据
-def getQuatBytesFromAMatrix(fbxAMatrix):
-    data = b''
-    t = fbxAMatrix.GetT()
-    q = fbxAMatrix.GetQ()
-    data += struct.pack('<ffff', t[0], t[1], t[2], 0)
-    data += struct.pack('<ffff', q[0], q[1], q[2], q[3])
-    return data
+# 写一条关键帧轨迹:关键帧数量、关键帧序号、关键帧数据
+def writeKeyframes(data, keys, values):
+    data.writeInt(len(keys))
+    data.writeUShorts(keys)
+    data.writeFloats(values)
+    pass # end func
+
+# 矩阵轨迹的误差，每帧一行3行4列矩阵。返回每帧的位移误差、旋转误差(角度)、缩放误差
+def getMatrixTrackError(samples, approx):
+    a = samples.reshape(-1, 3, 4)
+    b = approx.reshape(-1, 3, 4)
+    t = numpy.sqrt(((a[:, :, 3] - b[:, :, 3]) ** 2).sum(axis = 1))
+    # 缩放为每一列的长度
+    scaleA = numpy.sqrt((a[:, :, 0:3] ** 2).sum(axis = 1))
+    scaleB = numpy.sqrt((b[:, :, 0:3] ** 2).sum(axis = 1))
+    s = numpy.abs(scaleA - scaleB).max(axis = 1)
+    # 去掉缩放之后的旋转夹角
+    rotA = a[:, :, 0:3] / numpy.where(scaleA == 0, 1, scaleA)[:, numpy.newaxis, :]
+    rotB = b[:, :, 0:3] / numpy.where(scaleB == 0, 1, scaleB)[:, numpy.newaxis, :]
+    cos  = ((rotA * rotB).sum(axis = (1, 2)) - 1) / 2
+    r = numpy.degrees(numpy.arccos(numpy.clip(cos, -1, 1)))
+    return t, r, s
+    pass # end func
+
+# 位移+四元数轨迹的误差，每帧一行8个数据。四元数插值之后归一化
+def getQuatTrackError(samples, approx):
+    t = numpy.sqrt(((samples[:, 0:3] - approx[:, 0:3]) ** 2).sum(axis = 1))
+    qa  = samples[:, 4:8]
+    qb  = approx[:, 4:8]
+    dot = numpy.abs((qa * qb).sum(axis = 1))
+    dot = dot / numpy.maximum(numpy.sqrt((qa * qa).sum(axis = 1) * (qb * qb).sum(axis = 1)), 1e-12)
+    r = numpy.degrees(2 * numpy.arccos(numpy.clip(dot, 0, 1)))
+    return t, r, numpy.zeros(len(samples))
+    pass # end func
+
+# 八面体编码法线，返回每个法线两个short
+def encodeOctahedron(normals):
+    length = numpy.abs(normals).sum(axis = 1)
+    length[length == 0] = 1
+    p    = normals[:, 0:2] / length[:, numpy.newaxis]
+    sign = numpy.where(p >= 0, 1.0, -1.0)
+    # 下半球折叠到外侧
+    lower = normals[:, 2] < 0
+    p[lower] = (1 - numpy.abs(p[lower][:, ::-1])) * sign[lower]
+    return numpy.round(p * 32767).astype(numpy.int16)
+    pass # end func
+
+# 八面体解码法线
+def decodeOctahedron(data):
+    p = numpy.clip(data / 32767.0, -1, 1)
+    z = 1 - numpy.abs(p).sum(axis = 1)
+    sign  = numpy.where(p >= 0, 1.0, -1.0)
+    lower = z < 0
+    p[lower] = (1 - numpy.abs(p[lower][:, ::-1])) * sign[lower]
+    return normalizeVectors(numpy.column_stack([p, z]))
+    pass # end func
+
+# 权重量化为ubyte，舍入误差加到最大的权重上，保证每个顶点的权重和不变
+def encodeWeights(weights):
+    data  = numpy.round(weights * 255)
+    total = numpy.round(weights.sum(axis = 1) * 255)
+    index = weights.argmax(axis = 1)
+    data[numpy.arange(len(data)), index] += total - data.sum(axis = 1)
+    return numpy.clip(data, 0, 255).astype(numpy.uint8)
+    pass # end func
+
+# 顶点数据压缩，统计压缩比例以及最大误差
+class VertexQuantizer(object):
+    """docstring for VertexQuantizer"""
+    def __init__(self, bounds):
+        super(VertexQuantizer, self).__init__()
+        # 包围盒使用写入文件的float数据
+        self.lower      = numpy.array(bounds.min, numpy.float32).astype(numpy.float64)
+        self.upper      = numpy.array(bounds.max, numpy.float32).astype(numpy.float64)
+        self.rawSize    = 0     # 使用float时的大小
+        self.size       = 0     # 压缩之后的大小
+        self.maxError   = {"position" : 0.0, "uv" : 0.0, "normal" : 0.0, "weight" : 0.0}
+        pass # end func
+    
+    # 记录误差
+    def addError(self, name, error):
+        if len(error) > 0:
+            self.maxError[name] = max(self.maxError[name], float(error.max()))
+            pass
+        pass # end func
+    
+    # 写顶点属性:长度、格式、数据
+    def writeAttribute(self, data, values, format, dtype, params = None):
+        data.writeInt(len(values))
+        data.writeInt(format)
+        if params is not None:
+            data.writeFloats(params)
+            self.size += 4 * len(params)
+            pass
+        values = numpy.ascontiguousarray(values, dtype)
+        data.write(values.tostring())
+        self.size += 8 + values.nbytes
+        pass # end func
+    
+    # 写顶点、UV0、UV1、法线、权重、骨骼索引
+    def writeAttributes(self, data, attributes):
+        vertices, uvs0, uvs1, normals, weights, boneIndices = attributes
+        for attr in attributes:
+            self.rawSize += 4 + attr.size * 4
+            pass
+        # 顶点:相对于包围盒的ushort定点数
+        scale = numpy.where(self.upper > self.lower, self.upper - self.lower, 1)
+        fixed = numpy.clip(numpy.round((vertices - self.lower) / scale * 65535), 0, 65535)
+        self.writeAttribute(data, fixed, FORMAT_FIXED16, '<u2', numpy.concatenate([self.lower, self.upper]))
+        self.addError("position", numpy.abs(self.lower + fixed / 65535 * scale - vertices).max(axis = 1))
+        # UV:half float
+        for uvs in [uvs0, uvs1]:
+            half = uvs.astype('<f2')
+            self.writeAttribute(data, half, FORMAT_HALF, '<f2')
+            self.addError("uv", numpy.abs(half.astype(numpy.float64) - uvs).max(axis = 1))
+            pass
+        # 法线:八面体编码
+        octahedron = encodeOctahedron(normals)
+        self.writeAttribute(data, octahedron, FORMAT_OCT16, '<i2')
+        decoded = decodeOctahedron(octahedron.astype(numpy.float64))
+        cos = (decoded * normalizeVectors(normals.copy())).sum(axis = 1)
+        self.addError("normal", numpy.degrees(numpy.arccos(numpy.clip(cos, -1, 1)))[(normals != 0).any(axis = 1)])
+        # 权重:ubyte归一化
+        unorm = encodeWeights(weights) if len(weights) > 0 else weights
+        self.writeAttribute(data, unorm, FORMAT_UNORM8, '<u1')
+        self.addError("weight", numpy.abs(unorm / 255.0 - weights).max(axis = 1) if len(weights) > 0 else weights)
+        # 骨骼索引:ubyte，超过255时使用ushort
+        if len(boneIndices) > 0 and boneIndices.max() > 255:
+            self.writeAttribute(data, boneIndices, FORMAT_USHORT, '<u2')
+            pass
+        else:
+            self.writeAttribute(data, boneIndices, FORMAT_UBYTE, '<u1')
+            pass
+        pass # end func
+    
+    # 打印压缩比例以及最大误差
+    def printStats(self, name):
+        ratio = 100.0 * self.size / max(self.rawSize, 1)
+        print("\tquantize %s: %d -> %d bytes (%.1f%%), max error position:%f uv:%f normal:%f weight:%f" % (name, self.rawSize, self.size, ratio, self.maxError["position"], self.maxError["uv"], self.maxError["normal"], self.maxError["weight"]))
+        pass # end func
+    
+    pass # end class
+
+# 关键帧精简，统计精简比例以及最大误差
+class KeyframeReducer(object):
+    """docstring for KeyframeReducer"""
+    def __init__(self, quat):
+        super(KeyframeReducer, self).__init__()
+        self.errorFunc  = getQuatTrackError if quat else getMatrixTrackError
+        self.quat       = quat
+        self.frameNum   = 0             # 原始帧数
+        self.keyNum     = 0             # 关键帧数
+        self.maxError   = [0, 0, 0]     # 最大位移、旋转、缩放误差
+        pass # end func
+    
+    # 检测误差是否在允许范围内
+    def isAccepted(self, samples, approx):
+        t, r, s = self.errorFunc(samples, approx)
+        return (t <= config.tol_t).all() and (r <= config.tol_r).all() and (s <= config.tol_s).all()
+        pass # end func
+    
+    # 精简一条轨迹，samples为每帧一行。返回关键帧序号
+    def reduce(self, samples):
+        samples = numpy.array(samples, numpy.float64)
+        count   = len(samples)
+        if count == 0:
+            return [], samples
+        # 四元数保持在同一半球，保证插值走最短路径。相邻两帧点积为负时翻转，翻转次数累积
+        if self.quat and count > 1:
+            dots  = (samples[1:, 4:8] * samples[:-1, 4:8]).sum(axis = 1)
+            signs = numpy.cumprod(numpy.where(dots < 0, -1.0, 1.0))
+            samples[1:, 4:8] *= signs[:, numpy.newaxis]
+            pass
+        # 常量轨迹只保留一个关键帧
+        if self.isAccepted(samples, numpy.repeat(samples[0:1], count, axis = 0)):
+            keys = [0]
+            pass
+        else:
+            # 从上一个关键帧开始向后延伸到最远的可以插值的帧
+            keys  = [0]
+            start = 0
+            while start < count - 1:
+                start = self.findSegmentEnd(samples, start)
+                keys.append(start)
+                pass
+            pass
+        # 统计误差，使用写入文件的float数据还原
+        values = samples[keys].astype(numpy.float32).astype(numpy.float64)
+        frames = numpy.arange(count)
+        approx = numpy.empty_like(samples)
+        for i in range(samples.shape[1]):
+            approx[:, i] = numpy.interp(frames, keys, values[:, i])
+            pass
+        errors = self.errorFunc(samples, approx)
+        for i in range(3):
+            self.maxError[i] = max(self.maxError[i], float(errors[i].max()))
+            pass
+        self.frameNum += count
+        self.keyNum   += len(keys)
+        return keys, samples[keys]
+        pass # end func
+    
+    # 检测start到end之间的帧是否可以通过两端插值得到
+    def isSegmentAccepted(self, samples, start, end):
+        ratio  = (numpy.arange(start + 1, end) - start) / float(end - start)
+        approx = samples[start] + (samples[end] - samples[start]) * ratio[:, numpy.newaxis]
+        return self.isAccepted(samples[start + 1 : end], approx)
+        pass # end func
+    
+    # 从start开始可以插值的最远的帧。先按照1、2、4、8...倍的长度向后延伸，找到无法插值的长度之后二分查找，
+    # 每个关键帧只需要O(log n)次检测
+    def findSegmentEnd(self, samples, start):
+        last = len(samples) - 1
+        good = start + 1
+        bad  = None
+        size = 2
+        while bad is None and good < last:
+            end = min(start + size, last)
+            if self.isSegmentAccepted(samples, start, end):
+                good = end
+                pass
+            else:
+                bad = end
+                pass
+            size *= 2
+            pass
+        if bad is None:
+            return good
+        while bad - good > 1:
+            mid = (good + bad) // 2
+            if self.isSegmentAccepted(samples, start, mid):
+                good = mid
+                pass
+            else:
+                bad = mid
+                pass
+            pass
+        return good
+        pass # end func
+    
+    # 写一条关键帧轨迹:关键帧数量、关键帧序号、关键帧数据
+    def writeTrack(self, data, samples):
+        keys, values = self.reduce(samples)
+        writeKeyframes(data, keys, values)
+        pass # end func
+    
+    # 打印精简比例以及最大误差
+    def printStats(self, name):
+        ratio = 100.0 * self.keyNum / max(self.frameNum, 1)
+        print("\treduce %s: %d -> %d keys (%.1f%%), max error t:%f r:%f s:%f" % (name, self.frameNum, self.keyNum, ratio, self.maxError[0], self.maxError[1], self.maxError[2]))
+        pass # end func
+    
+    pass # end class
+
+# 二进制数据，小头。按块写入，最后一次性拼接，避免反复拼接bytes
+class ByteArray(object):
+    """docstring for ByteArray"""
+    def __init__(self):
+        super(ByteArray, self).__init__()
+        self.chunks = []
+        pass # end func
+    
+    # 写入一块数据
+    def write(self, chunk):
+        self.chunks.append(chunk)
+        pass # end func
+    
+    # 写int
+    def writeInt(self, value):
+        self.write(struct.pack('<i', value))
+        pass # end func
+    
+    # 写float
+    def writeFloat(self, value):
+        self.write(struct.pack('<f', value))
+        pass # end func
+    
+    # 写字符串
+    def writeUTFBytes(self, value):
+        self.write(str(value))
+        pass # end func
+    
+    # 写float数组，整块转换为连续的小头float
+    def writeFloats(self, values):
+        self.write(numpy.ascontiguousarray(values, '<f4').tostring())
+        pass # end func
+    
+    # 按照指定类型写数组
+    def writeArray(self, values, dtype):
+        self.write(numpy.ascontiguousarray(values, dtype).tostring())
+        pass # end func
+    
+    # 写ushort数组
+    def writeUShorts(self, values):
+        values = numpy.asarray(values)
+        if len(values) > 0 and (values.min() < 0 or values.max() > 0xffff):
+            raise ValueError("ushort out of range: %d..%d" % (values.min(), values.max()))
+        self.write(numpy.ascontiguousarray(values, '<u2').tostring())
+        pass # end func
+    
+    # 写向量数组:数量 + 数据
+    def writeVectors(self, values, width):
+        values = numpy.asarray(values, numpy.float64).reshape(-1, width)
+        self.writeInt(len(values))
+        self.writeFloats(values)
+        pass # end func
+    
+    # 获取数据
+    def getBytes(self):
+        return b''.join(self.chunks)
+        pass # end func
+    
+    pass # end class
+
+# 压缩文件，写入的数据块直接经过zlib压缩写入临时文件，完成后重命名为目标文件
+class CompressedFile(ByteArray):
+    """docstring for CompressedFile"""
+    # 所有文件的统计
+    totalRawSize    = 0
+    totalSize       = 0
+    totalTime       = 0
+    fileNames       = []
+    # 当前写入的Pack文件，为None时每个文件单独输出
+    pack            = None
+    
+    def __init__(self, fileName):
+        super(CompressedFile, self).__init__()
+        self.fileName   = fileName
+        self.rawSize    = 0     # 压缩前大小
+        self.size       = 0     # 压缩后大小
+        self.time       = 0     # 压缩耗时
+        self.pack       = CompressedFile.pack
+        if self.pack:
+            # 直接追加到Pack文件
+            self.tempName = None
+            self.file     = self.pack.beginEntry()
+            pass
+        else:
+            self.tempName = "%s.%d.tmp" % (fileName, os.getpid())
+            self.file     = open(self.tempName, "wb")
+            pass
+        self.compressor = zlib.compressobj(config.level, zlib.DEFLATED, zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL, COMPRESS_STRATEGIES[config.strategy])
+        pass # end func
+    
+    # 压缩并写入一块数据
+    def write(self, chunk):
+        start = time.time()
+        data  = self.compressor.compress(chunk)
+        self.time    += time.time() - start
+        self.rawSize += len(chunk)
+        self.size    += len(data)
+        self.file.write(data)
+        pass # end func
+    
+    # 结束压缩，重命名为目标文件
+    def close(self):
+        start = time.time()
+        data  = self.compressor.flush()
+        self.time += time.time() - start
+        self.size += len(data)
+        self.file.write(data)
+        CompressedFile.totalRawSize += self.rawSize
+        CompressedFile.totalSize    += self.size
+        CompressedFile.totalTime    += self.time
+        if self.pack:
+            self.pack.endEntry(self.fileName, self.rawSize, PACK_CODEC_ZLIB)
+            print("\twrite %s in %s: %d -> %d bytes, %.3fs" % (os.path.basename(self.fileName), self.pack.fileName, self.rawSize, self.size, self.time))
+            return
+        self.file.close()
+        replaceFile(self.tempName, self.fileName)
+        CompressedFile.fileNames.append(self.fileName)
+        print("\twrite %s: %d -> %d bytes, %.3fs" % (self.fileName, self.rawSize, self.size, self.time))
+        pass # end func
+    
+    # 出错时删除临时文件
+    def abort(self):
+        if self.pack:
+            self.pack.abortEntry()
+            return
+        self.file.close()
+        os.remove(self.tempName)
+        pass # end func
+    
+    def __enter__(self):
+        return self
+        pass # end func
+    
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.close()
+            pass
+        else:
+            self.abort()
+            pass
+        return False
+        pass # end func
+    
+    pass # end class
+
+# 打包文件，每个Fbx一个，数据块依次写入临时文件，最后写入目录并重命名
+class PackFile(object):
+    """docstring for PackFile"""
+    HEADER_SIZE = 16
+
+    def __init__(self, fileName):
+        super(PackFile, self).__init__()
+        self.fileName   = fileName
+        self.entries    = []    # (类型, 名称, 位置, 长度, 解压长度, 压缩方式)
+        self.start      = 0     # 当前数据块的位置
+        self.tempName   = "%s.%d.tmp" % (fileName, os.getpid())
+        self.file       = open(self.tempName, "wb")
+        self.file.write("\0" * self.HEADER_SIZE)
+        pass # end func
+    
+    # 开始写入一个数据块，返回写入的文件
+    def beginEntry(self):
+        self.start = self.file.tell()
+        return self.file
+        pass # end func
+    
+    # 数据块写入完成，记录到目录
+    def endEntry(self, fileName, rawLength, codec):
+        entryType = PACK_ENTRY_TYPES.index(os.path.splitext(fileName)[1])
+        self.entries.append((entryType, os.path.basename(fileName), self.start, self.file.tell() - self.start, rawLength, codec))
+        pass # end func
+    
+    # 数据块写入失败，丢弃已写入的数据
+    def abortEntry(self):
+        self.file.seek(self.start)
+        self.file.truncate()
+        pass # end func
+    
+    # 写入目录以及文件头，重命名为目标文件
+    def close(self):
+        data   = ByteArray()
+        offset = self.file.tell()
+        for entryType, name, start, length, rawLength, codec in self.entries:
+            data.writeInt(entryType)
+            data.writeInt(len(name))
+            data.writeUTFBytes(name)
+            data.writeInt(start)
+            data.writeInt(length)
+            data.writeInt(rawLength)
+            data.writeInt(codec)
+            pass
+        self.file.write(data.getBytes())
+        self.file.seek(0)
+        self.file.write(PACK_MAGIC + struct.pack("<iii", PACK_VERSION, len(self.entries), offset))
+        self.file.seek(0, os.SEEK_END)
+        size = self.file.tell()
+        self.file.close()
+        replaceFile(self.tempName, self.fileName)
+        CompressedFile.fileNames.append(self.fileName)
+        print("\twrite %s: %d entries, %d bytes" % (self.fileName, len(self.entries), size))
+        pass # end func
+    
+    # 出错时删除临时文件
+    def abort(self):
+        self.file.close()
+        os.remove(self.tempName)
+        pass # end func
+    
+    def __enter__(self):
+        CompressedFile.pack = self
+        return self
+        pass # end func
+    
+    def __exit__(self, excType, excValue, traceback):
+        CompressedFile.pack = None
+        if excType is None:
+            self.close()
+            pass
+        else:
+            self.abort()
+            pass
+        return False
+        pass # end func
+    
+    pass # end class
+
+# 重命名临时文件为目标文件，windows下rename不能覆盖已存在的文件
+def replaceFile(tempName, fileName):
+    if sys.platform == 'win32' and os.path.exists(fileName):
+        os.remove(fileName)
+        pass
+    os.rename(tempName, fileName)
+    pass # end func
+
+# Pack文件名称:fbx目录 + fbx名称 + .pack
+def getPackFileName(fbxfile):
+    return os.path.splitext(fbxfile)[0] + PACK_TYPE
+    pass # end func
+
+# 获取输出文件名称:fbx目录 + fbx名称_名称 + 类型
+def getOutputFileName(fbxFilePath, name, fileType):
+    tokens  = re.compile("[\\\/]").split(fbxFilePath)
+    fbxName = tokens[-1]
+    fbxName = fbxName.split(".")[0:-1]
+    fbxName = ".".join(fbxName)
+    fbxDir  = parseFilepath(fbxFilePath)
+    return fbxDir + fbxName + "_" + name + fileType
     pass # end func
 
 # 打印矩阵
@@ -282,6 +1439,229 @@ def parseFilepath(fbxfile):
     return filepath
     pass # end func
 
+# 场景级别的节点全局矩阵缓存，场景中所有Mesh以及相机共享。
+# 多个骨骼Mesh共享的骨骼在解析之前由prefetch按帧为外层循环一次性计算所有帧，保存为矩阵块，
+# 之后每个Mesh直接从矩阵块中取出，每一帧的共享骨骼矩阵只计算一次，与Mesh的解析顺序以及数量无关。
+# 其它节点以(节点, 帧)为键按需缓存，超过内存上限之后不再缓存新的矩阵，改为只保留当前帧的矩阵逐帧计算
+class TransformCache(object):
+    """docstring for TransformCache"""
+    ENTRY_SIZE = 512                                # 每个缓存矩阵估算占用的字节数
+
+    def __init__(self, maxSize):
+        super(TransformCache, self).__init__()
+        self.maxEntries = maxSize / self.ENTRY_SIZE # 缓存矩阵上限
+        self.matrices   = {}                        # (节点ID, 帧) -> 全局矩阵
+        self.frameTime  = None                      # 超过上限之后当前帧的时间
+        self.frame      = {}                        # 超过上限之后当前帧的矩阵
+        self.hits       = 0                         # 命中次数
+        self.misses     = 0                         # 未命中次数
+        self.streamed   = 0                         # 超过上限之后逐帧计算的帧数
+        self.block      = None                      # prefetch的共享骨骼矩阵块，帧数*骨骼数*4*4
+        self.columns    = {}                        # 节点ID -> 矩阵块中的列
+        self.avoided    = 0                         # 直接读取曲线关键帧省略的矩阵计算次数(-keys)
+        pass # end func
+
+    # 获取节点的全局矩阵，time为None时为默认姿势。返回的矩阵为共享的，调用者不能修改
+    def getGlobalTransform(self, node, time = None):
+        ticks  = None if time is None else time.Get()
+        key    = (node.GetUniqueID(), ticks)
+        matrix = self.matrices.get(key)
+        if matrix is None and ticks == self.frameTime:
+            matrix = self.frame.get(key)
+            pass
+        if matrix is not None:
+            self.hits += 1
+            return matrix
+        self.misses += 1
+        if time is None:
+            matrix = FbxAMatrix(node.EvaluateGlobalTransform())
+            pass
+        else:
+            matrix = FbxAMatrix(node.EvaluateGlobalTransform(time))
+            pass
+        if len(self.matrices) < self.maxEntries:
+            self.matrices[key] = matrix
+            pass
+        else:
+            # 超过上限，只保留当前帧
+            if ticks != self.frameTime:
+                self.frameTime = ticks
+                self.frame     = {}
+                self.streamed += 1
+                pass
+            self.frame[key] = matrix
+            pass
+        return matrix
+        pass # end func
+
+    # 按帧为外层循环计算nodes所有帧的全局矩阵，保存为矩阵块。按照共享次数从多到少，只取内存上限放得下的节点
+    def prefetch(self, scene, nodes):
+        times    = getFrameTimes(scene)
+        frameNum = len(times)
+        count    = min(len(nodes), int(self.maxEntries * self.ENTRY_SIZE // max(frameNum * 16 * 8, 1)))
+        if count == 0:
+            return
+        nodes = nodes[0 : count]
+        self.block   = getMatrixBlock((FbxAMatrix(node.EvaluateGlobalTransform(time)) for time in times for node in nodes), (frameNum, count))
+        self.misses += frameNum * count
+        self.columns = dict([(node.GetUniqueID(), i) for i, node in enumerate(nodes)])
+        self.maxEntries -= self.block.nbytes // self.ENTRY_SIZE
+        print("transform cache: prefetched %d frames of %d shared joints" % (frameNum, count))
+        pass # end func
+
+    # 获取prefetch矩阵块中节点的列，没有时返回None
+    def getColumn(self, node):
+        return self.columns.get(node.GetUniqueID())
+        pass # end func
+
+    # 打印命中统计
+    def printStats(self):
+        total = max(self.hits + self.misses, 1)
+        print("transform cache: hits:%d misses:%d (%.1f%%) cached:%d prefetched joints:%d streamed frames:%d curve keys avoided:%d" % (self.hits, self.misses, 100.0 * self.hits / total, len(self.matrices), len(self.columns), self.streamed, self.avoided))
+        pass # end func
+
+    pass # end class
+
+# 进程内存峰值，KB。没有resource模块(windows)时返回0
+def getPeakMemory():
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Mac下单位为字节
+    if sys.platform == "darwin":
+        peak /= 1024
+        pass
+    return peak
+    pass # end func
+
+# 进程当前内存，KB。只有linux可以读取，其它平台使用峰值
+def getCurrentMemory():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024
+        pass
+    except (IOError, OSError, ValueError):
+        return getPeakMemory()
+    pass # end func
+
+# 进程内存超过-max_memory_mb
+class MemoryLimitError(Exception):
+    """docstring for MemoryLimitError"""
+    pass # end class
+
+# 检查进程内存是否超过-max_memory_mb，超过时抛出MemoryLimitError
+def checkMemory(name):
+    if config.max_memory_mb <= 0:
+        return
+    memory = getCurrentMemory()
+    if memory > config.max_memory_mb * 1024:
+        raise MemoryLimitError("memory %dMB exceeds -max_memory_mb %d after %s" % (memory / 1024, config.max_memory_mb, name))
+    pass # end func
+
+# 进程CPU时间，用户态 + 内核态
+def getCpuTime():
+    times = os.times()
+    return times[0] + times[1]
+    pass # end func
+
+# 记录每个Mesh、相机每个阶段的耗时、CPU时间以及内存峰值增长(-profile)，以及cProfile(-cprofile)。
+# 每个Fbx文件一个，结束时保存报告
+class StageProfiler(object):
+    """docstring for StageProfiler"""
+    # 当前Fbx文件的记录，未开启-profile时为None
+    current = None
+    # 报告的列
+    FIELDS  = ["file", "type", "name", "stage", "calls", "wall", "cpu", "peakMemoryKB"]
+
+    def __init__(self, fbxfile):
+        super(StageProfiler, self).__init__()
+        self.fbxfile = fbxfile
+        self.records = []       # 按照第一次调用的顺序
+        self.index   = {}       # (类型, 名称, 阶段) -> 记录
+        self.profile = None     # cProfile
+        pass # end func
+
+    # 执行一个阶段并记录
+    def run(self, objectType, name, stage, func, args):
+        peak   = getPeakMemory()
+        wall   = time.time()
+        cpu    = getCpuTime()
+        result = func(*args)
+        self.record(objectType, name, stage, time.time() - wall, getCpuTime() - cpu, getPeakMemory() - peak)
+        return result
+        pass # end func
+
+    # 累加一个阶段的记录
+    def record(self, objectType, name, stage, wall, cpu, peakMemory):
+        key    = (objectType, name, stage)
+        record = self.index.get(key)
+        if record is None:
+            record = {"file" : self.fbxfile, "type" : objectType, "name" : name, "stage" : stage, "calls" : 0, "wall" : 0.0, "cpu" : 0.0, "peakMemoryKB" : 0}
+            self.index[key] = record
+            self.records.append(record)
+            pass
+        record["calls"] += 1
+        record["wall"]  += wall
+        record["cpu"]   += cpu
+        record["peakMemoryKB"] = max(record["peakMemoryKB"], peakMemory)
+        pass # end func
+
+    # 保存json以及csv报告
+    def save(self):
+        baseName = os.path.splitext(self.fbxfile)[0]
+        with open(baseName + ".profile.json", "w") as f:
+            json.dump(self.records, f, indent = 4, sort_keys = True)
+            pass
+        with open(baseName + ".profile.csv", "wb") as f:
+            writer = csv.DictWriter(f, self.FIELDS)
+            writer.writeheader()
+            writer.writerows(self.records)
+            pass
+        print("write profile %s.profile.json/csv: %d stages" % (baseName, len(self.records)))
+        pass # end func
+
+    def __enter__(self):
+        if config.profile:
+            StageProfiler.current = self
+            pass
+        if config.cprofile:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+            pass
+        return self
+        pass # end func
+
+    # 出错时同样保存已经记录的数据
+    def __exit__(self, excType, excValue, traceback):
+        if self.profile:
+            self.profile.disable()
+            self.profile.dump_stats(os.path.splitext(self.fbxfile)[0] + ".prof")
+            pass
+        if StageProfiler.current is self:
+            StageProfiler.current = None
+            self.save()
+            pass
+        return False
+        pass # end func
+
+    pass # end class
+
+# 替换类的阶段方法，开启-profile时按照对象名称记录。阶段内部调用的其它阶段同样会被记录，耗时包含内部阶段
+def profileStages(cls, objectType, stages):
+    for stage in stages:
+        profileStage(cls, objectType, stage)
+        pass
+    pass # end func
+
+def profileStage(cls, objectType, stage):
+    func = getattr(cls, stage)
+    def run(obj, *args):
+        if StageProfiler.current is None:
+            return func(obj, *args)
+        return StageProfiler.current.run(objectType, obj.name, stage, func, (obj,) + args)
+    setattr(cls, stage, run)
+    pass # end func
+
 # 相机
 class Camera3D(object):
     """docstring for Camera3D"""
@@ -297,8 +1677,8 @@ class Camera3D(object):
         self.aspectWidth        = 0
         self.aspectHeight       = 0
         self.anim               = []    # 动画
+        self.animKeys           = None  # 曲线关键帧所在的帧序号，-keys时使用
         self.fileName           = None  # 相机文件路径
-        self.bytes              = None  # 相机数据
         pass # end func
     
     # 解析相机属性
@@ -319,85 +1699,65 @@ class Camera3D(object):
     
     # 解析相机动画
     def parseCameraAnim(self):
-        # 获取stack
-        stack = self.scene.GetSrcObject(FbxAnimStack.ClassId, 0)
-        self.scene.SetCurrentAnimationStack(stack)
-        # 获取时间
-        timeSpan  = stack.GetLocalTimeSpan()
-        time      = timeSpan.GetStart()
-        # frameTime
-        frameTime = FbxTime()
-        frameTime.SetTime(0, 0, 0, 1, 0, self.scene.GetGlobalSettings().GetTimeMode())
-        # 解析每一帧动画
-        while time <= timeSpan.GetStop():
-            animMt = AXIS_FLIP_X * self.fbxCamera.GetNode().EvaluateGlobalTransform(time) * self.invAxisTransform
-            matrix = Matrix3D(animMt)
-            clip   = []
-            # 丢弃最后一列数据
-            for i in range(3):
-                raw = matrix.getRaw(i)
-                for j in range(len(raw)):
-                    clip.append(raw[j])
-                    pass
-                pass # end for
-            self.anim.append(clip)
-            time += frameTime
+        if config.keys:
+            # 只计算曲线关键帧需要的帧
+            frameNum, self.animKeys, block = sampleCurveKeys(self.scene, self.fbxCamera.GetNode(), self.transformCache)
+            pass
+        else:
+            # 采样每一帧相机的global transform
+            block  = sampleGlobalTransforms(self.scene, [self.fbxCamera.GetNode()], self.transformCache)[:, 0]
+            pass
+        # axis * global * invAxis，丢弃最后一行数据
+        left   = getMatrixArray(AXIS_FLIP_X)
+        right  = getMatrixArray(self.invAxisTransform)
+        self.anim = getMatrix34Block(numpy.matmul(numpy.matmul(left, block), right))
+        # 展开为每一帧
+        if self.animKeys is not None:
+            self.anim = expandKeyframes(self.animKeys, self.anim, frameNum)
             pass
         
         pass # end func
     
     # 生成相机数据
-    def generateBytes(self):
-        # 生成Mesh对应的文件名称
-        tokens  = re.compile("[\\\/]").split(self.fbxFilePath)
-        fbxName = tokens[-1]
-        fbxName = fbxName.split(".")[0:-1]
-        fbxName = ".".join(fbxName)
-        fbxDir  = parseFilepath(self.fbxFilePath)
-        self.fileName = fbxDir + fbxName + "_" + self.name + CAMERA_TYPE
-        # 数据
-        self.bytes = b''
+    def generateBytes(self, data):
         size = len(str(self.name))
-        self.bytes += struct.pack('<i', size)                   # 名称长度
-        self.bytes += str(self.name)                            # 名称
-        self.bytes += struct.pack('<f', self.aspectWidth)       # 宽度
-        self.bytes += struct.pack('<f', self.aspectHeight)      # 高度
-        self.bytes += struct.pack('<f', self.near)              # near
-        self.bytes += struct.pack('<f', self.far)               # far
-        self.bytes += struct.pack('<f', self.fieldOfView)       # fieldOfView
+        data.writeInt(size)                         # 名称长度
+        data.writeUTFBytes(self.name)               # 名称
+        data.writeFloat(self.aspectWidth)           # 宽度
+        data.writeFloat(self.aspectHeight)          # 高度
+        data.writeFloat(self.near)                  # near
+        data.writeFloat(self.far)                   # far
+        data.writeFloat(self.fieldOfView)           # fieldOfView
         # 保存相机当前位置
         animMt = AXIS_FLIP_X * self.fbxCamera.GetNode().EvaluateGlobalTransform() * self.invAxisTransform
-        matrix = Matrix3D(animMt)
-        # 丢弃最后一列数据
-        for i in range(3):
-            raw = matrix.getRaw(i)
-            for j in range(len(raw)):
-                self.bytes += struct.pack('<f', raw[j])
-                pass
+        data.writeFloats(getMatrix3DArray(animMt))
+        # 保存相机动画，没有动画时与原格式相同
+        keyed = len(self.anim) > 0 and (config.reduce or self.animKeys is not None) and isKeyframeSupported(self.name, len(self.anim))
+        if keyed and config.reduce:
+            reducer = KeyframeReducer(False)
+            data.writeInt(-len(self.anim))          # 动画长度，负数为关键帧动画
+            reducer.writeTrack(data, numpy.asarray(self.anim, numpy.float64).reshape(-1, 12))
+            reducer.printStats(self.name)
+            pass
+        elif keyed:
+            data.writeInt(-len(self.anim))          # 动画长度，负数为关键帧动画
+            writeKeyframes(data, self.animKeys, self.anim[self.animKeys])
+            pass
+        else:
+            data.writeInt(len(self.anim))           # 动画长度
+            data.writeFloats(self.anim)             # 动画数据
             pass
-        # 保存相机动画
-        size = len(self.anim)
-        self.bytes += struct.pack('<i', size)                    # 动画长度
-        # 写动画数据
-        for i in range(size):
-            clip = self.anim[i]
-            for j in range(len(clip)):
-                self.bytes += struct.pack('<f', clip[j])
-                pass
-            pass # end func
-        
-        # 压缩数据
-        self.bytes = zlib.compress(self.bytes, 9)
         
         pass # end func
     
     # 通过FBXCamera初始化相机
-    def initWithFbxCamera(self, fbxCamera, sdkManager, scene, filepath):
+    def initWithFbxCamera(self, fbxCamera, sdkManager, scene, filepath, transformCache):
         print("parse camera...")
         self.fbxCamera   = fbxCamera
         self.sdkManager  = sdkManager
         self.scene       = scene
         self.fbxFilePath = filepath
+        self.transformCache = transformCache
         # axis
         self.axisTransform    = AXIS_FLIP_X
         self.invAxisTransform = FbxAMatrix(self.axisTransform)
@@ -411,17 +1771,36 @@ class Camera3D(object):
         if config.anim:
             self.parseCameraAnim()
             pass
-        # 生成数据
-        self.generateBytes()
-        # 写相机文件
-        open(self.fileName, 'w+b').write(self.bytes)
+        # 生成相机文件名称
+        self.fileName = getOutputFileName(self.fbxFilePath, self.name, CAMERA_TYPE)
+        # 生成数据并写相机文件
+        self.writeCamera()
         
         pass # end func
+    
+    # 写相机文件
+    def writeCamera(self):
+        with CompressedFile(self.fileName) as data:
+            self.generateBytes(data)
+            pass
+        pass # end func
+    
+    # 写完文件之后释放动画数据以及Fbx对象的引用
+    def release(self):
+        self.fbxCamera      = None
+        self.scene          = None
+        self.sdkManager     = None
+        self.transformCache = None
+        self.anim           = []
+        self.animKeys       = None
+        pass # end func
 
     pass # end class
 
 # 骨骼节点
 class SkeletonJoint(object):
+    """docstring for SkeletonJoint"""
+    __slots__ = ("node", "name", "index", "parentIndex", "cluster", "linkTransform", "invLinkTransform", "bindTransform")
     
     def __init__(self):
         super(SkeletonJoint, self).__init__()
@@ -431,6 +1810,8 @@ class SkeletonJoint(object):
         self.parentIndex    = -1            # 父级骨骼索引
         self.cluster        = None          # 骨骼
         self.linkTransform  = None          # link Transform
+        self.invLinkTransform = None        # link Transform的逆矩阵
+        self.bindTransform  = None          # bind Transform * geometry Transform
         pass # end func
     
     # 通过cluster初始化
@@ -440,6 +1821,18 @@ class SkeletonJoint(object):
         self.cluster = cluster
         pass # end func
     
+    # 计算与时间无关的bind矩阵，每一帧只需要计算骨骼的global transform
+    def parseBindTransform(self, geometryTransform):
+        # 获取bindtransform
+        self.bindTransform = FbxAMatrix()
+        self.cluster.GetTransformMatrix(self.bindTransform)
+        self.bindTransform *= geometryTransform
+        # 骨骼global初始矩阵
+        self.linkTransform = FbxAMatrix()
+        self.cluster.GetTransformLinkMatrix(self.linkTransform)
+        self.invLinkTransform = self.linkTransform.Inverse()
+        pass # end func
+    
     pass # end class
 
 # 场景
@@ -454,42 +1847,109 @@ class Scene3D(object):
     
     pass # end class
 
+# Mesh的顶点属性，读写columns中对应的列
+def columnProperty(name):
+    return property(lambda self: self.getColumn(name), lambda self, value: self.columns.__setitem__(name, value))
+    pass # end func
+
 # 模型
 class Mesh(object):
     """docstring for Mesh"""
+    __slots__ = ("fbxMesh", "sdkManager", "scene", "transformCache", "fbxFilePath", "name", "skeleton",
+                 "geometryTransform", "invGeometryTrans", "axisTransform", "invAxisTransform",
+                 "columns", "source", "corners", "bounds", "anims", "animKeys", "animBounds", "verticesIndices", "uvIndices",
+                 "joints", "skinOffsets", "skinJoints", "skinWeights",
+                 "meshFileName", "animFileName", "geometries", "weldIndices")
+    
+    # 三角形顶点属性，每个三角形顶点一行
+    vertices    = columnProperty("vertices")        # 顶点
+    uvs0        = columnProperty("uvs0")            # UV0
+    uvs1        = columnProperty("uvs1")            # UV1,可能为烘焙贴图UV
+    normals     = columnProperty("normals")         # 法线
+    weights     = columnProperty("weights")         # 权重
+    boneIndices = columnProperty("boneIndices")     # 骨骼索引
+    
     def __init__(self):
         super(Mesh, self).__init__()
         self.fbxMesh            = None          # FbxMesh
         self.sdkManager         = None          # FbxSdk
         self.scene              = None          # FbxScene
+        self.transformCache     = None          # 场景共享的global transform缓存
         self.fbxFilePath        = None          # Fbx文件路径
         self.name               = None          # 模型名称
         self.skeleton           = False         # 是否为骨骼模型
         self.geometryTransform  = None          # geometry矩阵
+        self.invGeometryTrans   = None          # geometry逆矩阵
         self.axisTransform      = None          # 坐标系矩阵
         self.invAxisTransform   = None          # 坐标系逆矩阵
-        self.vertices           = []            # 顶点
-        self.uvs0               = []            # UV0
-        self.uvs1               = []            # UV1,可能为烘焙贴图UV
-        self.normals            = []            # 法线
-        self.weightsAndIndices  = []            # 权重以及索引
+        self.columns            = dict((name, numpy.zeros((0, width), dtype)) for name, width, dtype in VERTEX_COLUMNS) # 顶点属性列
+        self.source             = None          # SubMesh:原始Mesh的顶点属性列，通过corners取出数据
+        self.corners            = None          # SubMesh:在原始Mesh中的三角形顶点位置，slice或者索引数组
         self.bounds             = LObject()     # 包围盒
-        self.anims              = []            # 动画|如果为骨骼模型，那么保存骨骼数据，否则就保存帧Transform数据
-        self.verticesIndices    = []            # 顶点索引
-        self.uvIndices          = []            # uv索引
+        self.anims              = []            # 动画|如果为骨骼模型，那么保存帧数*骨骼数*4*4矩阵块，否则就保存帧数*12的帧Transform数据
+        self.animKeys           = None          # 帧动画曲线关键帧所在的帧序号，-keys时使用
+        self.animBounds         = None          # 每一帧的包围盒以及包围球，帧数*10，-bounds时计算
+        self.verticesIndices    = []            # 顶点索引，每个三角形顶点一个
+        self.uvIndices          = []            # uv索引，每个三角形顶点一个，解析UV时生成
         self.joints             = []            # 骨骼列表
-        self.skeletonIndices    = {}            # 顶点索引，骨骼对应的顶点索引。
-        self.skeletonWeights    = {}            # 骨骼权重，骨骼对应的顶点权重。
-        self.meshBytes          = None          # Mesh数据
-        self.animBytes          = None          # 动作数据
+        self.skinOffsets        = None          # 蒙皮:每个控制点的权重在skinJoints、skinWeights中的起止位置，控制点数+1
+        self.skinJoints         = None          # 蒙皮:按控制点分组的骨骼索引，组内按权重从大到小
+        self.skinWeights        = None          # 蒙皮:按控制点分组的权重
         self.meshFileName       = None          # Mesh文件名
         self.animFileName       = None          # Anim文件名
         self.bounds.min         = [0, 0, 0]     # min
         self.bounds.max         = [0, 0, 0]     # max
         self.geometries         = []            # sub geometry
+        self.weldIndices        = None          # 焊接之后每个顶点的索引
         
         pass #end func
     
+    # 获取顶点属性列。SubMesh没有自己的列时从原始Mesh取出，slice为视图，索引数组为拷贝
+    def getColumn(self, name):
+        if self.source is None or name in self.columns:
+            return self.columns[name]
+        data = self.source[name]
+        if len(data) == 0:
+            return data
+        return data[self.corners]
+        pass # end func
+    
+    # 三角形顶点数
+    def getCornerCount(self):
+        if self.source is None:
+            return len(self.columns["vertices"])
+        return len(numpy.arange(len(self.source["vertices"]))[self.corners])
+        pass # end func
+    
+    # 创建SubMesh，只保存三角形顶点在原始Mesh中的位置，写文件时才取出数据
+    def createSubMesh(self, name, corners):
+        subMesh = Mesh()
+        subMesh.name                = name
+        # 拷贝属性
+        subMesh.fbxMesh             = self.fbxMesh
+        subMesh.sdkManager          = self.sdkManager
+        subMesh.scene               = self.scene
+        subMesh.fbxFilePath         = self.fbxFilePath
+        subMesh.skeleton            = self.skeleton
+        subMesh.geometryTransform   = self.geometryTransform
+        subMesh.axisTransform       = self.axisTransform
+        subMesh.invAxisTransform    = self.invAxisTransform
+        # 顶点属性指向原始Mesh，SubMesh的SubMesh换算为原始Mesh中的位置
+        if self.source is None:
+            subMesh.source  = self.columns
+            subMesh.corners = corners
+            subMesh.columns = {}
+            pass
+        else:
+            subMesh.source  = self.source
+            subMesh.corners = numpy.arange(len(self.source["vertices"]))[self.corners][corners]
+            subMesh.columns = dict((name, data[corners] if len(data) > 0 else data) for name, data in self.columns.items())
+            pass
+        # 包围盒
+        subMesh.bounds.min, subMesh.bounds.max = getPointsBounds(subMesh.vertices)
+        return subMesh
+        pass # end func
+    
     # 解析矩阵
     def parseTransform(self):
         print("\tparse transform...")
@@ -501,9 +1961,11 @@ class Mesh(object):
         localTransform = self.fbxMesh.GetNode().EvaluateLocalTransform()
         globalTransform= self.fbxMesh.GetNode().EvaluateGlobalTransform()
         
-        printFBXAMatrix("\tGeomtryMatrix:", self.geometryTransform)
-        printFBXAMatrix("\tLocal  Matrix:", localTransform)
-        printFBXAMatrix("\tGlobal Matrix:", globalTransform)
+        if not config.quiet:
+            printFBXAMatrix("\tGeomtryMatrix:", self.geometryTransform)
+            printFBXAMatrix("\tLocal  Matrix:", localTransform)
+            printFBXAMatrix("\tGlobal Matrix:", globalTransform)
+            pass
         
         self.axisTransform    = AXIS_FLIP_L * self.geometryTransform
         self.invAxisTransform = FbxAMatrix(self.axisTransform)
@@ -511,89 +1973,51 @@ class Mesh(object):
         
         pass # end func
     
-    # 解析索引
+    # 解析索引，一次性取出所有三角形顶点的顶点索引以及uv索引。顶点、UV、法线以及权重都只通过这两个数组组织数据
     def parseIndices(self):
         print("\tparse indices...")
         count = self.fbxMesh.GetPolygonCount()
         print("\ttriangle num:%d" % (count))
-        for i in range(count):
-            for j in range(3):
-                # 顶点索引
-                vertIdx = self.fbxMesh.GetPolygonVertex(i, j)
-                self.verticesIndices.append(vertIdx)
-                # uv索引
-                uvIdx = self.fbxMesh.GetTextureUVIndex(i, j)
-                self.uvIndices.append(uvIdx)
-                pass # end for
-            pass # end for
+        # 顶点索引
+        self.verticesIndices = getPolygonVerticesArray(self.fbxMesh)[0 : count * 3]
         pass # end func
     
-    # 解析包围盒，骨骼动画不会解析每一帧包围盒
+    # 解析包围盒，每一帧的包围盒在解析动画之后计算
     def parseBounds(self):
-        count = len(self.vertices)
-        vert = self.vertices[0]
-        self.bounds.min = [vert[0], vert[1], vert[2]]
-        self.bounds.max = [vert[0], vert[1], vert[2]]
-        for i in range(count):
-            vert = self.vertices[i]
-            if vert[0] < self.bounds.min[0]:
-                self.bounds.min[0] = vert[0]
-                pass
-            if vert[1] < self.bounds.min[1]:
-                self.bounds.min[1] = vert[1]
-                pass
-            if vert[2] < self.bounds.min[2]:
-                self.bounds.min[2] = vert[2]
-                pass
-            if vert[0] > self.bounds.max[0]:
-                self.bounds.max[0] = vert[0]
-                pass
-            if vert[1] > self.bounds.max[1]:
-                self.bounds.max[1] = vert[1]
-                pass
-            if vert[2] > self.bounds.max[2]:
-                self.bounds.max[2] = vert[2]
-                pass
-            pass # end func
+        self.bounds.min, self.bounds.max = getPointsBounds(self.vertices)
         print("\tbounds:Min[%f %f %f] Max:[%f %f %f]" % (self.bounds.min[0], self.bounds.min[1], self.bounds.min[2], self.bounds.max[0], self.bounds.max[1], self.bounds.max[2]))
         pass # end func
     
+    # 计算动画每一帧的包围盒以及包围球，帧数*10。每个控制点只计算一次
+    def parseAnimBounds(self):
+        # 交换三角形顶点顺序之后每个控制点的第一个三角形顶点
+        indices = numpy.array(self.verticesIndices)
+        swapWinding(indices)
+        _, first = numpy.unique(indices, return_index = True)
+        points = self.vertices[first]
+        if self.skeleton:
+            weights = self.weights[first]
+            indices = self.boneIndices[first]
+            self.animBounds = numpy.array([getFrameBounds(skinPoints(matrices, points, weights, indices)) for matrices in self.anims])
+            pass
+        else:
+            self.animBounds = numpy.array([getFrameBounds(transformPoints(matrix.reshape(3, 4), points)) for matrix in self.anims])
+            pass
+        self.animBounds = self.animBounds.reshape(-1, 10)
+        print("\tanim bounds: %d frames, %d points" % (len(self.animBounds), len(points)))
+        pass # end func
+    
     # 解析顶点
     def parseVertices(self):
         print("\tparse vertex...")
-        count = self.fbxMesh.GetControlPointsCount()
-        points= self.fbxMesh.GetControlPoints()
-        for i in range(count):
-            vert = points[i]
-            self.vertices.append(vert)
-            pass # end for
+        points  = getControlPointsArray(self.fbxMesh)
         # 组织顶点数据
-        vertices = []
-        count = len(self.verticesIndices)
-        for i in range(count):
-            idx = self.verticesIndices[i]
-            vert= self.vertices[idx]
-            vertices.append(vert)
-            pass
-        self.vertices = vertices
-        print("\tvetex num:%d" % (len(self.vertices)))
+        vertices = points[self.verticesIndices]
+        print("\tvetex num:%d" % (len(vertices)))
         # 对顶点坐标轴转换
-        count = len(self.vertices)
-        for i in range(count):
-            vert = self.vertices[i]
-            vert = self.axisTransform.MultT(vert)
-            self.vertices[i] = [vert[0], vert[1], vert[2]]
-            pass # end for
+        self.vertices = transformPoints(getMatrixArray(self.axisTransform), vertices)
         # 重构顶点索引顺序
-        count = count / 3
-        for i in range(count):
-            v0 = self.vertices[i * 3 + 0]
-            v1 = self.vertices[i * 3 + 1]
-            v2 = self.vertices[i * 3 + 2]
-            self.vertices[i * 3 + 0] = v0
-            self.vertices[i * 3 + 1] = v2
-            self.vertices[i * 3 + 2] = v1
-            pass # end for
+        swapWinding(self.vertices)
         # 解析包围盒
         self.parseBounds()
         pass # end func
@@ -604,22 +2028,8 @@ class Mesh(object):
         # 解析UV0
         if layerCount >= 1:
             print("\tparse UV0...")
-            uvs   = self.fbxMesh.GetLayer(0).GetUVs()
-            count = uvs.GetDirectArray().GetCount()
-            data  = uvs.GetDirectArray()
-            for i in range(count):
-                uv = data.GetAt(i)
-                self.uvs0.append([uv[0], 1 - uv[1]])
-                pass # end for
             # 组织UV数据
-            count = len(self.uvIndices)
-            uvs   = []
-            for i in range(count):
-                idx = self.uvIndices[i]
-                uv  = self.uvs0[idx]
-                uvs.append(uv)
-                pass # end for
-            self.uvs0 = uvs
+            self.uvs0 = self.gatherUVs(self.fbxMesh.GetLayer(0).GetUVs())
             print("\tUV0 num:%d" % (len(self.uvs0)))
             pass # end if
         pass # end func
@@ -629,103 +2039,92 @@ class Mesh(object):
         layerCount = self.fbxMesh.GetLayerCount()
         if layerCount >= 2:
             print("\tparse UV1...")
-            uvs   = self.fbxMesh.GetLayer(0).GetUVs()
-            count = uvs.GetDirectArray().GetCount()
-            data  = uvs.GetDirectArray()
-            for i in range(count):
-                uv = data.GetAt(i)
-                self.uvs1.append([uv[0], 1 - uv[1]])
-                pass # end for
             # 组织UV1数据
-            count = len(self.uvIndices)
-            uvs   = []
-            for i in range(count):
-                idx = self.uvIndices[i]
-                uv  = self.uvs1[idx]
-                uvs.append(uv)
-                pass # end for
-            self.uvs1 = uvs
+            self.uvs1 = self.gatherUVs(self.fbxMesh.GetLayer(0).GetUVs())
             print("\tUV1 num:%d" % (len(self.uvs1)))
             pass # end if
         pass # end func
     
+    # 按照uv索引取出UV，v翻转。uv索引在第一次需要UV时才解析，不支持的UV映射方式只在输出UV时报错
+    def gatherUVs(self, element):
+        if len(self.uvIndices) == 0:
+            self.uvIndices = self.getLayerIndices(element)
+            pass
+        uvs = getLayerDirectArray(element, 2)[self.uvIndices]
+        uvs[:, 1] = 1 - uvs[:, 1]
+        return uvs
+        pass # end func
+    
+    # 按照映射方式以及引用方式展开图层数据，每个三角形顶点一行，顺序与verticesIndices相同
+    def expandLayerElement(self, element, width):
+        return getLayerDirectArray(element, width)[self.getLayerIndices(element)]
+        pass # end func
+    
+    # 按照映射方式以及引用方式，获取每个三角形顶点在图层direct数组中的索引
+    def getLayerIndices(self, element):
+        mode    = element.GetMappingMode()
+        count   = len(self.verticesIndices)
+        if mode == FbxLayerElement.eByControlPoint:
+            indices = self.verticesIndices
+            pass
+        elif mode == FbxLayerElement.eByPolygon:
+            indices = numpy.arange(count) // 3
+            pass
+        elif mode == FbxLayerElement.eAllSame:
+            indices = numpy.zeros(count, numpy.int64)
+            pass
+        elif mode == FbxLayerElement.eByEdge:
+            # 按边映射需要多边形到边的查找表，三角化之后边的顺序也会改变，不支持
+            raise ValueError("%s: layer element %s mapped by edge is not supported" % (self.name, element.GetName()))
+        else:
+            indices = numpy.arange(count)
+            pass
+        # 通过index数组索引direct数组
+        if element.GetReferenceMode() != FbxLayerElement.eDirect:
+            indices = getLayerIndexArray(element)[indices]
+            pass
+        return indices
+        pass # end func
+    
     # 解析法线
     def parseNormals(self):
         print("\tparse normals...")
-        normals = self.fbxMesh.GetLayer(0).GetNormals()
-        count   = normals.GetDirectArray().GetCount()
-        print("\tnormal num:%d" % (count))
-        data    = normals.GetDirectArray()
-        for i in range(count):
-            self.normals.append(data.GetAt(i))
-            pass
+        element = self.fbxMesh.GetLayer(0).GetNormals()
+        normals = self.expandLayerElement(element, 3)
+        print("\tnormal num:%d" % (len(normals)))
         # 对法线进行转换
-        count = len(self.normals)
-        axis  = Matrix3D(self.axisTransform)
-        for i in range(count):
-            nrm = self.normals[i]
-            nrm = axis.deltaTransformVector(nrm)
-            nrm = FbxVector4(nrm[0], nrm[1], nrm[2], 1)
-            nrm.Normalize()
-            self.normals[i] = [nrm[0], nrm[1], nrm[2]]
-            pass # end for
+        self.normals = normalizeVectors(transformVectors(getMatrixArray(self.axisTransform), normals))
         # 重构法线索引顺序
-        count = count / 3
-        for i in range(count):
-            v0 = self.normals[i * 3 + 0]
-            v1 = self.normals[i * 3 + 1]
-            v2 = self.normals[i * 3 + 2]
-            self.normals[i * 3 + 0] = v0
-            self.normals[i * 3 + 1] = v2
-            self.normals[i * 3 + 2] = v1
-            pass # end for
+        swapWinding(self.normals)
         pass # end func
     
-    # 解析权重以及索引
+    # 解析权重以及索引，每个控制点保留权重最大的四个骨骼并重新归一化
     def parseIndicesAndWeights(self):
         
-        count = self.fbxMesh.GetControlPointsCount()
-        indicesAndWeights = []
-        
-        for i in range(count):
-            skeJoints  = self.skeletonIndices[i]
-            skeWeights = self.skeletonWeights[i]
-            indices    = []
-            weights    = []
-            size = len(skeJoints)
-            # 最多允许四个权重
-            if size > MAX_WEIGHT_NUM:
-                size = MAX_WEIGHT_NUM
-                pass
-            # 保存权重以及索引数据
-            for j in range(size):
-                weights.append(skeWeights[j])
-                indices.append(skeJoints[j].index)
-                pass
-            for j in range(MAX_WEIGHT_NUM - size):
-                weights.append(0)
-                indices.append(0)
-                pass
-            indicesAndWeights.append(weights + indices)
+        sizes = numpy.diff(self.skinOffsets)
+        # 三角形使用的控制点中没有骨骼的，权重保持为0
+        used  = numpy.unique(self.verticesIndices)
+        orphans = numpy.count_nonzero(sizes[used] == 0)
+        if orphans > 0:
+            print("\twarning: %d control points have no bone influence, weights left as 0" % orphans)
             pass
-        # 组织权重数据
-        count = self.fbxMesh.GetPolygonCount()
-        for i in range(count):
-            for j in range(3):
-                # 顶点索引
-                vertIdx = self.fbxMesh.GetPolygonVertex(i, j)
-                self.weightsAndIndices.append(indicesAndWeights[vertIdx])
-                pass
+        # 超过四个骨骼的，舍弃权重最小的
+        dropped = numpy.count_nonzero(sizes[used] > MAX_WEIGHT_NUM)
+        if dropped > 0:
+            print("\t%d control points have more than %d bones, keep the heaviest" % (dropped, MAX_WEIGHT_NUM))
             pass
+        weights, indices = selectInfluences(self.skinOffsets, self.skinJoints, self.skinWeights, MAX_WEIGHT_NUM)
+        # 舍弃较小的权重
+        if config.min_weight > 0:
+            pruned = pruneInfluences(weights, indices, config.min_weight)
+            print("\tpruned %d weights below %f" % (pruned, config.min_weight))
+            pass
+        # 组织权重数据
+        self.weights     = weights[self.verticesIndices]
+        self.boneIndices = indices[self.verticesIndices]
         # 重构索引
-        for i in range(count):
-            v0 = self.weightsAndIndices[i * 3 + 0]
-            v1 = self.weightsAndIndices[i * 3 + 1]
-            v2 = self.weightsAndIndices[i * 3 + 2]
-            self.weightsAndIndices[i * 3 + 0] = v0
-            self.weightsAndIndices[i * 3 + 1] = v2
-            self.weightsAndIndices[i * 3 + 2] = v1
-            pass # end for
+        swapWinding(self.weights)
+        swapWinding(self.boneIndices)
         
         pass # end func
     
@@ -735,78 +2134,30 @@ class Mesh(object):
         skinDeformer = self.fbxMesh.GetDeformer(0, FbxDeformer.eSkin)
         clusterCount = skinDeformer.GetClusterCount()
         print("\tmesh:[%s] has %d bones..." % (self.name, clusterCount))
+        points  = [numpy.zeros(0, numpy.int64)]
+        joints  = [numpy.zeros(0, numpy.int32)]
+        weights = [numpy.zeros(0, numpy.float64)]
         for clusterIdx in range(clusterCount):
             cluster = skinDeformer.GetCluster(clusterIdx)
             joint   = SkeletonJoint()
             joint.initWithCluster(cluster)
+            joint.parseBindTransform(self.geometryTransform)
             joint.index = clusterIdx
             self.joints.append(joint)
-            print("\tBoneName:%s" % joint.name)
+            if not config.quiet:
+                print("\tBoneName:%s" % joint.name)
+                pass
             # 解析骨骼权重以及顶点索引
-            indices = cluster.GetControlPointIndices()          # 顶点的索引
-            weights = cluster.GetControlPointWeights()          # 顶点的权重
-            count   = len(indices)
-            for i in range(count):
-                verIdx = indices[i]
-                weight = weights[i]
-                # 顶点还未被记录到字典
-                if not self.skeletonIndices.get(verIdx):
-                    self.skeletonIndices[verIdx] = []
-                    self.skeletonWeights[verIdx] = []
-                    pass
-                # 将骨骼保存到对应的顶点中去
-                self.skeletonIndices[verIdx].append(joint)
-                # 将权重保存到对应的顶点中去
-                self.skeletonWeights[verIdx].append(weight)
-                pass # end for
+            indices = numpy.asarray(cluster.GetControlPointIndices(), numpy.int64)     # 顶点的索引
+            points.append(indices)
+            joints.append(numpy.repeat(numpy.int32(clusterIdx), len(indices)))
+            weights.append(numpy.asarray(cluster.GetControlPointWeights(), numpy.float64)[0:len(indices)])  # 顶点的权重
             pass # end for
+        # 所有cluster的权重按控制点分组
+        self.skinOffsets, self.skinJoints, self.skinWeights = buildSkinTable(
+            numpy.concatenate(points), numpy.concatenate(joints), numpy.concatenate(weights), self.fbxMesh.GetControlPointsCount())
         pass # end
     
-    # 解析骨骼的帧动画
-    def parseJointFrameAnim(self, joint, time):
-        cluster = joint.cluster
-        # 获取当前帧骨骼的global transform
-        frameGlobalTransform = cluster.GetLink().EvaluateGlobalTransform(time)
-        # 获取bindtransform
-        bindTransform  = FbxAMatrix()
-        cluster.GetTransformMatrix(bindTransform)
-        bindTransform *= self.geometryTransform
-        # 骨骼global初始矩阵
-        clusterGlobalInitTransform = FbxAMatrix()
-        cluster.GetTransformLinkMatrix(clusterGlobalInitTransform)
-        # 转换 vert * axis * invAxis * bindTransform * invGlobalInit * BoneGlobal * InvMeshGlobal * AXIS_FLIP_X
-        vertexTransform = AXIS_FLIP_L * self.fbxMesh.GetNode().EvaluateGlobalTransform().Inverse() * frameGlobalTransform * clusterGlobalInitTransform.Inverse() * bindTransform * self.invAxisTransform
-        
-        return vertexTransform
-        pass
-    
-    # 解析骨骼动画
-    def parseSkeletonAnim(self, time):
-        clip  = []
-        count = len(self.joints)
-        for i in range(count):
-            clip.append(self.parseJointFrameAnim(self.joints[i], time))
-            pass # end func
-        self.anims.append(clip)
-        pass
-    
-    # 解析帧动画
-    def parseFrameAnim(self, time):
-        # 顶点 * axis * [axis的逆矩阵 * global * axis]
-        animMt = AXIS_FLIP_X * self.fbxMesh.GetNode().EvaluateGlobalTransform(time) * self.invAxisTransform
-        matrix = Matrix3D(animMt)
-        clip   = []
-        # 丢弃最后一列数据
-        for i in range(3):
-            raw = matrix.getRaw(i)
-            for j in range(len(raw)):
-                clip.append(raw[j])
-                pass
-            pass
-        # 保存数据
-        self.anims.append(clip)
-        pass # end func
-    
     # 解析动画
     def parseAnim(self):
         print("\tparse animation...")
@@ -818,187 +2169,248 @@ class Mesh(object):
         if self.skeleton:
             self.parseCluster()
             self.parseIndicesAndWeights()
-            pass #
-        # 获取stack
-        stack = self.scene.GetSrcObject(FbxAnimStack.ClassId, 0)
-        self.scene.SetCurrentAnimationStack(stack)
-        # 获取时间
-        timeSpan  = stack.GetLocalTimeSpan()
-        time      = timeSpan.GetStart()
-        # frameTime
-        frameTime = FbxTime()
-        frameTime.SetTime(0, 0, 0, 1, 0, self.scene.GetGlobalSettings().GetTimeMode())
-        # 解析每一帧动画
-        while time <= timeSpan.GetStop():
-            if self.skeleton:                           
-                self.parseSkeletonAnim(time)            # 解析骨骼动画
+            # 转换 vert * axis * invAxis * bindTransform * invGlobalInit * BoneGlobal * InvMeshGlobal * AXIS_FLIP_X
+            # 除BoneGlobal之外都与时间无关，预先计算左右两边的矩阵，每一帧只需要两次批量乘法
+            left  = getMatrixArray(AXIS_FLIP_L * self.fbxMesh.GetNode().EvaluateGlobalTransform().Inverse())
+            right = getMatrixBlock([joint.invLinkTransform * joint.bindTransform * self.invAxisTransform for joint in self.joints], (len(self.joints),))
+            block = sampleGlobalTransforms(self.scene, [joint.node for joint in self.joints], self.transformCache)
+            # 帧数*骨骼数*4*4
+            self.anims = numpy.matmul(numpy.matmul(left, block), right)
+            pass
+        else:
+            # 顶点 * axis * [axis的逆矩阵 * global * axis]，丢弃最后一行数据
+            left  = getMatrixArray(AXIS_FLIP_X)
+            right = getMatrixArray(self.invAxisTransform)
+            if config.keys:
+                # 只计算曲线关键帧需要的帧
+                frameNum, self.animKeys, block = sampleCurveKeys(self.scene, self.fbxMesh.GetNode(), self.transformCache)
                 pass
             else:
-                self.parseFrameAnim(time)               # 解析帧动画
+                block = sampleGlobalTransforms(self.scene, [self.fbxMesh.GetNode()], self.transformCache)[:, 0]
+                pass
+            # 帧数*12
+            self.anims = getMatrix34Block(numpy.matmul(numpy.matmul(left, block), right))
+            # 展开为每一帧
+            if self.animKeys is not None:
+                self.anims = expandKeyframes(self.animKeys, self.anims, frameNum)
                 pass
-            time += frameTime
             pass
         
         pass # end func
     
     # 生成模型数据
-    def generateMeshBytes(self):
-        # 生成Mesh对应的文件名称
-        tokens  = re.compile("[\\\/]").split(self.fbxFilePath)
-        fbxName = tokens[-1]
-        fbxName = fbxName.split(".")[0:-1]
-        fbxName = ".".join(fbxName)
-        fbxDir  = parseFilepath(self.fbxFilePath)
-        self.meshFileName = fbxDir + fbxName + "_" + self.name + MESH_TYPE
-        # 组织Mesh数据
-        data = b''
+    def generateMeshBytes(self, data):
+        # 写格式版本
+        quantizer = None
+        if config.quantize:
+            quantizer = VertexQuantizer(self.bounds)
+            pass
+        if config.influences:
+            data.writeInt(-MESH_INFLUENCE_VERSION)
+            data.writeInt(1 if config.weld else 0)
+            data.writeInt(1 if config.quantize else 0)
+            pass
+        elif config.quantize:
+            data.writeInt(-MESH_QUANTIZED_VERSION)
+            data.writeInt(1 if config.weld else 0)
+            pass
+        elif config.weld:
+            data.writeInt(-MESH_VERSION)
+            pass
         # 写名称
-        data += struct.pack('<i', len(self.name)) 
-        data += str(self.name)
+        data.writeInt(len(self.name))
+        data.writeUTFBytes(self.name)
         # 写坐标
         if config.world:
-            data += getMatrix3DBytes(AXIS_FLIP_X * self.fbxMesh.GetNode().EvaluateLocalTransform() * self.invAxisTransform)
+            data.writeFloats(getMatrix3DArray(AXIS_FLIP_X * self.fbxMesh.GetNode().EvaluateLocalTransform() * self.invAxisTransform))
             pass
         else:
-            data += getMatrix3DBytes(AXIS_FLIP_X * self.fbxMesh.GetNode().EvaluateGlobalTransform() * self.invAxisTransform)
+            data.writeFloats(getMatrix3DArray(AXIS_FLIP_X * self.fbxMesh.GetNode().EvaluateGlobalTransform() * self.invAxisTransform))
             pass
         # 写SubMesh数量
         subNum = len(self.geometries)
-        data  += struct.pack("<i", subNum)
+        data.writeInt(subNum)
+        
+        step = 3
+        if config.quat:
+            step = 2
+            pass
+        # 每种权重数的顶点数，以及相对于4个权重节省的字节数
+        influenceVertices = {}
+        influenceSaved    = 0
         # 写数据
         for subIdx in range(subNum):
-            subMesh = self.geometries[subIdx]
-            # 写顶点
-            count = len(subMesh.vertices)
-            data += struct.pack('<i', count)            
-            for i in range(count):                     
-                vert = subMesh.vertices[i]
-                data += struct.pack('<fff', vert[0], vert[1], vert[2])
-                pass # end for
-            # 写UV0
-            count = len(subMesh.uvs0)                      
-            data += struct.pack('<i', count)
-            for i in range(count):
-                uv = subMesh.uvs0[0]
-                data += struct.pack('<ff', uv[0], uv[1])
-                pass # end for
-            # 写UV1
-            count = len(subMesh.uvs1)
-            data += struct.pack('<i', count)
-            for i in range(count):
-                uv = subMesh.uvs1[i]
-                data += struct.pack('<ff', uv[0], uv[1])
-                pass # end for 
-            # 写法线
-            count = len(subMesh.normals)
-            data += struct.pack('<i', count)
-            for i in range(count):
-                normal = subMesh.normals[i]
-                data  += struct.pack('<fff', normal[0], normal[1], normal[2])
+            subMesh    = self.geometries[subIdx]
+            attributes = subMesh.getVertexAttributes(step)
+            # 写权重数，只保留前几列权重以及骨骼索引
+            if config.influences:
+                influences = getInfluenceCount(attributes[4])
+                data.writeInt(influences)
+                if influences > 0:
+                    attributes[4] = attributes[4][:, 0:influences]
+                    attributes[5] = attributes[5][:, 0:influences]
+                    pass
+                pass
+            # 焊接相同的顶点
+            if config.weld:
+                unique, indices = weldVertices(attributes)
+                attributes = [attr[unique] if len(attr) > 0 else attr for attr in attributes]
+                pass
+            # 写顶点、UV0、UV1、法线、权重、骨骼索引
+            if quantizer:
+                quantizer.writeAttributes(data, attributes)
                 pass
-            # 写权重数据
-            count = len(subMesh.weightsAndIndices)
-            data += struct.pack('<i', count)
-            for i in range(count):
-                weIdx = subMesh.weightsAndIndices[i]
-                data += struct.pack('<ffff', weIdx[0], weIdx[1], weIdx[2], weIdx[3])
-                pass # end
-            count = len(subMesh.weightsAndIndices)
-            data += struct.pack('<i', count)
-            
-            step = 3
-            if config.quat:
-                step = 2
+            else:
+                for attr in attributes:
+                    data.writeVectors(attr, attr.shape[1])
+                    pass
                 pass
-            # 写骨骼索引数据
-            for i in range(count):
-                weIdx = subMesh.weightsAndIndices[i]
-                data += struct.pack('<ffff', weIdx[4] * step, weIdx[5] * step, weIdx[6] * step, weIdx[7] * step)
+            # 写三角形索引
+            if config.weld:
+                data.writeInt(len(indices))
+                data.writeUShorts(indices)
+                pass
+            # 统计权重数
+            if config.influences and influences > 0:
+                count = len(attributes[4])
+                size  = 8
+                if quantizer:
+                    size = 2 if attributes[5].max() <= 255 else 3
+                    pass
+                influenceVertices[influences] = influenceVertices.get(influences, 0) + count
+                influenceSaved += count * (MAX_WEIGHT_NUM - influences) * size
                 pass
-            
             pass # end for
+        if influenceVertices:
+            print("\tinfluences %s: %s vertices, saved %d bytes" % (self.name, " ".join(["%d:%d" % (k, influenceVertices[k]) for k in sorted(influenceVertices)]), influenceSaved))
+            pass
         
         # 写包围盒数据
-        data += struct.pack('<ffffff', self.bounds.min[0], self.bounds.min[1], self.bounds.min[2], self.bounds.max[0], self.bounds.max[1], self.bounds.max[2])
-        # 压缩
-        data = zlib.compress(data, 9)
-        
-        self.meshBytes = data
+        data.writeFloats([self.bounds.min[0], self.bounds.min[1], self.bounds.min[2], self.bounds.max[0], self.bounds.max[1], self.bounds.max[2]])
+        # 写SubMesh包围盒
+        if config.bounds:
+            for subMesh in self.geometries:
+                data.writeFloats(subMesh.bounds.min + subMesh.bounds.max)
+                pass
+            pass
+        if quantizer:
+            quantizer.printStats(self.name)
+            pass
+        pass # end func
+    
+    # 获取写入文件的顶点属性:顶点、UV0、UV1、法线、权重、骨骼索引，不存在的属性为空数组
+    def getVertexAttributes(self, step):
+        # 每个顶点都写入第一个UV
+        uvs0 = self.uvs0
+        if len(uvs0) > 0:
+            uvs0 = numpy.repeat(uvs0[0:1], len(uvs0), axis = 0)
+            pass
+        return [
+            self.vertices,
+            uvs0,
+            self.uvs1,
+            self.normals,
+            self.weights,
+            self.boneIndices * float(step),
+        ]
+        pass # end func
+    
+    # 焊接之后每个顶点的索引，只计算一次
+    def getWeldIndices(self):
+        if self.weldIndices is None:
+            _, self.weldIndices = weldVertices(self.getVertexAttributes(1))
+            pass
+        return self.weldIndices
         pass # end func
     
     # 生成帧动画数据
-    def generateFrameAnimBytes(self):
-        data = b''
+    def generateFrameAnimBytes(self, data):
+        keyed = (config.reduce or self.animKeys is not None) and isKeyframeSupported(self.name, len(self.anims))
+        if keyed and config.reduce:
+            # 关键帧动画
+            reducer = KeyframeReducer(False)
+            data.writeInt(3)
+            data.writeInt(len(self.anims))
+            reducer.writeTrack(data, numpy.asarray(self.anims, numpy.float64).reshape(-1, 12))
+            reducer.printStats(self.name)
+            return
+        if keyed:
+            # 曲线关键帧动画
+            data.writeInt(3)
+            data.writeInt(len(self.anims))
+            writeKeyframes(data, self.animKeys, self.anims[self.animKeys])
+            return
         # 写入动画类型
-        data += struct.pack('<i', 0)
+        data.writeInt(0)
         # 写入帧数
-        count = len(self.anims)
-        data += struct.pack('<i', count)
+        data.writeInt(len(self.anims))
         # 写入数据
-        for i in range(count):
-            clip = self.anims[i]
-            for j in range(len(clip)):
-                data += struct.pack('<f', clip[j])
-                pass
-            pass
-        return data
+        data.writeFloats(self.anims)
         pass # end func
     
     # 生成骨骼动画数据
-    def generateSkeletonAnimBytes(self):
-        data = b''
+    def generateSkeletonAnimBytes(self, data):
         # 类型
         t = 1
         if config.quat:
             t = 2
             pass
-        data += struct.pack('<i', t)
+        # 关键帧动画
+        reducer = None
+        if config.reduce and isKeyframeSupported(self.name, len(self.anims)):
+            reducer = KeyframeReducer(config.quat)
+            t += 3
+            pass
+        data.writeInt(t)
         # 写入SubMe数量
         subNum= len(self.geometries)
-        data += struct.pack('<i', subNum)
+        data.writeInt(subNum)
         # 写动画数据
         for subIdx in range(subNum):
             subMesh = self.geometries[subIdx]
             # 写入帧数
-            count = len(subMesh.anims)
-            data += struct.pack('<i', count)
+            data.writeInt(len(subMesh.anims))
             # 写入骨骼数量
-            data += struct.pack('<i', len(subMesh.joints))
-            # 写入数据
-            for i in range(count):
-                clip = subMesh.anims[i]
-                for j in range(len(clip)):
-                    if config.quat:
-                        data += getQuatBytesFromAMatrix(clip[j])
-                        pass
-                    else:
-                        data += getMatrix3DBytes(clip[j])
-                        pass
-                    pass # end for
-                pass # end for
-            pass
-        return data
+            data.writeInt(len(subMesh.joints))
+            # 每根骨骼写一条关键帧轨迹
+            if reducer:
+                if config.quat:
+                    samples = getQuatBlock(subMesh.anims)
+                    pass
+                else:
+                    samples = getMatrix34Block(subMesh.anims)
+                    pass
+                for i in range(len(subMesh.joints)):
+                    reducer.writeTrack(data, samples[:, i])
+                    pass
+                pass
+            # 写入数据，所有帧的所有骨骼一次性写入
+            elif config.quat:
+                data.writeFloats(getQuatBlock(subMesh.anims))
+                pass
+            else:
+                data.writeFloats(getMatrix34Block(subMesh.anims))
+                pass
+            pass
+        if reducer:
+            reducer.printStats(self.name)
+            pass
         pass # end func
     
     # 生成动画数据
-    def generateAnimBytes(self):
-        # 生成Mesh对应的文件名称
-        tokens  = re.compile("[\\\/]").split(self.fbxFilePath)
-        fbxName = tokens[-1]
-        fbxName = fbxName.split(".")[0:-1]
-        fbxName = ".".join(fbxName)
-        fbxDir  = parseFilepath(self.fbxFilePath)
-        self.animFileName = fbxDir + fbxName + "_" + self.name + ANIM_TYPE
+    def generateAnimBytes(self, data):
         # 动画类型:0->帧动画;1->矩阵骨骼动画;2->四元数骨骼动画
-        data = None
         if self.skeleton:
-            data = self.generateSkeletonAnimBytes()
+            self.generateSkeletonAnimBytes(data)
             pass
         else:
-            data = self.generateFrameAnimBytes()
+            self.generateFrameAnimBytes(data)
+            pass
+        # 写每一帧的包围盒以及包围球
+        if config.bounds:
+            data.writeInt(len(self.animBounds))
+            data.writeFloats(self.animBounds)
             pass
-        data = zlib.compress(data, 9)
-        self.animBytes = data
         pass # end func
     
     # 拆分模型
@@ -1014,58 +2426,41 @@ class Mesh(object):
         for subMesh in subMeshes:
             self.geometries += subMesh.splitBones()
             pass
-        print(len(self.geometries))
+        if not config.quiet:
+            print(len(self.geometries))
+            pass
         pass # end func
     
-    # 拆分顶点数据:vertex,uv0,uv1,normal,weightsAndIndices
+    # 拆分顶点数据:vertex,uv0,uv1,normal,weights,boneIndices。SubMesh为原始数据的视图
     def splitVertex(self):
-        count = len(self.vertices)
+        count = self.getCornerCount()
+        if config.weld:
+            # 焊接之后的顶点数不超过MAX_VERTEX_NUM
+            ranges = getWeldSplitRanges(self.getWeldIndices())
+            pass
+        else:
+            ranges = [(idx, min(idx + MAX_VERTEX_NUM, count)) for idx in range(0, count, MAX_VERTEX_NUM)]
+            pass
         # 未达到拆分条件
-        if count < MAX_VERTEX_NUM:
+        if count < MAX_VERTEX_NUM or (config.weld and len(ranges) < 2):
             return [self]
             pass
         # 开始拆分
-        idx = 0
         subMeshes = []
-        while idx < count:
-            subMesh = Mesh()
-            # 拷贝属性
-            subMesh.fbxMesh             = self.fbxMesh
-            subMesh.sdkManager          = self.sdkManager
-            subMesh.scene               = self.scene
-            subMesh.fbxFilePath         = self.fbxFilePath
-            subMesh.name                = str(self.name + str(len(subMeshes)))
-            subMesh.skeleton            = self.skeleton
-            subMesh.geometryTransform   = self.geometryTransform
-            subMesh.axisTransform       = self.axisTransform
-            subMesh.invAxisTransform    = self.invAxisTransform
-            # 拆分数据
-            # 顶点
-            subMesh.vertices            = self.vertices[idx : idx + MAX_VERTEX_NUM]
-            # UV0
-            subMesh.uvs0                = self.uvs0[idx : idx + MAX_VERTEX_NUM]
-            # UV1
-            subMesh.uvs1                = self.uvs1[idx : idx + MAX_VERTEX_NUM]
-            # Normal
-            subMesh.normals             = self.normals[idx : idx + MAX_VERTEX_NUM]
-            # 权重索引
-            subMesh.weightsAndIndices   = self.weightsAndIndices[idx : idx + MAX_VERTEX_NUM]
-            # 包围盒
-            subMesh.bounds.min          = self.bounds.min[0:]
-            subMesh.bounds.max          = self.bounds.max[0:]
+        for start, end in ranges:
+            # 拆分数据:顶点、UV0、UV1、Normal、权重索引
+            subMesh = self.createSubMesh(str(self.name + str(len(subMeshes))), slice(start, end))
             # 动画
             subMesh.anims               = self.anims[0:]
             # 骨骼
             subMesh.joints              = self.joints[0:]
-            # ʕ•̫͡•ʕ*̫͡*ʕ
-            idx += MAX_VERTEX_NUM
             # 添加到geometries
             subMeshes.append(subMesh)
             pass
         return subMeshes
         pass # end func
     
-    # 拆分骨骼数据
+    # 拆分骨骼数据:三角形按照使用的骨骼分组，再将分组装入尽量少的SubMesh，每个SubMesh骨骼数不超过上限
     def splitBones(self):
         if not self.skeleton:
             return [self]
@@ -1073,134 +2468,66 @@ class Mesh(object):
         count = len(self.joints)
         maxNum= 0
         if config.quat:
-            # 使用四元数并且骨骼数量少于最大骨骼数
-            if count < config.max_quat:
-                return [self]
-                pass
-            # 使用四元数，骨骼数量大于最大骨骼数
+            # 使用四元数，骨骼上限
             maxNum = config.max_quat
             pass
         else:
-            # 使用矩阵并且骨骼数量少于最大骨骼数
-            if count < config.max_m34:
-                return [self]
-                pass
-            # 使用矩阵，骨骼数量大于最大骨骼数
+            # 使用矩阵，骨骼上限
             maxNum = config.max_m34
             pass
-        # 开始进行骨骼拆分
-        count = len(self.vertices)
-        count = count / 3
-        # list
-        subMeshes = []
-        subMesh   = Mesh()
-        subMesh.name = self.name + str(len(subMeshes))
-        subMeshes.append(subMesh)
-        # 遍历所有三角形
-        for i in range(count):
-            v0 = i * 3 + 0
-            v1 = i * 3 + 1
-            v2 = i * 3 + 2
-            # 搜集三角形的所有骨骼
-            idx0 = self.weightsAndIndices[v0][4:]
-            idx1 = self.weightsAndIndices[v1][4:]
-            idx2 = self.weightsAndIndices[v2][4:]
-            idxs = idx0 + idx1 + idx2
-            # 去掉重复索引
-            idxs = list(set(idxs))
-            # 将新索引添加subMesh中，并且检查骨骼数量是否超限
-            bones = set(subMesh.joints + idxs)
-            # 添加当前三角形之后，subMesh超限->创建新的subMesh
-            if len(bones) > maxNum:
-                subMesh = Mesh()
-                subMesh.name = self.name + str(len(subMeshes))
-                subMeshes.append(subMesh)
-                pass
-            # 保存骨骼索引
-            subMesh.joints = list(set(subMesh.joints + idxs))
-            # 将三角形数据添加到当前三角形
-            # 顶点
-            subMesh.vertices.append(self.vertices[v0])
-            subMesh.vertices.append(self.vertices[v1])
-            subMesh.vertices.append(self.vertices[v2])
-            # uv0
-            if len(self.uvs0) > 0:
-                subMesh.uvs0.append(self.uvs0[v0])
-                subMesh.uvs0.append(self.uvs0[v1])
-                subMesh.uvs0.append(self.uvs0[v2])
-                pass
-            # uv1
-            if len(self.uvs1) > 0:
-                subMesh.uvs1.append(self.uvs1[v0])
-                subMesh.uvs1.append(self.uvs1[v1])
-                subMesh.uvs1.append(self.uvs1[v2])
-                pass
-            # normal
-            if len(self.normals) > 0:
-                subMesh.normals.append(self.normals[v0])
-                subMesh.normals.append(self.normals[v1])
-                subMesh.normals.append(self.normals[v2])
-                pass
-            # 权重以及索引
-            if len(self.weightsAndIndices) > 0:
-                subMesh.weightsAndIndices.append(self.weightsAndIndices[v0])
-                subMesh.weightsAndIndices.append(self.weightsAndIndices[v1])
-                subMesh.weightsAndIndices.append(self.weightsAndIndices[v2])
-                pass
+        # 骨骼数量不超过上限
+        if count <= maxNum:
+            return [self]
             pass
-        # 重构数据
-        for subMesh in subMeshes:
-            # 拷贝属性
-            subMesh.fbxMesh             = self.fbxMesh
-            subMesh.sdkManager          = self.sdkManager
-            subMesh.scene               = self.scene
-            subMesh.fbxFilePath         = self.fbxFilePath
-            subMesh.skeleton            = self.skeleton
-            subMesh.geometryTransform   = self.geometryTransform
-            subMesh.axisTransform       = self.axisTransform
-            subMesh.invAxisTransform    = self.invAxisTransform
-            # 重构骨骼索引
-            joints  = []
-            oldIndexMap = {}
-            newIndexMap = {}
-            for idx in subMesh.joints:
-                # 保存新旧索引
-                oldIndexMap[idx] = len(joints)
-                newIndexMap[len(joints)] = idx
-                # 保存骨骼 
-                joints.append(self.joints[idx])
-                pass
-            # 设置骨骼
-            subMesh.joints = joints
-            # 重写权重索引数据
-            count = len(subMesh.weightsAndIndices)
-            for i in range(count):
-                weIdx = subMesh.weightsAndIndices[i]
-                subMesh.weightsAndIndices[i] = [weIdx[0], weIdx[1], weIdx[2], weIdx[3], oldIndexMap[weIdx[4]], oldIndexMap[weIdx[5]], oldIndexMap[weIdx[6]], oldIndexMap[weIdx[7]]]
-                pass
-            
+        start = time.time()
+        # 每个三角形使用的骨骼，忽略权重为0的骨骼
+        allWeights = self.weights
+        allIndices = self.boneIndices
+        weights = allWeights.reshape(-1, 12)
+        indices = allIndices.reshape(-1, 12).astype(numpy.int64)
+        indices[weights == 0] = -1
+        triangleBones = [frozenset([idx for idx in row if idx >= 0]) for row in indices.tolist()]
+        # 按照骨骼集合对三角形分组
+        groups = {}
+        for i in range(len(triangleBones)):
+            groups.setdefault(triangleBones[i], []).append(i)
+            pass
+        boneSets = list(groups.keys())
+        palettes, members = packBonePalettes(boneSets, maxNum)
+        # SubMesh按照第一个三角形的位置排序，三角形保持原来的顺序
+        triangleLists = [sorted([tri for i in member for tri in groups[boneSets[i]]]) for member in members]
+        order = sorted(range(len(palettes)), key = lambda i: triangleLists[i][0])
+        
+        subMeshes = []
+        for i in order:
+            joints  = sorted(palettes[i])
+            corners = (numpy.asarray(triangleLists[i], numpy.int64)[:, numpy.newaxis] * 3 + numpy.arange(3)).ravel()
+            # 三角形数据
+            subMesh = self.createSubMesh(self.name + str(len(subMeshes)), corners)
+            # 骨骼
+            subMesh.joints              = [self.joints[idx] for idx in joints]
+            # 重写骨骼索引数据，权重为0的索引指向第一根骨骼
+            indexMap = numpy.zeros(count, numpy.int32)
+            indexMap[joints] = numpy.arange(len(joints))
+            subMesh.boneIndices         = numpy.where(allWeights[corners] == 0, 0, indexMap[allIndices[corners]])
             # 重写动画数据
-            frameSize = len(self.anims)
-            for i in range(frameSize):
-                clip = []
-                # 遍历subMesh的Joints
-                size = len(subMesh.joints)
-                for j in range(size):
-                    # 通过新索引获取旧索引
-                    idx = newIndexMap[j]
-                    clip.append(self.anims[i][idx])
-                    pass
-                subMesh.anims.append(clip)
-                pass
-            
+            subMesh.anims               = self.anims[:, joints]
+            subMeshes.append(subMesh)
             pass
+        print("\tsplit bones: %d sub meshes (greedy %d), %d bone groups, %.3fs" % (len(subMeshes), countGreedyPalettes(triangleBones, maxNum), len(boneSets), time.time() - start))
         return subMeshes
         pass # end func
     
     # 检测模型是否需要进行拆分
     def isNeedSplit(self):
         # 检测顶点是否超过65535
-        isNeed = len(self.vertices) > MAX_VERTEX_NUM
+        if config.weld:
+            indices = self.getWeldIndices()
+            isNeed  = len(indices) > 0 and indices.max() + 1 > MAX_VERTEX_NUM
+            pass
+        else:
+            isNeed  = self.getCornerCount() > MAX_VERTEX_NUM
+            pass
         # 顶点超过65535
         if isNeed:
             return True
@@ -1220,13 +2547,14 @@ class Mesh(object):
         pass # end func
     
     # 初始化mesh
-    def initWithFbxMesh(self, fbxMesh, sdkManager, scene, fbxFilePath):
+    def initWithFbxMesh(self, fbxMesh, sdkManager, scene, fbxFilePath, transformCache):
         
         print("parse mesh...")
         
         self.fbxMesh    = fbxMesh
         self.sdkManager = sdkManager
         self.scene      = scene
+        self.transformCache = transformCache
         self.name       = str(fbxMesh.GetNode().GetName())
         self.fbxFilePath= fbxFilePath
         
@@ -1249,52 +2577,136 @@ class Mesh(object):
         # 解析动画
         if config.anim:
             self.parseAnim()
+        # 解析每一帧包围盒
+        if config.anim and config.bounds:
+            self.parseAnimBounds()
         # 拆分Mesh
         self.splitMesh() 
-        # 生成模型数据
-        self.generateMeshBytes()
-        # 生成动画数据
-        self.generateAnimBytes()
-        # 写模型数据
-        open(self.meshFileName, 'w+b').write(self.meshBytes)
-        # 写动画数据
+        # 生成文件名称
+        self.meshFileName = getOutputFileName(self.fbxFilePath, self.name, MESH_TYPE)
+        self.animFileName = getOutputFileName(self.fbxFilePath, self.name, ANIM_TYPE)
+        # 生成并写模型数据
+        self.writeMesh()
+        # 生成并写动画数据
         if config.anim:
-            open(self.animFileName, 'w+b').write(self.animBytes)
+            self.writeAnim()
+            pass
         
         pass
+    
+    # 写模型文件
+    def writeMesh(self):
+        with CompressedFile(self.meshFileName) as data:
+            self.generateMeshBytes(data)
+            pass
+        pass # end func
+    
+    # 写动画文件
+    def writeAnim(self):
+        with CompressedFile(self.animFileName) as data:
+            self.generateAnimBytes(data)
+            pass
+        pass # end func
+    
+    # 写完文件之后释放顶点、动画数据以及Fbx对象的引用。geometries可能包含自己，清空之后才能立即回收
+    def release(self):
+        self.fbxMesh            = None
+        self.sdkManager         = None
+        self.scene              = None
+        self.transformCache     = None
+        self.columns            = {}
+        self.source             = None
+        self.corners            = None
+        self.anims              = []
+        self.animKeys           = None
+        self.animBounds         = None
+        self.verticesIndices    = []
+        self.uvIndices          = []
+        self.joints             = []
+        self.skinOffsets        = None
+        self.skinJoints         = None
+        self.skinWeights        = None
+        self.geometries         = []
+        self.weldIndices        = None
+        pass # end func
         
     
 
     pass # end class
 
-# 解析相机
-def parseCameras(sdkManager, scene, filepath):
+# -profile记录的阶段
+profileStages(Camera3D, "camera", CAMERA_STAGES)
+profileStages(Mesh,     "mesh",   MESH_STAGES)
+
+# 逐个解析相机并写文件，每次只生成一个
+def parseCameras(sdkManager, scene, filepath, transformCache):
     print("parse cameras...")
     count = scene.GetSrcObjectCount(FbxCamera.ClassId)
     print("\tcamera num:%d" % (count))
-    cameras = []
     for i in range(count):
         fbxCamera = scene.GetSrcObject(FbxCamera.ClassId, i)
         camera = Camera3D()
-        camera.initWithFbxCamera(fbxCamera, sdkManager, scene, filepath)
-        cameras.append(camera)
+        camera.initWithFbxCamera(fbxCamera, sdkManager, scene, filepath, transformCache)
+        yield camera
         pass # end for
-    return cameras
     pass # end func
 
-# 解析所有的模型
-def parseMeshs(sdkManager, scene, filepath):
+# 逐个解析模型并写文件，每次只生成一个
+def parseMeshs(sdkManager, scene, filepath, transformCache):
     print("parse meshs...")
     count = scene.GetSrcObjectCount(FbxMesh.ClassId)
     print("\tmesh num:%d" % (count))
-    meshs = []
     for i in range(count):
         fbxMesh = scene.GetSrcObject(FbxMesh.ClassId, i)
         mesh = Mesh()
-        mesh.initWithFbxMesh(fbxMesh, sdkManager, scene, filepath)
-        meshs.append(mesh)
+        mesh.initWithFbxMesh(fbxMesh, sdkManager, scene, filepath, transformCache)
+        yield mesh
         pass # end for
+    pass # end func
+
+# 场景中被多个骨骼Mesh共享的骨骼节点，按照共享的Mesh数量从多到少排序
+def getSharedJointNodes(scene):
+    counts = {}
+    nodes  = {}
+    for i in range(scene.GetSrcObjectCount(FbxMesh.ClassId)):
+        fbxMesh = scene.GetSrcObject(FbxMesh.ClassId, i)
+        if fbxMesh.GetDeformerCount(FbxDeformer.eSkin) == 0:
+            continue
+        skinDeformer = fbxMesh.GetDeformer(0, FbxDeformer.eSkin)
+        links = {}
+        for clusterIdx in range(skinDeformer.GetClusterCount()):
+            link = skinDeformer.GetCluster(clusterIdx).GetLink()
+            if link is not None:
+                links[link.GetUniqueID()] = link
+                pass
+            pass
+        for uid, link in links.items():
+            counts[uid] = counts.get(uid, 0) + 1
+            nodes[uid]  = link
+            pass
+        pass
+    shared = sorted([uid for uid in nodes.keys() if counts[uid] > 1], key = lambda uid: (-counts[uid], uid))
+    return [nodes[uid] for uid in shared]
+    pass # end func
 
+# 解析场景中的相机以及模型，每个对象写完文件之后立即释放，再检查内存上限
+def parseObjects(sdkManager, scene, fbxfile):
+    # 场景中所有Mesh以及相机共享的矩阵缓存，先按帧计算多个Mesh共享的骨骼
+    transformCache = TransformCache(config.cache_mb * 1024 * 1024)
+    if config.anim:
+        transformCache.prefetch(scene, getSharedJointNodes(scene))
+        pass
+    # 解析相机
+    for camera in parseCameras(sdkManager, scene, fbxfile, transformCache):
+        camera.release()
+        checkMemory(camera.name)
+        pass
+    # 解析模型
+    for mesh in parseMeshs(sdkManager, scene, fbxfile, transformCache):
+        mesh.release()
+        checkMemory(mesh.name)
+        pass
+    transformCache.printStats()
     pass # end func
 
 # 解析FBX文件
@@ -1308,28 +2720,263 @@ def parseFBX(fbxfile, config):
     if content == False:
         print("Fbx load failed:%s" % fbxfile)
         sdkManager.Destroy()
-        return
+        return False
+        pass
+    try:
+        # 对场景三角化
+        converter = FbxGeometryConverter(sdkManager)
+        converter.Triangulate(scene, True)
+        axisSystem = FbxAxisSystem.OpenGL
+        axisSystem.ConvertScene(scene)
+        with StageProfiler(fbxfile):
+            # 输出到Pack文件
+            if config.pack:
+                with PackFile(getPackFileName(fbxfile)):
+                    parseObjects(sdkManager, scene, fbxfile)
+                    pass
+                pass
+            else:
+                parseObjects(sdkManager, scene, fbxfile)
+                pass
+            pass
+        pass
+    finally:
+        # 转换结束之后销毁场景
+        sdkManager.Destroy()
         pass
-    # 对场景三角化
-    converter = FbxGeometryConverter(sdkManager)
-    converter.Triangulate(scene, True)
-    axisSystem = FbxAxisSystem.OpenGL
-    axisSystem.ConvertScene(scene)
-    # 解析相机
-    parseCameras(sdkManager, scene, fbxfile)
-    # 解析模型
-    parseMeshs(sdkManager,   scene, fbxfile)
     
+    return True
+    pass # end func
+
+# 多进程时初始化子进程的配置
+def initWorker(option):
+    global config
+    config = option
+    pass # end func
+
+# 计算文件sha1
+def getFileHash(fileName):
+    sha1 = hashlib.sha1()
+    with open(fileName, "rb") as f:
+        block = f.read(1 << 20)
+        while block:
+            sha1.update(block)
+            block = f.read(1 << 20)
+            pass
+        pass
+    return sha1.hexdigest()
+    pass # end func
+
+# 转换器版本:版本号 + 脚本hash，修改脚本后缓存自动失效
+def getConverterVersion():
+    scripts = [os.path.abspath(__file__)]
+    if "FbxBinary" in sys.modules:
+        scripts.append(os.path.abspath(sys.modules["FbxBinary"].__file__))
+        pass
+    return VERSION + "-" + "-".join([getFileHash(script)[0:8] for script in scripts])
+    pass # end func
+
+# 获取参与缓存判断的参数
+def getCacheOptions():
+    return dict([(name, getattr(config, name)) for name in CACHE_OPTIONS])
+    pass # end func
+
+# 缓存文件，和Fbx文件放在同一目录
+def getManifestFileName(fbxfile):
+    return os.path.splitext(fbxfile)[0] + MANIFEST_TYPE
+    pass # end func
+
+# 读取缓存，不存在或者损坏时返回None
+def loadManifest(fbxfile):
+    fileName = getManifestFileName(fbxfile)
+    if not os.path.exists(fileName):
+        return None
+    try:
+        with open(fileName, "r") as f:
+            return json.load(f)
+        pass
+    except ValueError:
+        return None
+    pass # end func
+
+# 保存缓存，输出文件只记录文件名
+def saveManifest(fbxfile, manifest):
+    with open(getManifestFileName(fbxfile), "w") as f:
+        json.dump(manifest, f, indent = 4, sort_keys = True)
+        pass
+    pass # end func
+
+# 检测Fbx文件是否需要重新转换。大小以及修改时间未变化时不计算hash
+def isUpToDate(fbxfile, manifest, version, options):
+    if config.force or manifest is None:
+        return False
+    if manifest.get("version") != version or manifest.get("options") != options:
+        return False
+    fbxDir = os.path.dirname(fbxfile)
+    for output in manifest.get("outputs", []):
+        if not os.path.exists(os.path.join(fbxDir, output)):
+            return False
+        pass
+    stat = os.stat(fbxfile)
+    if manifest.get("size") == stat.st_size and manifest.get("mtime") == stat.st_mtime:
+        return True
+    if manifest.get("hash") != getFileHash(fbxfile):
+        return False
+    # 内容未变化，更新修改时间
+    manifest["size"]  = stat.st_size
+    manifest["mtime"] = stat.st_mtime
+    saveManifest(fbxfile, manifest)
+    return True
+    pass # end func
+
+# 删除上次转换生成、本次没有生成的文件(例如Fbx中已删除的模型)
+def removeOutdatedOutputs(fbxfile, manifest, outputs):
+    if manifest is None:
+        return
+    fbxDir = os.path.dirname(fbxfile)
+    for output in manifest.get("outputs", []):
+        fileName = os.path.join(fbxDir, output)
+        if output not in outputs and os.path.exists(fileName):
+            print("remove outdated file:%s" % fileName)
+            os.remove(fileName)
+            pass
+        pass
+    pass # end func
+
+# 转换单个FBX文件，失败不抛出异常。多进程时缓存日志，由主进程按文件顺序统一输出
+def convertFBX(fbxfile):
+    stdout      = sys.stdout
+    rawSize     = CompressedFile.totalRawSize
+    size        = CompressedFile.totalSize
+    compressTime= CompressedFile.totalTime
+    fileNum     = len(CompressedFile.fileNames)
+    if config.jobs > 1:
+        sys.stdout = StringIO.StringIO()
+        pass
+    start   = time.time()
+    error   = None
+    skipped = False
+    try:
+        version  = getConverterVersion()
+        options  = getCacheOptions()
+        manifest = loadManifest(fbxfile)
+        if isUpToDate(fbxfile, manifest, version, options):
+            print("skip unchanged fbx file:%s" % fbxfile)
+            skipped = True
+            pass
+        elif parseFBX(fbxfile, config):
+            # 记录缓存
+            outputs = [os.path.basename(fileName) for fileName in CompressedFile.fileNames[fileNum:]]
+            removeOutdatedOutputs(fbxfile, manifest, outputs)
+            stat = os.stat(fbxfile)
+            saveManifest(fbxfile, {
+                "version"   : version,
+                "options"   : options,
+                "hash"      : getFileHash(fbxfile),
+                "size"      : stat.st_size,
+                "mtime"     : stat.st_mtime,
+                "outputs"   : outputs,
+            })
+            pass
+        else:
+            error = "load failed"
+            pass
+        pass
+    except Exception:
+        error = traceback.format_exc()
+        print(error)
+        pass
+    # 回收场景节点之间循环引用的数据，批量转换时内存不随文件数增长
+    gc.collect()
+    # 转换失败时删除缓存，下次重新转换
+    if error is not None and os.path.exists(getManifestFileName(fbxfile)):
+        os.remove(getManifestFileName(fbxfile))
+        pass
+    result = {
+        "file"          : fbxfile,
+        "error"         : error,
+        "skipped"       : skipped,
+        "time"          : time.time() - start,
+        "rawSize"       : CompressedFile.totalRawSize - rawSize,
+        "size"          : CompressedFile.totalSize - size,
+        "compressTime"  : CompressedFile.totalTime - compressTime,
+        "peakMemoryKB"  : getPeakMemory(),
+        "log"           : None,
+    }
+    if config.jobs > 1:
+        result["log"] = sys.stdout.getvalue()
+        sys.stdout = stdout
+        pass
+    return result
+    pass # end func
+
+# 打印转换结果，多进程时日志每行加上文件名
+def printResult(result):
+    if result["log"] is None:
+        return
+    tag = os.path.basename(result["file"])
+    for line in result["log"].splitlines():
+        print("[%s] %s" % (tag, line))
+        pass
+    pass # end func
+
+# 打印所有文件的统计
+def printSummary(results, wallTime):
+    print("summary:")
+    failed  = 0
+    skipped = 0
+    for result in results:
+        if result["skipped"]:
+            skipped += 1
+            print("\tskip   %8.3fs %12s       %6s    %s" % (result["time"], "", "", result["file"]))
+            pass
+        elif result["error"] is None:
+            print("\tok     %8.3fs %12d bytes %6dMB  %s" % (result["time"], result["size"], result["peakMemoryKB"] / 1024, result["file"]))
+            pass
+        else:
+            failed += 1
+            print("\tfailed %8.3fs %12s       %6dMB  %s: %s" % (result["time"], "", result["peakMemoryKB"] / 1024, result["file"], result["error"].strip().splitlines()[-1]))
+            pass
+        pass
+    print("files:%d skipped:%d failed:%d jobs:%d wall time:%.3fs" % (len(results), skipped, failed, config.jobs, wallTime))
+    # 打印内存峰值，单进程时为所有文件的峰值
+    peak = max([result["peakMemoryKB"] for result in results] + [0])
+    print("peak memory:%dMB limit:%s" % (peak / 1024, "%dMB" % config.max_memory_mb if config.max_memory_mb > 0 else "none"))
+    # 打印压缩统计
+    rawSize      = sum([result["rawSize"] for result in results])
+    size         = sum([result["size"] for result in results])
+    compressTime = sum([result["compressTime"] for result in results])
+    print("compress level:%d strategy:%s %d -> %d bytes, %.3fs" % (config.level, config.strategy, rawSize, size, compressTime))
+    return failed
     pass # end func
 
 if __name__ == "__main__":
     
     # 解析参数
     config = parseArgument()
-    fbxList = scanFbxFiles(config.path)
+    fbxList = scanFbxFiles([config.path] if config.path else [])
     
-    for item in fbxList:
-        parseFBX(item, config)
+    start   = time.time()
+    results = []
+    if config.jobs > 1:
+        # 每个子进程只转换一个文件，各自拥有独立的SdkManager以及Scene
+        pool = multiprocessing.Pool(config.jobs, initWorker, (config,), 1)
+        for result in pool.imap(convertFBX, fbxList):
+            printResult(result)
+            results.append(result)
+            pass
+        pool.close()
+        pool.join()
+        pass
+    else:
+        for item in fbxList:
+            results.append(convertFBX(item))
+            pass
+        pass
+    
+    failed = printSummary(results, time.time() - start)
+    if failed > 0:
+        sys.exit(1)
         pass
     
     pass
@@ -0,0 +1,687 @@
+# coding: utf-8
+
+'''
+读取FbxParser.py生成的Mesh、Anim、Camera以及Pack文件，用于校验转换结果以及在Python中使用转换结果。
+
+支持不带索引的Mesh格式、索引Mesh格式(-weld)、压缩顶点Mesh格式(-quantize)、可变权重数Mesh格式(-influences)、
+逐帧动画以及关键帧动画(-reduce、-keys)、SubMesh以及每一帧的包围盒(-bounds)，格式说明见FbxParser.py。可变权重数的权重以及骨骼索引解码时补0为4个。
+每个文件只解压一次，所有数据块(顶点属性、三角形索引、包围盒、每帧矩阵或者四元数、关键帧)都是直接引用解压数据的数组，不拷贝。
+压缩的顶点数据以及关键帧轨迹在第一次访问时才按SubMesh解码为float。
+Pack文件(-pack)通过mmap映射，只解压读取的数据块。
+
+用法:
+    python Stage3DReader.py a.mesh              打印Mesh信息
+    python Stage3DReader.py a.mesh b.mesh       展开索引之后逐个三角形比较两个Mesh文件，完全相同时返回0，否则打印每个属性的最大误差
+    python Stage3DReader.py a.anim b.anim       打印并比较两个动画文件，关键帧动画展开为每一帧之后比较
+    python Stage3DReader.py a.camera b.camera   打印并比较两个相机文件
+    python Stage3DReader.py a.pack              打印Pack目录以及其中所有数据的信息
+
+'''
+
+import mmap
+import numpy
+import os
+import struct
+import sys
+import zlib
+
+# 顶点属性名称，以及每个顶点的float数量
+MESH_ATTRIBUTES = [("vertices", 3), ("uvs0", 2), ("uvs1", 2), ("normals", 3), ("weights", 4), ("boneIndices", 4)]
+# 可变权重数的属性
+INFLUENCE_ATTRIBUTES = ["weights", "boneIndices"]
+# 顶点属性格式:每个数据的类型，以及每个顶点的数据个数，None表示与属性相同
+FORMAT_FLOAT    = 0
+FORMAT_FIXED16  = 1
+FORMAT_HALF     = 2
+FORMAT_OCT16    = 3
+FORMAT_UNORM8   = 4
+FORMAT_UBYTE    = 5
+FORMAT_USHORT   = 6
+FORMAT_TYPES    = {
+    FORMAT_FLOAT    : ('<f4', None),
+    FORMAT_FIXED16  : ('<u2', None),
+    FORMAT_HALF     : ('<f2', None),
+    FORMAT_OCT16    : ('<i2', 2),
+    FORMAT_UNORM8   : ('<u1', None),
+    FORMAT_UBYTE    : ('<u1', None),
+    FORMAT_USHORT   : ('<u2', None),
+}
+# 负数版本号的Mesh格式:2:索引格式;3:压缩顶点格式;4:可变权重数格式
+MESH_VERSIONS   = [2, 3, 4]
+# 动画类型
+ANIM_FRAME      = 0     # 帧动画
+ANIM_MATRIX     = 1     # 矩阵骨骼动画
+ANIM_QUAT       = 2     # 四元数骨骼动画
+ANIM_KEYED      = 3     # 关键帧动画的类型偏移
+# Pack格式
+PACK_MAGIC       = "S3DP"
+PACK_VERSION     = 1
+PACK_ENTRY_TYPES = [".mesh", ".anim", ".camera"]
+PACK_CODEC_NONE  = 0
+PACK_CODEC_ZLIB  = 1
+
+# 小头二进制数据读取
+class ByteReader(object):
+    """docstring for ByteReader"""
+    def __init__(self, data):
+        super(ByteReader, self).__init__()
+        self.data     = data
+        self.position = 0
+        pass # end func
+
+    # 读int
+    def readInt(self):
+        value = struct.unpack_from('<i', self.data, self.position)[0]
+        self.position += 4
+        return value
+        pass # end func
+
+    # 读float
+    def readFloat(self):
+        value = struct.unpack_from('<f', self.data, self.position)[0]
+        self.position += 4
+        return value
+        pass # end func
+
+    # 读字符串
+    def readUTFBytes(self, size):
+        value = self.data[self.position : self.position + size]
+        self.position += size
+        return value
+        pass # end func
+
+    # 剩余字节数
+    def getBytesAvailable(self):
+        return len(self.data) - self.position
+        pass # end func
+
+    # 读数组，直接引用原始数据不拷贝
+    def readArray(self, dtype, count):
+        value = numpy.frombuffer(self.data, dtype, count, self.position)
+        self.position += value.nbytes
+        return value
+        pass # end func
+
+    pass # end class
+
+# 八面体解码法线
+def decodeOctahedron(data):
+    p = numpy.clip(data / 32767.0, -1, 1)
+    z = 1 - numpy.abs(p).sum(axis = 1)
+    sign  = numpy.where(p >= 0, 1.0, -1.0)
+    lower = z < 0
+    p[lower] = (1 - numpy.abs(p[lower][:, ::-1])) * sign[lower]
+    normals = numpy.column_stack([p, z])
+    length  = numpy.sqrt((normals * normals).sum(axis = 1))
+    return normals / numpy.where(length == 0, 1, length)[:, numpy.newaxis]
+    pass # end func
+
+# 顶点属性数据块，data为引用解压数据的数组，每个顶点一行
+class AttributeBlock(object):
+    """docstring for AttributeBlock"""
+    def __init__(self, width, format, params, data):
+        super(AttributeBlock, self).__init__()
+        self.width  = width         # 解码之后每个顶点的float数量
+        self.format = format        # 顶点属性格式
+        self.params = params        # 定点数的最小值、最大值
+        self.data   = data          # 原始数据
+        pass # end func
+
+    # 解码为float，float格式直接返回原始数据
+    def decode(self):
+        if self.format == FORMAT_FLOAT:
+            return self.data
+        values = self.data.astype(numpy.float64)
+        if self.format == FORMAT_FIXED16:
+            lower, upper = self.params[0:3], self.params[3:6]
+            values = lower + values / 65535 * numpy.where(upper > lower, upper - lower, 1)
+            pass
+        elif self.format == FORMAT_OCT16:
+            values = decodeOctahedron(values)
+            pass
+        elif self.format == FORMAT_UNORM8:
+            values = values / 255
+            pass
+        return values.astype(numpy.float32)
+        pass # end func
+
+    pass # end class
+
+# 读取顶点属性数据块，压缩顶点格式的属性长度之后为格式
+def readAttributeBlock(reader, width, quantized):
+    count  = reader.readInt()
+    format = FORMAT_FLOAT
+    params = None
+    if quantized:
+        format = reader.readInt()
+        pass
+    if format == FORMAT_FIXED16:
+        params = reader.readArray('<f4', 6).astype(numpy.float64)
+        pass
+    dtype, size = FORMAT_TYPES[format]
+    size   = size or width
+    data   = reader.readArray(dtype, count * size).reshape(count, size)
+    return AttributeBlock(width, format, params, data)
+    pass # end func
+
+# SubMesh数据
+class SubMeshData(object):
+    """docstring for SubMeshData"""
+    def __init__(self):
+        super(SubMeshData, self).__init__()
+        self.blocks     = {}        # 顶点属性数据块
+        self.influences = None      # 每个顶点的权重数，只有可变权重数格式
+        self.triangles  = None      # 三角形索引，不带索引的格式为None
+        self.bounds     = None      # 包围盒min、max，只有-bounds
+        self.attributes = None      # 解码之后的顶点属性，count*width的float数组，第一次访问时解码
+        pass # end func
+
+    # 顶点数量
+    def getCount(self, name):
+        return len(self.blocks[name].data)
+        pass # end func
+
+    # 获取解码之后的所有顶点属性，权重以及骨骼索引补0为4个
+    def getAttributes(self):
+        if self.attributes is None:
+            self.attributes = dict([(name, self.blocks[name].decode()) for name, _ in MESH_ATTRIBUTES])
+            for name, width in MESH_ATTRIBUTES:
+                attr = self.attributes[name]
+                if name in INFLUENCE_ATTRIBUTES and attr.shape[1] < width:
+                    padded = numpy.zeros((len(attr), width), attr.dtype)
+                    padded[:, 0:attr.shape[1]] = attr
+                    self.attributes[name] = padded
+                    pass
+                pass
+            pass
+        return self.attributes
+        pass # end func
+
+    # 展开索引，返回每个三角形顶点一行的顶点属性
+    def expand(self):
+        attributes = self.getAttributes()
+        if self.triangles is None:
+            return attributes
+        expanded = {}
+        for name, _ in MESH_ATTRIBUTES:
+            attr = attributes[name]
+            expanded[name] = attr[self.triangles] if len(attr) > 0 else attr
+            pass
+        return expanded
+        pass # end func
+
+    pass # end class
+
+# Mesh数据
+class MeshData(object):
+    """docstring for MeshData"""
+    def __init__(self):
+        super(MeshData, self).__init__()
+        self.version    = 1         # 1:不带索引格式;2:索引格式;3:压缩顶点格式;4:可变权重数格式
+        self.name       = None      # 名称
+        self.transform  = None      # 3行4列矩阵
+        self.subMeshes  = []        # SubMesh
+        self.bounds     = None      # 包围盒min、max
+        pass # end func
+
+    pass # end class
+
+# 解析解压之后的Mesh数据
+def parseMesh(data):
+    reader = ByteReader(data)
+    mesh   = MeshData()
+    # 旧格式第一个int为名称长度，索引格式为负数的版本号
+    size   = reader.readInt()
+    indexed= False
+    quantized = False
+    if size < 0:
+        mesh.version = -size
+        if mesh.version not in MESH_VERSIONS:
+            raise ValueError("unsupported mesh version:%d" % size)
+        indexed = mesh.version == 2 or reader.readInt() == 1
+        quantized = mesh.version == 3 or (mesh.version == 4 and reader.readInt() == 1)
+        size = reader.readInt()
+        pass
+    mesh.name       = reader.readUTFBytes(size)
+    mesh.transform  = reader.readArray('<f4', 12).reshape(3, 4)
+    subNum = reader.readInt()
+    for i in range(subNum):
+        subMesh = SubMeshData()
+        if mesh.version == 4:
+            subMesh.influences = reader.readInt()
+            pass
+        for name, width in MESH_ATTRIBUTES:
+            if subMesh.influences is not None and name in INFLUENCE_ATTRIBUTES:
+                width = subMesh.influences
+                pass
+            subMesh.blocks[name] = readAttributeBlock(reader, width, quantized)
+            pass
+        if indexed:
+            count = reader.readInt()
+            subMesh.triangles = reader.readArray('<u2', count)
+            pass
+        mesh.subMeshes.append(subMesh)
+        pass
+    mesh.bounds = reader.readArray('<f4', 6)
+    # -bounds时之后为每个SubMesh的包围盒
+    if reader.getBytesAvailable() > 0:
+        for subMesh in mesh.subMeshes:
+            subMesh.bounds = reader.readArray('<f4', 6)
+            pass
+        pass
+    return mesh
+    pass # end func
+
+# 关键帧轨迹
+class TrackData(object):
+    """docstring for TrackData"""
+    def __init__(self, keys, values):
+        super(TrackData, self).__init__()
+        self.keys   = keys          # 关键帧序号，ushort数组
+        self.values = values        # 关键帧数据，keyNum*width的float数组
+        pass # end func
+
+    # 线性插值展开为每一帧，四元数插值之后归一化
+    def expand(self, frameNum, quat):
+        frames = numpy.arange(frameNum)
+        keys   = self.keys.astype(numpy.float64)
+        out    = numpy.empty((frameNum, self.values.shape[1]), numpy.float32)
+        for i in range(self.values.shape[1]):
+            out[:, i] = numpy.interp(frames, keys, self.values[:, i])
+            pass
+        if quat:
+            length = numpy.sqrt((out[:, 4:8] ** 2).sum(axis = 1))
+            out[:, 4:8] /= numpy.where(length == 0, 1, length)[:, numpy.newaxis]
+            pass
+        return out
+        pass # end func
+
+    pass # end class
+
+# 读取一条关键帧轨迹
+def readTrack(reader, width):
+    keyNum = reader.readInt()
+    keys   = reader.readArray('<u2', keyNum)
+    values = reader.readArray('<f4', keyNum * width).reshape(keyNum, width)
+    return TrackData(keys, values)
+    pass # end func
+
+# 一段动画数据:帧动画、相机动画或者一个SubMesh的骨骼动画
+class ClipData(object):
+    """docstring for ClipData"""
+    def __init__(self, frameNum, boneNum, width, quat):
+        super(ClipData, self).__init__()
+        self.frameNum   = frameNum  # 帧数
+        self.boneNum    = boneNum   # 骨骼数量，帧动画以及相机动画为1
+        self.width      = width     # 每根骨骼每帧的float数量，矩阵为12，位移以及四元数为8
+        self.quat       = quat      # 是否为四元数
+        self.data       = None      # 逐帧数据，frameNum*boneNum*width的float数组
+        self.tracks     = None      # 关键帧数据，每根骨骼一条轨迹
+        pass # end func
+
+    # 获取每一帧的数据，frameNum*boneNum*width。逐帧数据直接返回，关键帧数据展开并缓存
+    def getFrames(self):
+        if self.data is None:
+            self.data = numpy.empty((self.frameNum, self.boneNum, self.width), numpy.float32)
+            for i in range(self.boneNum):
+                self.data[:, i] = self.tracks[i].expand(self.frameNum, self.quat)
+                pass
+            pass
+        return self.data
+        pass # end func
+
+    pass # end class
+
+# 读取一段动画，keyed为关键帧动画
+def readClip(reader, frameNum, boneNum, quat, keyed):
+    width = 8 if quat else 12
+    clip  = ClipData(frameNum, boneNum, width, quat)
+    if keyed:
+        clip.tracks = [readTrack(reader, width) for i in range(boneNum)]
+        pass
+    else:
+        clip.data = reader.readArray('<f4', frameNum * boneNum * width).reshape(frameNum, boneNum, width)
+        pass
+    return clip
+    pass # end func
+
+# Anim数据
+class AnimData(object):
+    """docstring for AnimData"""
+    def __init__(self):
+        super(AnimData, self).__init__()
+        self.type       = ANIM_FRAME    # 0:帧动画;1:矩阵骨骼动画;2:四元数骨骼动画
+        self.keyed      = False         # 是否为关键帧动画
+        self.clips      = []            # 帧动画只有一段，骨骼动画每个SubMesh一段
+        self.bounds     = None          # 每一帧的包围盒以及包围球，帧数*10，只有-bounds
+        pass # end func
+
+    pass # end class
+
+# 解析解压之后的Anim数据
+def parseAnim(data):
+    reader = ByteReader(data)
+    anim   = AnimData()
+    animType   = reader.readInt()
+    anim.keyed = animType >= ANIM_KEYED
+    anim.type  = animType % ANIM_KEYED
+    count  = reader.readInt()
+    if anim.type == ANIM_FRAME:
+        anim.clips.append(readClip(reader, count, 1, False, anim.keyed))
+        pass
+    else:
+        for i in range(count):
+            frameNum = reader.readInt()
+            boneNum  = reader.readInt()
+            anim.clips.append(readClip(reader, frameNum, boneNum, anim.type == ANIM_QUAT, anim.keyed))
+            pass
+        pass
+    # -bounds时之后为每一帧的包围盒以及包围球
+    if reader.getBytesAvailable() > 0:
+        count = reader.readInt()
+        anim.bounds = reader.readArray('<f4', count * 10).reshape(count, 10)
+        pass
+    return anim
+    pass # end func
+
+# Camera数据
+class CameraData(object):
+    """docstring for CameraData"""
+    def __init__(self):
+        super(CameraData, self).__init__()
+        self.name           = None  # 名称
+        self.aspectWidth    = 0     # 视口宽度
+        self.aspectHeight   = 0     # 视口高度
+        self.near           = 0     # near
+        self.far            = 0     # far
+        self.fieldOfView    = 0     # fieldOfView
+        self.transform      = None  # 3行4列矩阵
+        self.anim           = None  # 相机动画
+        pass # end func
+
+    pass # end class
+
+# 解析解压之后的Camera数据
+def parseCamera(data):
+    reader = ByteReader(data)
+    camera = CameraData()
+    camera.name         = reader.readUTFBytes(reader.readInt())
+    camera.aspectWidth  = reader.readFloat()
+    camera.aspectHeight = reader.readFloat()
+    camera.near         = reader.readFloat()
+    camera.far          = reader.readFloat()
+    camera.fieldOfView  = reader.readFloat()
+    camera.transform    = reader.readArray('<f4', 12).reshape(3, 4)
+    # 帧数为负数时为关键帧动画
+    count = reader.readInt()
+    camera.anim = readClip(reader, abs(count), 1, False, count < 0)
+    return camera
+    pass # end func
+
+# 每种文件的解析函数
+PARSERS = {
+    ".mesh"     : parseMesh,
+    ".anim"     : parseAnim,
+    ".camera"   : parseCamera,
+}
+
+# 读取并解压Mesh、Anim或者Camera文件，按照扩展名解析
+def readFile(fileName):
+    return PARSERS[os.path.splitext(fileName)[1]](zlib.decompress(open(fileName, 'rb').read()))
+    pass # end func
+
+# 读取Mesh文件
+def readMesh(fileName):
+    return parseMesh(zlib.decompress(open(fileName, 'rb').read()))
+    pass # end func
+
+# 读取Anim文件
+def readAnim(fileName):
+    return parseAnim(zlib.decompress(open(fileName, 'rb').read()))
+    pass # end func
+
+# 读取Camera文件
+def readCamera(fileName):
+    return parseCamera(zlib.decompress(open(fileName, 'rb').read()))
+    pass # end func
+
+# Pack目录条目
+class PackEntry(object):
+    """docstring for PackEntry"""
+    def __init__(self, entryType, name, offset, length, rawLength, codec):
+        super(PackEntry, self).__init__()
+        self.type       = entryType     # 类型，.mesh、.anim、.camera
+        self.name       = name          # 名称，与单独输出时的文件名相同
+        self.offset     = offset        # 数据块位置
+        self.length     = length        # 数据块长度
+        self.rawLength  = rawLength     # 解压之后的长度
+        self.codec      = codec         # 压缩方式
+        pass # end func
+
+    pass # end class
+
+# Pack文件，通过mmap映射，读取时只解压需要的数据块
+class PackReader(object):
+    """docstring for PackReader"""
+    def __init__(self, fileName):
+        super(PackReader, self).__init__()
+        self.fileName = fileName
+        self.file     = open(fileName, 'rb')
+        self.data     = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+        self.entries  = []              # 按照写入顺序的目录
+        self.names    = {}              # 名称 -> 目录条目
+        reader = ByteReader(self.data)
+        if reader.readUTFBytes(4) != PACK_MAGIC:
+            raise ValueError("%s is not a pack file" % fileName)
+        version = reader.readInt()
+        if version != PACK_VERSION:
+            raise ValueError("%s unsupported pack version:%d" % (fileName, version))
+        count = reader.readInt()
+        reader.position = reader.readInt()
+        for i in range(count):
+            entryType = PACK_ENTRY_TYPES[reader.readInt()]
+            name      = reader.readUTFBytes(reader.readInt())
+            entry     = PackEntry(entryType, name, reader.readInt(), reader.readInt(), reader.readInt(), reader.readInt())
+            self.entries.append(entry)
+            self.names[name] = entry
+            pass
+        pass # end func
+
+    # 获取指定类型的所有条目
+    def getEntries(self, entryType = None):
+        return [entry for entry in self.entries if entryType is None or entry.type == entryType]
+        pass # end func
+
+    # 读取并解压一个数据块，未压缩的数据块直接引用映射的数据不拷贝
+    def read(self, name):
+        entry = self.names[name]
+        if entry.codec == PACK_CODEC_NONE:
+            return buffer(self.data, entry.offset, entry.length)
+        return zlib.decompress(self.data[entry.offset : entry.offset + entry.length])
+        pass # end func
+
+    # 读取并解析一个数据块，按照类型返回MeshData、AnimData或者CameraData
+    def readEntry(self, name):
+        return PARSERS[self.names[name].type](self.read(name))
+        pass # end func
+
+    # 读取Mesh
+    def readMesh(self, name):
+        return parseMesh(self.read(name))
+        pass # end func
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+        pass # end func
+
+    pass # end class
+
+# 打印Pack目录
+def printPack(pack):
+    print("%s: entries:%d" % (pack.fileName, len(pack.entries)))
+    for entry in pack.entries:
+        print("\t%-8s %-32s offset:%d length:%d raw:%d codec:%d" % (entry.type, entry.name, entry.offset, entry.length, entry.rawLength, entry.codec))
+        pass
+    pass # end func
+
+# 打印Mesh信息
+def printMesh(fileName, mesh):
+    print("%s: version:%d name:%s subMesh:%d" % (fileName, mesh.version, mesh.name, len(mesh.subMeshes)))
+    for i in range(len(mesh.subMeshes)):
+        subMesh = mesh.subMeshes[i]
+        counts  = ["%s:%d" % (name, subMesh.getCount(name)) for name, _ in MESH_ATTRIBUTES]
+        if subMesh.triangles is not None:
+            counts.append("triangles:%d" % (len(subMesh.triangles) / 3))
+            pass
+        if subMesh.influences is not None:
+            counts.append("influences:%d" % subMesh.influences)
+            pass
+        if subMesh.bounds is not None:
+            counts.append("bounds:%s" % " ".join(["%f" % value for value in subMesh.bounds]))
+            pass
+        print("\tsubMesh%d %s" % (i, " ".join(counts)))
+        pass
+    pass # end func
+
+# 打印Anim信息
+def printAnim(fileName, anim):
+    print("%s: type:%d keyed:%s clips:%d" % (fileName, anim.type, anim.keyed, len(anim.clips)))
+    for i in range(len(anim.clips)):
+        clip = anim.clips[i]
+        keys = ""
+        if clip.tracks is not None:
+            keys = " keys:%d" % sum([len(track.keys) for track in clip.tracks])
+            pass
+        print("\tclip%d frames:%d bones:%d width:%d%s" % (i, clip.frameNum, clip.boneNum, clip.width, keys))
+        pass
+    if anim.bounds is not None and len(anim.bounds) > 0:
+        lower = anim.bounds[:, 0:3].min(axis = 0)
+        upper = anim.bounds[:, 3:6].max(axis = 0)
+        print("\tbounds frames:%d min:[%f %f %f] max:[%f %f %f] max radius:%f" % (len(anim.bounds), lower[0], lower[1], lower[2], upper[0], upper[1], upper[2], anim.bounds[:, 9].max()))
+        pass
+    pass # end func
+
+# 打印Camera信息
+def printCamera(fileName, camera):
+    print("%s: name:%s aspect:%fx%f near:%f far:%f fieldOfView:%f frames:%d keyed:%s" % (fileName, camera.name, camera.aspectWidth, camera.aspectHeight, camera.near, camera.far, camera.fieldOfView, camera.anim.frameNum, camera.anim.tracks is not None))
+    pass # end func
+
+# 展开索引并且合并所有SubMesh的顶点属性
+def expandMesh(mesh):
+    attributes = {}
+    for name, width in MESH_ATTRIBUTES:
+        values = [subMesh.expand()[name] for subMesh in mesh.subMeshes]
+        attributes[name] = numpy.concatenate(values) if len(values) > 0 else numpy.zeros((0, width), numpy.float32)
+        pass
+    return attributes
+    pass # end func
+
+# 比较两个数组，返回不同之处
+def compareArrays(name, a, b):
+    if a.tostring() == b.tostring():
+        return []
+    if a.shape == b.shape:
+        return ["%s max error:%f" % (name, numpy.abs(a.astype(numpy.float64) - b).max())]
+    return ["%s shape:%s %s" % (name, a.shape, b.shape)]
+    pass # end func
+
+# 展开索引之后比较两个Mesh的所有三角形，返回不同之处。
+# SubMesh拆分方式不同时，骨骼索引为各自SubMesh内的索引，不能直接比较
+def compareMeshes(meshA, meshB):
+    diffs = []
+    if meshA.name != meshB.name:
+        diffs.append("name")
+        pass
+    if meshA.transform.tostring() != meshB.transform.tostring():
+        diffs.append("transform")
+        pass
+    if meshA.bounds.tostring() != meshB.bounds.tostring():
+        diffs.append("bounds")
+        pass
+    attributesA = expandMesh(meshA)
+    attributesB = expandMesh(meshB)
+    for name, _ in MESH_ATTRIBUTES:
+        a = attributesA[name]
+        b = attributesB[name]
+        if a.tostring() == b.tostring():
+            continue
+        if a.shape == b.shape:
+            diffs.append("%s max error:%f" % (name, numpy.abs(a.astype(numpy.float64) - b).max()))
+            pass
+        else:
+            diffs.append("%s num:%d %d" % (name, len(a), len(b)))
+            pass
+        pass
+    return diffs
+    pass # end func
+
+# 展开关键帧之后比较两个动画的每一帧，返回不同之处
+def compareAnims(animA, animB):
+    diffs = []
+    if animA.type != animB.type:
+        return ["type:%d %d" % (animA.type, animB.type)]
+    if len(animA.clips) != len(animB.clips):
+        return ["clips:%d %d" % (len(animA.clips), len(animB.clips))]
+    for i in range(len(animA.clips)):
+        diffs += compareArrays("clip%d" % i, animA.clips[i].getFrames(), animB.clips[i].getFrames())
+        pass
+    if animA.bounds is not None and animB.bounds is not None:
+        diffs += compareArrays("bounds", animA.bounds, animB.bounds)
+        pass
+    return diffs
+    pass # end func
+
+# 比较两个相机，返回不同之处
+def compareCameras(cameraA, cameraB):
+    diffs = []
+    for name in ["name", "aspectWidth", "aspectHeight", "near", "far", "fieldOfView"]:
+        if getattr(cameraA, name) != getattr(cameraB, name):
+            diffs.append(name)
+            pass
+        pass
+    diffs += compareArrays("transform", cameraA.transform, cameraB.transform)
+    diffs += compareArrays("anim", cameraA.anim.getFrames(), cameraB.anim.getFrames())
+    return diffs
+    pass # end func
+
+# 每种数据的打印以及比较函数
+HANDLERS = {
+    MeshData    : (printMesh,   compareMeshes),
+    AnimData    : (printAnim,   compareAnims),
+    CameraData  : (printCamera, compareCameras),
+}
+
+if __name__ == "__main__":
+
+    if len(sys.argv) == 2 and os.path.splitext(sys.argv[1])[1] == ".pack":
+        pack = PackReader(sys.argv[1])
+        printPack(pack)
+        for entry in pack.entries:
+            item = pack.readEntry(entry.name)
+            HANDLERS[type(item)][0](entry.name, item)
+            pass
+        pack.close()
+        sys.exit(0)
+        pass
+
+    items = [readFile(fileName) for fileName in sys.argv[1:3]]
+    for i in range(len(items)):
+        HANDLERS[type(items[i])][0](sys.argv[i + 1], items[i])
+        pass
+
+    if len(items) == 2:
+        diffs = ["file type"]
+        if type(items[0]) == type(items[1]):
+            diffs = HANDLERS[type(items[0])][1](items[0], items[1])
+            pass
+        for diff in diffs:
+            print("different: %s" % diff)
+            pass
+        if len(diffs) > 0:
+            sys.exit(1)
+            pass
+        print("identical")
+        pass
+
+    pass
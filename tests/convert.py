@@ -0,0 +1,48 @@
+# coding: utf-8
+
+'''
+测试用的转换工具:把Fbx文件复制到临时目录，通过命令行运行FbxParser.py转换，返回输出目录。
+'''
+
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# 仓库目录
+ROOT_DIR    = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 转换脚本
+PARSER_FILE = os.path.join(ROOT_DIR, "FbxParser.py")
+# 示例Fbx文件
+FBX_FILES   = sorted(glob.glob(os.path.join(ROOT_DIR, "fbx", "*.FBX")))
+# 输出文件类型
+OUTPUT_TYPES = [".mesh", ".anim", ".camera", ".pack"]
+
+# 在临时目录中转换fbxFiles，返回临时目录。转换失败时抛出异常并附带日志。
+# 不指定-path，FbxParser.py默认扫描当前目录，即临时目录
+def convert(fbxFiles, options):
+    outDir = tempfile.mkdtemp(prefix = "fbxparser_")
+    for fbxFile in fbxFiles:
+        shutil.copy(fbxFile, outDir)
+        pass
+    command = [sys.executable, PARSER_FILE] + list(options)
+    process = subprocess.Popen(command, cwd = outDir, stdout = subprocess.PIPE, stderr = subprocess.STDOUT)
+    log = process.communicate()[0]
+    if process.returncode != 0:
+        shutil.rmtree(outDir)
+        raise RuntimeError("%s failed:\n%s" % (" ".join(command), log))
+    return outDir
+    pass # end func
+
+# 列出目录中的所有输出文件名
+def listOutputs(outDir):
+    return sorted([name for name in os.listdir(outDir) if os.path.splitext(name)[1] in OUTPUT_TYPES])
+    pass # end func
+
+# 读取文件内容
+def readBytes(fileName):
+    with open(fileName, "rb") as f:
+        return f.read()
+    pass # end func
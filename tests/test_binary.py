@@ -0,0 +1,38 @@
+# coding: utf-8
+
+'''
+FbxBinary.py测试:同一个进程连续读取多个文件时，场景之间不共享全局设置。
+
+运行:
+    python -m unittest discover tests
+'''
+
+import os
+import unittest
+
+import FbxBinary
+from tests.convert import ROOT_DIR
+
+# 自定义帧率的TimeMode
+TIME_MODE_CUSTOM = 14
+
+class BinaryTest(unittest.TestCase):
+    """docstring for BinaryTest"""
+
+    def tearDown(self):
+        FbxBinary.customFrameRate = 30.0
+        pass # end func
+
+    # 上一个文件的自定义帧率不影响下一个没有自定义帧率的文件
+    def testCustomFrameRateReset(self):
+        FbxBinary.customFrameRate = 12.0
+        manager, scene = FbxBinary.InitializeSdkObjects()
+        self.assertTrue(FbxBinary.LoadScene(manager, scene, os.path.join(ROOT_DIR, "fbx", "Test22.FBX")))
+        self.assertTrue(scene.GetGlobalSettings().GetCustomFrameRate() <= 0)
+        self.assertEqual(FbxBinary.getFrameRate(TIME_MODE_CUSTOM), 30.0)
+        pass # end func
+
+    pass # end class
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+# coding: utf-8
+
+'''
+-keys的回退条件测试:曲线外推方式以及注视目标。
+
+运行:
+    python -m unittest discover tests
+'''
+
+import os
+import struct
+import unittest
+
+import FbxBinary
+import FbxParser
+from tests.convert import ROOT_DIR
+
+# 曲线的替代对象，只提供getCurveShape用到的接口
+class Curve(object):
+    """docstring for Curve"""
+    def __init__(self, values, interpolation, pre, post):
+        super(Curve, self).__init__()
+        self.values         = values
+        self.interpolation  = interpolation
+        self.pre            = pre
+        self.post           = post
+        pass # end func
+
+    def KeyGetValue(self, index):
+        return self.values[index]
+
+    def KeyGetInterpolation(self, index):
+        return self.interpolation
+
+    def GetPreExtrapolation(self):
+        return self.pre
+
+    def GetPostExtrapolation(self):
+        return self.post
+
+    pass # end class
+
+# 编码一个二进制节点记录(7.4之前的32位节点头)，properties为(类型, 打包之后的数据)列表
+def encodeRecord(offset, name, properties, children = []):
+    props  = b"".join([typeCode + data for typeCode, data in properties])
+    body   = struct.pack("<B", len(name)) + name + props
+    offset+= 12 + len(body)
+    data   = b""
+    for child in children:
+        childData = child(offset + len(data))
+        data += childData
+        pass
+    if len(children) > 0:
+        data += b"\0" * 13
+        pass
+    return struct.pack("<III", offset + len(data), len(properties), len(props)) + body + data
+    pass # end func
+
+# 通过二进制读取解析外推记录，Type为单字节C类型，与FbxSdk写出的文件相同
+def extrapolationRecord(typeChar):
+    header = FbxBinary.FBX_BINARY_MAGIC + b"\x1a\x00" + struct.pack("<I", 7400)
+    typeRecord       = lambda offset: encodeRecord(offset, b"Type", [(b"C", typeChar)])
+    repetitionRecord = lambda offset: encodeRecord(offset, b"Repetition", [(b"I", struct.pack("<i", 0))])
+    data = header + encodeRecord(len(header), b"Post-Extrapolation", [], [typeRecord, repetitionRecord])
+    root = FbxBinary.FbxBinaryReader(data).read()
+    return root.find("Post-Extrapolation")
+    pass # end func
+
+class CurveKeysTest(unittest.TestCase):
+    """docstring for CurveKeysTest"""
+
+    def testExtrapolationShape(self):
+        times    = [0, 100]
+        constant = FbxBinary.FbxAnimCurveBase.eConstant
+        cycle    = FbxBinary.FbxAnimCurveBase.eRepetition
+        linear   = FbxBinary.FbxAnimCurveDef.eInterpolationLinear
+        # 关键帧之间不受外推方式影响
+        curve = Curve([0.0, 1.0], linear, cycle, cycle)
+        self.assertEqual(FbxParser.getCurveShape(times, curve, 0, 100), (FbxParser.CURVE_LINEAR, False))
+        # 关键帧之外只有常量外推为常量
+        curve = Curve([0.0, 1.0], linear, constant, constant)
+        self.assertEqual(FbxParser.getCurveShape(times, curve, -50, -10), (FbxParser.CURVE_CONSTANT, False))
+        self.assertEqual(FbxParser.getCurveShape(times, curve, 100, 200), (FbxParser.CURVE_CONSTANT, False))
+        curve = Curve([0.0, 1.0], linear, cycle, FbxBinary.FbxAnimCurveBase.eMirrorRepetition)
+        self.assertEqual(FbxParser.getCurveShape(times, curve, -50, -10), (FbxParser.CURVE_OTHER, False))
+        self.assertEqual(FbxParser.getCurveShape(times, curve, 100, 200), (FbxParser.CURVE_OTHER, False))
+        pass # end func
+
+    def testReadExtrapolation(self):
+        self.assertEqual(FbxBinary.readExtrapolation(None), FbxBinary.FbxAnimCurveBase.eConstant)
+        self.assertEqual(FbxBinary.readExtrapolation(extrapolationRecord(b"C")), FbxBinary.FbxAnimCurveBase.eConstant)
+        self.assertEqual(FbxBinary.readExtrapolation(extrapolationRecord(b"R")), FbxBinary.FbxAnimCurveBase.eRepetition)
+        self.assertEqual(FbxBinary.readExtrapolation(extrapolationRecord(b"r")), FbxBinary.FbxAnimCurveBase.eRelativeRepetition)
+        self.assertEqual(FbxBinary.readExtrapolation(extrapolationRecord(b"M")), FbxBinary.FbxAnimCurveBase.eMirrorRepetition)
+        self.assertEqual(FbxBinary.readExtrapolation(extrapolationRecord(b"K")), FbxBinary.FbxAnimCurveBase.eKeepSlope)
+        # 无法识别的类型按照非常量处理
+        self.assertEqual(FbxBinary.readExtrapolation(extrapolationRecord(b"x")), FbxBinary.FbxAnimCurveBase.eRepetition)
+        pass # end func
+
+    def testLookAtTarget(self):
+        manager, scene = FbxBinary.InitializeSdkObjects()
+        self.assertTrue(FbxBinary.LoadScene(manager, scene, os.path.join(ROOT_DIR, "fbx", "Test22.FBX")))
+        nodes  = dict([(node.GetName(), node) for node in scene.getSrcObjects(FbxBinary.FbxNode)])
+        camera = nodes["Camera001"]
+        self.assertEqual(camera.GetTarget().GetName(), "Camera001.Target")
+        self.assertTrue(nodes["Box001"].GetTarget() is None)
+        # 有注视目标的节点逐帧计算
+        frameNum, frames, block = FbxParser.sampleCurveKeys(scene, camera, FbxParser.TransformCache(0))
+        self.assertTrue(frames is None)
+        self.assertEqual(len(block), frameNum)
+        pass # end func
+
+    pass # end class
+
+if __name__ == "__main__":
+    unittest.main()
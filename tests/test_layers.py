@@ -0,0 +1,51 @@
+# coding: utf-8
+
+'''
+图层解析测试:按边映射的UV只在输出UV时报错，不影响不需要UV的转换。
+
+运行:
+    python -m unittest discover tests
+'''
+
+import os
+import unittest
+
+import FbxBinary
+import FbxParser
+from tests.convert import ROOT_DIR
+
+class LayerTest(unittest.TestCase):
+    """docstring for LayerTest"""
+
+    # 读取Test22中的Box001，UV改为按边映射
+    def loadByEdgeMesh(self):
+        manager, scene = FbxBinary.InitializeSdkObjects()
+        self.assertTrue(FbxBinary.LoadScene(manager, scene, os.path.join(ROOT_DIR, "fbx", "Test22.FBX")))
+        for i in range(scene.GetSrcObjectCount(FbxBinary.FbxMesh.ClassId)):
+            fbxMesh = scene.GetSrcObject(FbxBinary.FbxMesh.ClassId, i)
+            if fbxMesh.GetNode().GetName() == "Box001":
+                fbxMesh.GetLayer(0).GetUVs().mappingMode = FbxBinary.FbxLayerElement.eByEdge
+                mesh = FbxParser.Mesh()
+                mesh.fbxMesh = fbxMesh
+                mesh.name    = "Box001"
+                return mesh
+            pass
+        self.fail("Box001 not found")
+        pass # end func
+
+    def testByEdgeUVNotRequested(self):
+        mesh = self.loadByEdgeMesh()
+        mesh.parseIndices()
+        self.assertEqual(len(mesh.verticesIndices), mesh.fbxMesh.GetPolygonCount() * 3)
+        pass # end func
+
+    def testByEdgeUVRequested(self):
+        mesh = self.loadByEdgeMesh()
+        mesh.parseIndices()
+        self.assertRaises(ValueError, mesh.parseUV0)
+        pass # end func
+
+    pass # end class
+
+if __name__ == "__main__":
+    unittest.main()
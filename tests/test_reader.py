@@ -0,0 +1,246 @@
+# coding: utf-8
+
+'''
+往返测试:转换fbx目录下的示例文件以及data/skin.fbx，使用Stage3DReader.py读取，与不带对应参数的转换结果比较。
+data/skin.fbx为合成的蒙皮场景:4根骨骼、1个蒙皮Mesh以及挂在骨骼上的相机，用于骨骼动画以及可变权重数格式。
+
+运行:
+    python -m unittest discover tests
+'''
+
+import glob
+import os
+import shutil
+import struct
+import unittest
+import zlib
+
+import numpy
+
+import Stage3DReader
+from tests.convert import FBX_FILES, convert, readBytes
+
+# 测试用的Fbx文件
+TEST_FILES  = FBX_FILES + [os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skin.fbx")]
+# 所有测试共用的参数
+BASE_OPTIONS = ["-normal", "-uv0", "-uv1", "-anim"]
+# 压缩顶点位置的最大误差，示例文件的包围盒范围/65535/2
+QUANTIZE_POSITION_ERROR = 4.6e-4
+
+# 读取目录中的所有输出文件，返回文件名 -> MeshData、AnimData或者CameraData
+def readOutputs(outDir):
+    outputs = {}
+    for fileName in glob.glob(os.path.join(outDir, "*")):
+        if os.path.splitext(fileName)[1] in Stage3DReader.PARSERS:
+            outputs[os.path.basename(fileName)] = Stage3DReader.readFile(fileName)
+            pass
+        pass
+    return outputs
+    pass # end func
+
+# 按照类型过滤输出
+def filterOutputs(outputs, itemType):
+    return sorted([(name, item) for name, item in outputs.items() if isinstance(item, itemType)])
+    pass # end func
+
+# 读取Anim文件的第一个int，即原始动画类型，关键帧动画为类型+3
+def readAnimType(fileName):
+    return struct.unpack_from("<i", zlib.decompress(readBytes(fileName)))[0]
+    pass # end func
+
+class RoundTripTest(unittest.TestCase):
+    """docstring for RoundTripTest"""
+    outDirs = {}    # 参数 -> 输出目录，每组参数只转换一次
+
+    @classmethod
+    def tearDownClass(cls):
+        for outDir in cls.outDirs.values():
+            shutil.rmtree(outDir)
+            pass
+        cls.outDirs = {}
+        pass # end func
+
+    # 使用BASE_OPTIONS以及extra转换所有测试文件，返回输出目录
+    def convert(self, *extra):
+        options = tuple(BASE_OPTIONS) + extra
+        if options not in self.outDirs:
+            self.outDirs[options] = convert(TEST_FILES, options)
+            pass
+        return self.outDirs[options]
+        pass # end func
+
+    # 读取转换结果
+    def read(self, *extra):
+        return readOutputs(self.convert(*extra))
+        pass # end func
+
+    # 比较两组输出的所有Mesh、Anim以及Camera，关键帧展开之后数值必须完全相同。
+    # 插值得到的0可能为-0，所以动画按照数值比较而不是逐字节比较
+    def assertSameOutputs(self, expected, actual):
+        self.assertEqual(sorted(expected.keys()), sorted(actual.keys()))
+        for name in sorted(expected.keys()):
+            a = expected[name]
+            b = actual[name]
+            if isinstance(a, Stage3DReader.MeshData):
+                self.assertEqual(Stage3DReader.compareMeshes(a, b), [], name)
+                pass
+            elif isinstance(a, Stage3DReader.AnimData):
+                self.assertEqual((a.type, len(a.clips)), (b.type, len(b.clips)), name)
+                for clipA, clipB in zip(a.clips, b.clips):
+                    numpy.testing.assert_array_equal(clipA.getFrames(), clipB.getFrames(), name)
+                    pass
+                pass
+            else:
+                self.assertEqual([diff for diff in Stage3DReader.compareCameras(a, b) if not diff.startswith("anim")], [], name)
+                numpy.testing.assert_array_equal(a.anim.getFrames(), b.anim.getFrames(), name)
+                pass
+            pass
+        pass # end func
+
+    def testWeld(self):
+        expected = self.read()
+        actual   = self.read("-weld")
+        for name, mesh in filterOutputs(actual, Stage3DReader.MeshData):
+            self.assertEqual(mesh.version, 2, name)
+            for subMesh in mesh.subMeshes:
+                self.assertTrue(subMesh.triangles is not None)
+                self.assertLessEqual(subMesh.getCount("vertices"), len(subMesh.triangles))
+                pass
+            pass
+        self.assertSameOutputs(expected, actual)
+        pass # end func
+
+    def testQuantize(self):
+        expected = self.read()
+        actual   = self.read("-quantize")
+        for name, mesh in filterOutputs(actual, Stage3DReader.MeshData):
+            self.assertEqual(mesh.version, 3, name)
+            a = Stage3DReader.expandMesh(expected[name])
+            b = Stage3DReader.expandMesh(mesh)
+            for attribute, _ in Stage3DReader.MESH_ATTRIBUTES:
+                self.assertEqual(a[attribute].shape, b[attribute].shape, "%s %s" % (name, attribute))
+                pass
+            error = numpy.abs(a["vertices"].astype(numpy.float64) - b["vertices"]).max()
+            self.assertLessEqual(error, QUANTIZE_POSITION_ERROR, name)
+            pass
+        pass # end func
+
+    def testInfluences(self):
+        expected = self.read("-min_weight", "0.3")
+        actual   = self.read("-min_weight", "0.3", "-influences")
+        meshes   = filterOutputs(actual, Stage3DReader.MeshData)
+        for name, mesh in meshes:
+            self.assertEqual(mesh.version, 4, name)
+            pass
+        # 裁剪之后蒙皮的每个顶点最多受2根骨骼影响
+        skin = actual["skin_Skin0.mesh"]
+        self.assertEqual([subMesh.influences for subMesh in skin.subMeshes], [2] * len(skin.subMeshes))
+        self.assertEqual(skin.subMeshes[0].blocks["weights"].data.shape[1], 2)
+        self.assertSameOutputs(expected, actual)
+        pass # end func
+
+    def testReduce(self):
+        expected = self.read()
+        actual   = self.read("-reduce")
+        outDir   = self.convert("-reduce")
+        self.assertEqual(readAnimType(os.path.join(outDir, "teapot_Teapot001.anim")), 3)
+        self.assertEqual(readAnimType(os.path.join(outDir, "skin_Skin0.anim")), 4)
+        for name, anim in filterOutputs(actual, Stage3DReader.AnimData):
+            self.assertTrue(anim.keyed, name)
+            pass
+        self.assertSameOutputs(expected, actual)
+        pass # end func
+
+    def testReduceQuat(self):
+        expected = self.read("-quat")
+        actual   = self.read("-quat", "-reduce")
+        self.assertEqual(readAnimType(os.path.join(self.convert("-quat", "-reduce"), "skin_Skin0.anim")), 5)
+        a = expected["skin_Skin0.anim"]
+        b = actual["skin_Skin0.anim"]
+        self.assertEqual(len(a.clips), len(b.clips))
+        for clipA, clipB in zip(a.clips, b.clips):
+            # 四元数插值之后重新归一化，只有float舍入误差
+            error = numpy.abs(clipA.getFrames().astype(numpy.float64) - clipB.getFrames()).max()
+            self.assertLess(error, 1e-6)
+            pass
+        pass # end func
+
+    def testKeys(self):
+        expected = self.read()
+        actual   = self.read("-keys")
+        keyed    = [name for name, anim in filterOutputs(actual, Stage3DReader.AnimData) if anim.keyed]
+        self.assertIn("teapot_Teapot001.anim", keyed)
+        self.assertEqual(readAnimType(os.path.join(self.convert("-keys"), "teapot_Teapot001.anim")), 3)
+        self.assertSameOutputs(expected, actual)
+        pass # end func
+
+    def testKeyedCameraFrameCount(self):
+        expected = self.read()["Test22_.camera"]
+        data     = zlib.decompress(readBytes(os.path.join(self.convert("-reduce"), "Test22_.camera")))
+        # 名称、5个float以及3*4矩阵之后为帧数，关键帧动画为负数
+        size     = struct.unpack_from("<i", data)[0]
+        count    = struct.unpack_from("<i", data, 4 + size + 17 * 4)[0]
+        self.assertEqual(count, -expected.anim.frameNum)
+        camera   = Stage3DReader.parseCamera(data)
+        self.assertTrue(camera.anim.tracks is not None)
+        numpy.testing.assert_array_equal(expected.anim.getFrames(), camera.anim.getFrames())
+        pass # end func
+
+    def testBounds(self):
+        expected = self.read()
+        actual   = self.read("-bounds")
+        for name, mesh in filterOutputs(actual, Stage3DReader.MeshData):
+            for subMesh in mesh.subMeshes:
+                vertices = subMesh.getAttributes()["vertices"]
+                self.assertEqual(subMesh.bounds.tolist(), vertices.min(axis = 0).tolist() + vertices.max(axis = 0).tolist())
+                pass
+            pass
+        for name, anim in filterOutputs(actual, Stage3DReader.AnimData):
+            frames = anim.clips[0].getFrames()
+            self.assertEqual(anim.bounds.shape, (anim.clips[0].frameNum, 10), name)
+            if anim.type != Stage3DReader.ANIM_FRAME:
+                continue
+            # 帧动画的每一帧包围盒为顶点经过该帧矩阵变换之后的包围盒
+            points = Stage3DReader.expandMesh(actual[name[0:-5] + ".mesh"])["vertices"].astype(numpy.float64)
+            for frame, bounds in zip(frames[:, 0], anim.bounds):
+                matrix = frame.reshape(3, 4).astype(numpy.float64)
+                moved  = numpy.dot(points, matrix[:, 0:3].T) + matrix[:, 3]
+                numpy.testing.assert_allclose(bounds[0:6], numpy.concatenate([moved.min(axis = 0), moved.max(axis = 0)]), rtol = 1e-5, atol = 1e-3)
+                pass
+            pass
+        # 包围盒附加在文件末尾，其它数据不变
+        self.assertSameOutputs(expected, actual)
+        pass # end func
+
+    def testPack(self):
+        outDir   = self.convert()
+        packDir  = self.convert("-pack")
+        packs    = sorted(glob.glob(os.path.join(packDir, "*.pack")))
+        self.assertEqual(len(packs), len(TEST_FILES))
+        names    = []
+        for fileName in packs:
+            pack = Stage3DReader.PackReader(fileName)
+            try:
+                for entry in pack.entries:
+                    data = zlib.decompress(readBytes(os.path.join(outDir, entry.name)))
+                    self.assertEqual(os.path.splitext(entry.name)[1], entry.type)
+                    self.assertEqual(entry.rawLength, len(data))
+                    self.assertEqual(str(pack.read(entry.name)), data, entry.name)
+                    names.append(entry.name)
+                    pass
+                pass
+            finally:
+                pack.close()
+                pass
+            pass
+        self.assertEqual(sorted(names), sorted(readOutputs(outDir).keys()))
+        pass # end func
+
+    def testUnknownMeshVersion(self):
+        self.assertRaises(ValueError, Stage3DReader.parseMesh, struct.pack("<ii", -5, 0))
+        pass # end func
+
+    pass # end class
+
+if __name__ == "__main__":
+    unittest.main()
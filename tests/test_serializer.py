@@ -0,0 +1,62 @@
+# coding: utf-8
+
+'''
+序列化回归测试:转换fbx目录下的所有示例文件，输出必须与golden目录中的文件逐字节相同。
+golden文件由优化之前的转换脚本生成，每个子目录对应一组参数。没有安装Fbxsdk，golden文件以及测试的转换
+均使用FbxBinary.py解析，Fbxsdk的解析路径没有golden文件覆盖。
+
+运行:
+    python -m unittest discover tests
+'''
+
+import os
+import shutil
+import unittest
+
+from tests.convert import FBX_FILES, convert, listOutputs, readBytes
+
+# golden文件目录
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+# golden子目录 -> 转换参数
+OPTION_SETS = {
+    "default"   : [],
+    "anim"      : ["-normal", "-uv0", "-uv1", "-anim"],
+}
+
+class SerializerTest(unittest.TestCase):
+    """docstring for SerializerTest"""
+
+    # 使用options转换并与golden子目录name逐个文件比较，默认使用name对应的参数
+    def checkOptionSet(self, name, options = None):
+        goldenDir = os.path.join(GOLDEN_DIR, name)
+        outDir    = convert(FBX_FILES, OPTION_SETS[name] if options is None else options)
+        try:
+            self.assertEqual(listOutputs(goldenDir), listOutputs(outDir))
+            for fileName in listOutputs(goldenDir):
+                same = readBytes(os.path.join(goldenDir, fileName)) == readBytes(os.path.join(outDir, fileName))
+                self.assertTrue(same, "%s/%s differs from golden file" % (name, fileName))
+                pass
+            pass
+        finally:
+            shutil.rmtree(outDir)
+            pass
+        pass # end func
+
+    def testDefault(self):
+        self.checkOptionSet("default")
+        pass # end func
+
+    def testAnim(self):
+        self.checkOptionSet("anim")
+        pass # end func
+
+    # 没有动画时-reduce不改变输出
+    def testReduceWithoutAnim(self):
+        self.checkOptionSet("default", ["-reduce"])
+        pass # end func
+
+    pass # end class
+
+if __name__ == "__main__":
+    unittest.main()